@@ -0,0 +1,992 @@
+"""
+Benchmarks de rendimiento del juego.
+
+Uso:
+    python -m app.bench multimuestra --repeticiones 5 --n 3
+    python -m app.bench carga --registros 100000
+    python -m app.bench memoria --registros 20000
+    python -m app.bench corte --repeticiones 5
+    python -m app.bench normalizacion --registros 20000
+    python -m app.bench reruns --evaluaciones 40 --repeticiones 20
+    python -m app.bench arranque --evaluaciones 2000 --repeticiones 3
+    python -m app.bench historial --registros 50000
+    python -m app.bench aulas --aulas 10 --demora 0.5
+    python -m app.bench prompts --repeticiones 2
+    python -m app.bench golden --repeticiones 2 --guardar-base
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import requests
+
+from app import storage
+from app.events import EQUIPOS_INICIALES, EVENTOS, FORMATOS_ENTREGA, OPCIONES_TABLERO, formato_sugerido
+from app.models import Escandalo, Evaluacion, ImpactoPolitico, Scores
+from app.llm import (
+    MODELO_DEFAULT,
+    URL_OLLAMA_DEFAULT,
+    ErrorRespuestaLLM,
+    evaluar_multimuestra,
+    evaluar_prompt,
+    generar_hasta_json,
+    llamar_ollama,
+)
+from app.metricas import ESPERA_ESCRITURA
+from app.prompts import SYSTEM_PROMPT, VARIANTE_PROMPT_DEFAULT, VARIANTES_PROMPT, construir_prompt_usuario
+
+
+# Entrega fija para que las corridas sean comparables
+ENTREGA_MUESTRA = {
+    "etapa": "Internas",
+    "ronda": "R1",
+    "partido": "Partido Progresista",
+    "candidato": "Ana Martínez",
+    "perfil": "Ex intendente, 15 años en política, perfil moderado",
+    "situacion_interna": "Tensiones entre corrientes históricas y nuevas generaciones.",
+    "entrega_textual": "Slogan: Ciudad Oriental, de todos\n\nPropuesta: Boleto gratuito para estudiantes y jubilados en todo el departamento.",
+    "tablero": {
+        "segmento": "Jóvenes urbanos",
+        "tono": "Positivo (propuesta)",
+        "canal": "Redes sociales",
+        "alianza_interna": "Unidad (mix)",
+    },
+    "formato": "Afiche (slogan + promesa)",
+}
+
+
+def prompt_muestra() -> str:
+    """Prompt completo (sistema + usuario) de la entrega fija."""
+    datos = dict(ENTREGA_MUESTRA)
+    prompt_usuario = construir_prompt_usuario(evento=EVENTOS[datos["ronda"]], **datos)
+    return f"{SYSTEM_PROMPT}\n\n{prompt_usuario}"
+
+
+def _reporte(nombre: str, totales: List[int], segundos: float, llamadas: int) -> None:
+    desvio = statistics.pstdev(totales) if len(totales) > 1 else 0.0
+    print(
+        f"{nombre:<14} evaluaciones={len(totales):<4} llamadas={llamadas:<4} "
+        f"tiempo={segundos:7.2f}s  llamadas/s={llamadas / segundos:5.2f}  "
+        f"s/evaluación={segundos / max(len(totales), 1):6.2f}  "
+        f"total_final: media={statistics.mean(totales):6.2f} σ={desvio:5.2f} "
+        f"rango={max(totales) - min(totales)}"
+    )
+
+
+def bench_multimuestra(args: argparse.Namespace) -> None:
+    """
+    Compara una muestra vs N muestras concurrentes sobre el mismo prompt:
+    throughput (llamadas/s) y varianza del total_final entre repeticiones.
+    """
+    prompt = prompt_muestra()
+
+    totales: List[int] = []
+    inicio = time.perf_counter()
+    for _ in range(args.repeticiones):
+        totales.append(evaluar_prompt(args.url, args.modelo, prompt).evaluacion.total_final)
+    _reporte("1 muestra", totales, time.perf_counter() - inicio, args.repeticiones)
+
+    totales = []
+    inicio = time.perf_counter()
+    for _ in range(args.repeticiones):
+        resultado = evaluar_multimuestra(args.url, args.modelo, prompt, n=args.n)
+        totales.append(resultado.evaluacion.total_final)
+    _reporte(f"{args.n} muestras", totales, time.perf_counter() - inicio, args.repeticiones * args.n)
+
+
+def bench_corte(args: argparse.Namespace) -> None:
+    """
+    Generación completa (sin streaming) vs corte al cerrar el primer objeto JSON:
+    tokens generados y latencia por llamada.
+    """
+    prompt = prompt_muestra()
+    for nombre, funcion in (("completa", llamar_ollama), ("corte JSON", generar_hasta_json)):
+        tokens: List[int] = []
+        inicio = time.perf_counter()
+        for _ in range(args.repeticiones):
+            tokens.append(funcion(args.url, args.modelo, prompt).get("eval_count", 0))
+        segundos = time.perf_counter() - inicio
+        print(
+            f"{nombre:<12} tokens generados: media={statistics.mean(tokens):7.1f} max={max(tokens):5d}  "
+            f"s/llamada={segundos / args.repeticiones:6.2f}"
+        )
+
+
+def evaluacion_muestra(i: int = 0) -> Evaluacion:
+    """Evaluación sintética con valores que varían según i."""
+    return Evaluacion(
+        equipo=ENTREGA_MUESTRA["candidato"],
+        partido=ENTREGA_MUESTRA["partido"],
+        candidato=ENTREGA_MUESTRA["candidato"],
+        etapa=ENTREGA_MUESTRA["etapa"],
+        ronda=ENTREGA_MUESTRA["ronda"],
+        scores=Scores(i % 21, (i + 3) % 21, (i + 7) % 21, (i + 11) % 21, (i + 13) % 21),
+        total_sin_shock=0,
+        shock_opinion_publica=i % 7 - 3,
+        total_final=0,
+        escandalo=Escandalo(visible=i % 5 == 0, severidad=("Baja", "Media", "Alta")[i % 3], motivo="Declaraciones polémicas"),
+        fortalezas=["Mensaje claro y directo", "Buena conexión con el segmento"],
+        debilidades=["Propuesta poco financiada", "Tono algo genérico"],
+        titular=f"Candidata presenta propuesta de transporte (#{i})",
+        devolucion_gm="La pieza instala el tema del transporte con claridad, aunque la viabilidad fiscal queda en duda. " * 3,
+        impacto_politico=ImpactoPolitico("Sube", "Se mantiene", "Sube", "Baja", "Se mantiene"),
+    )
+
+
+def _cronometrar(funcion, registros: list) -> float:
+    inicio = time.perf_counter()
+    for r in registros:
+        funcion(r)
+    return time.perf_counter() - inicio
+
+
+def bench_carga(args: argparse.Namespace) -> None:
+    """
+    Deserialización de registros canónicos: from_dict (normaliza todo)
+    vs from_dict_confiable (camino rápido para nuestros propios logs).
+    """
+    lineas = [json.dumps(evaluacion_muestra(i).to_dict(), ensure_ascii=False) for i in range(args.registros)]
+
+    inicio = time.perf_counter()
+    dicts = [json.loads(l) for l in lineas]
+    t_json = time.perf_counter() - inicio
+
+    # from_dict muta el dict recibido, por eso cada camino usa su propia copia
+    t_completo = _cronometrar(Evaluacion.from_dict, [json.loads(l) for l in lineas])
+    t_confiable = _cronometrar(Evaluacion.from_dict_confiable, dicts)
+
+    n = args.registros
+    print(f"registros={n}")
+    print(f"json.loads         {t_json:7.3f}s  ({t_json / n * 1e6:6.2f} µs/registro)")
+    print(f"from_dict          {t_completo:7.3f}s  ({t_completo / n * 1e6:6.2f} µs/registro)")
+    print(f"from_dict_confiable{t_confiable:7.3f}s  ({t_confiable / n * 1e6:6.2f} µs/registro)")
+    print(f"aceleración deserialización: x{t_completo / t_confiable:.1f}")
+    print(f"aceleración carga (json + deserialización): x{(t_json + t_completo) / (t_json + t_confiable):.1f}")
+
+
+# Salida típica (y desprolija) del LLM: tildes, mayúsculas, sinónimos, strings
+RESPUESTA_LLM_MUESTRA = {
+    "Equipo": "Ana Martínez",
+    "partido": "Partido Progresista",
+    "candidato": "Ana Martínez",
+    "etapa": "Internas",
+    "ronda": "R1",
+    "scores": {"claridad": "15/20", "Estrategia": 14, "credibilidad": 12.0,
+               "emoción_identidad": "16 puntos", "Riesgo/Backlash": 22},
+    "total_sin_shock": 79,
+    "shock": "+2",
+    "total_final": 81,
+    "escándalo": {"visible": "Sí", "severidad": "media", "motivo": " Polémica por la propuesta "},
+    "fortalezas": ["Mensaje claro", "Buen slogan"],
+    "debilidades": "Poco financiamiento",
+    "titular": "Martínez apuesta al transporte",
+    "devolucion_gm": "La pieza instala el tema con claridad.",
+    "impacto_politico": {"instalación": "Al alza", "persuasión": "SE MANTIENE", "Movilización": "Alto",
+                         "reputación": "sin cambios", "riesgo": "baja"},
+}
+
+
+def bench_normalizacion(args: argparse.Namespace) -> None:
+    """
+    Costo de Evaluacion.from_dict sobre salida cruda del LLM (claves con
+    tildes, sinónimos, strings numéricos) y sobre registros ya canónicos.
+    """
+    n = args.registros
+    crudo = json.dumps(RESPUESTA_LLM_MUESTRA, ensure_ascii=False)
+    canonico = json.dumps(Evaluacion.from_dict(json.loads(crudo)).to_dict(), ensure_ascii=False)
+    for nombre, texto in (("respuesta LLM", crudo), ("registro canónico", canonico)):
+        dicts = [json.loads(texto) for _ in range(n)]
+        segundos = _cronometrar(Evaluacion.from_dict, dicts)
+        print(f"{nombre:<18} {segundos / n * 1e6:7.2f} µs/registro")
+
+
+def _medir_memoria(funcion):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, memoria, segundos
+
+
+@contextmanager
+def _logs_temporales() -> Iterator[Path]:
+    """Usa una carpeta de logs temporal y al salir vuelve a la anterior."""
+    anterior = storage.LOGS_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            yield storage.configurar_logs(tmp)
+        finally:
+            storage.configurar_logs(anterior)
+
+
+def bench_memoria(args: argparse.Namespace) -> None:
+    """
+    Memoria por registro y costo del ranking: lista de Evaluacion vs EvaluacionBatch.
+    """
+    n = args.registros
+    with _logs_temporales() as tmp:
+        with open(tmp / "session_bench.jsonl", "w", encoding="utf-8") as f:
+            for i in range(n):
+                registro = {"esquema": storage.ESQUEMA_VERSION, "evaluacion": evaluacion_muestra(i).to_dict()}
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+        lista, mem_lista, t_lista = _medir_memoria(storage.cargar_evaluaciones)
+        batch, mem_batch, t_batch = _medir_memoria(storage.cargar_batch)
+
+        inicio = time.perf_counter()
+        ranking_lista = storage.obtener_ranking(lista)
+        r_lista = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        ranking_batch = storage.obtener_ranking(batch)
+        r_batch = time.perf_counter() - inicio
+        assert ranking_lista == ranking_batch
+
+        print(f"registros={n}")
+        print(f"lista de Evaluacion  {mem_lista / n:8.1f} bytes/registro  carga={t_lista:6.2f}s  ranking={r_lista * 1e3:7.2f}ms")
+        print(f"EvaluacionBatch      {mem_batch / n:8.1f} bytes/registro  carga={t_batch:6.2f}s  ranking={r_batch * 1e3:7.2f}ms")
+        print(f"reducción de memoria: x{mem_lista / mem_batch:.1f}")
+
+
+def bench_historial(args: argparse.Namespace) -> None:
+    """
+    Una página del Noticiero: cargar todo el historial vs leer_historial con cursor.
+    """
+    n = args.registros
+    with _logs_temporales() as tmp:
+        prompt = prompt_muestra()
+        with open(tmp / "session_bench.jsonl", "w", encoding="utf-8") as f:
+            for i in range(n):
+                registro = {"prompt_completo": prompt, "esquema": storage.ESQUEMA_VERSION, "evaluacion": evaluacion_muestra(i).to_dict()}
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+        def todo_y_cortar():
+            return storage.cargar_evaluaciones()[-20:][::-1]
+
+        def primera_pagina():
+            return storage.leer_historial(limite=20)
+
+        def filtrada():
+            return storage.leer_historial(storage.FiltroHistorial(equipo="Ana Martínez"), limite=20)
+
+        print(f"registros={n}")
+        for nombre, funcion in [("cargar todo + últimas 20", todo_y_cortar), ("leer_historial (página 1)", primera_pagina), ("leer_historial con filtro", filtrada)]:
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            funcion()
+            segundos = time.perf_counter() - inicio
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{nombre:28s} {segundos * 1e3:9.1f}ms  pico={pico / 1024 / 1024:8.2f}MiB")
+
+
+PAGINAS = ["Juego", "Pantalla", "Ranking", "Noticiero", "Rúbrica", "Configuración"]
+
+
+def bench_reruns(args: argparse.Namespace) -> None:
+    """
+    Tiempo de rerun del script de Streamlit por página (AppTest, sin navegador).
+
+    Se siembran logs sintéticos en un directorio temporal y, para cada
+    página, se mide la mediana de re-ejecutar el script sin cambios.
+    """
+    from streamlit.testing.v1 import AppTest
+    from app import state
+
+    script = str(Path(__file__).with_name("app.py"))
+    with _logs_temporales() as tmp:
+        with open(tmp / "session_bench.jsonl", "w", encoding="utf-8") as f:
+            for i in range(args.evaluaciones):
+                registro = {"esquema": storage.ESQUEMA_VERSION, "evaluacion": evaluacion_muestra(i).to_dict()}
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        state._estado = None
+
+        print(f"evaluaciones={args.evaluaciones} repeticiones={args.repeticiones}")
+        for pagina in PAGINAS:
+            at = AppTest.from_file(script, default_timeout=60)
+            at.run()
+            at.sidebar.radio[0].set_value(pagina).run()
+            tiempos = []
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                at.run()
+                tiempos.append(time.perf_counter() - inicio)
+            errores = f"  errores={len(at.exception)}" if at.exception else ""
+            print(f"{pagina:14s} mediana={statistics.median(tiempos) * 1e3:7.1f}ms  mín={min(tiempos) * 1e3:7.1f}ms{errores}")
+        # El estado compartido quedó cargado con los logs temporales
+        state._estado = None
+
+
+# Módulos cuyo tiempo de import se reporta en el perfil de arranque
+MODULOS_PERFIL = [
+    "streamlit", "pandas", "requests",
+    "app.models", "app.events", "app.prompts", "app.storage", "app.state",
+    "app.llm", "app.render", "app.ui", "app.paginas", "app.paginas.juego",
+]
+
+_SCRIPT_PRIMER_RENDER = """
+import sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+print(time.perf_counter() - inicio, len(at.exception), 'pandas' in sys.modules)
+"""
+
+
+def _perfil_imports(entorno: dict, cwd: str) -> dict:
+    """Tiempo acumulado de import (ms) de cada módulo, en un proceso nuevo (-X importtime)."""
+    codigo = "import streamlit\n" + "\n".join(
+        f"import {m}" for m in MODULOS_PERFIL if m.startswith("app.")
+    )
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        env=entorno, cwd=cwd, capture_output=True, text=True
+    ).stderr
+    tiempos = {}
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        nombre = nombre.strip()
+        if nombre in MODULOS_PERFIL and acumulado.strip().isdigit():
+            tiempos[nombre] = int(acumulado) / 1000
+    return tiempos
+
+
+def bench_arranque(args: argparse.Namespace) -> None:
+    """
+    Perfil de arranque en frío: import por módulo y primer render de la app.
+
+    Cada medición corre en un proceso nuevo con un historial sintético de
+    `--evaluaciones` registros. El primer render es la primera ejecución
+    completa del script (AppTest), lo que ve un aula al abrir la app.
+    """
+    script = str(Path(__file__).with_name("app.py"))
+    raiz = str(Path(__file__).resolve().parent.parent)
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = Path(tmp) / "logs"
+        logs.mkdir()
+        with open(logs / "session_bench.jsonl", "w", encoding="utf-8") as f:
+            for i in range(args.evaluaciones):
+                registro = {"esquema": storage.ESQUEMA_VERSION, "evaluacion": evaluacion_muestra(i).to_dict()}
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        entorno = dict(os.environ, PYTHONPATH=raiz, JUEGO_LOGS_DIR=str(logs))
+
+        print(f"evaluaciones={args.evaluaciones} repeticiones={args.repeticiones}")
+        perfiles = [_perfil_imports(entorno, tmp) for _ in range(args.repeticiones)]
+        print("import (acumulado, mediana):")
+        for modulo in MODULOS_PERFIL:
+            valores = [p[modulo] for p in perfiles if modulo in p]
+            if valores:
+                print(f"  {modulo:22s} {statistics.median(valores):8.1f}ms")
+            else:
+                print(f"  {modulo:22s}        -  (no se importa)")
+
+        renders = []
+        for _ in range(args.repeticiones):
+            salida = subprocess.run(
+                [sys.executable, "-c", _SCRIPT_PRIMER_RENDER, script],
+                env=entorno, cwd=tmp, capture_output=True, text=True
+            ).stdout.split()
+            renders.append((float(salida[0]), salida[1], salida[2]))
+        tiempos = [r[0] for r in renders]
+        print(f"primer render: mediana={statistics.median(tiempos):.2f}s  mín={min(tiempos):.2f}s  "
+              f"errores={renders[-1][1]}  pandas importado={renders[-1][2]}")
+
+
+# Rondas de cada etapa en el orden del juego (R1 -> Cierre)
+ETAPA_RONDA = {"R1": "Internas", "R2": "Internas", "R3": "Nacional", "R4": "Nacional", "Cierre": "Nacional"}
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p * len(ordenados)) - 1)]
+
+
+def _fila_latencias(nombre: str, valores: List[float]) -> str:
+    if not valores:
+        return f"  {nombre:<16} -"
+    return (
+        f"  {nombre:<16} p50={_percentil(valores, 0.5) * 1e3:8.1f}ms  p95={_percentil(valores, 0.95) * 1e3:8.1f}ms  "
+        f"p99={_percentil(valores, 0.99) * 1e3:8.1f}ms  máx={max(valores) * 1e3:8.1f}ms"
+    )
+
+
+def _rss_pico_mib() -> float:
+    """Pico de memoria residente del proceso (MiB), o 0 donde no hay `resource`."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def entrega_aula(equipo, ronda: str, azar: random.Random) -> dict:
+    """Entrega válida de un equipo para una ronda, con el formato que pide el evento."""
+    formato = formato_sugerido(EVENTOS[ronda]["tipo_entrega"])
+    campos = {
+        clave: f"Texto de {equipo.candidato} para {config['label'].lower()}"[:config["max_chars"]]
+        for clave, config in FORMATOS_ENTREGA[formato]["campos"].items()
+    }
+    return {
+        "equipo": equipo.nombre,
+        "etapa": ETAPA_RONDA[ronda],
+        "ronda": ronda,
+        "formato": formato,
+        "campos": campos,
+        "tablero": {clave: azar.choice(opciones) for clave, opciones in OPCIONES_TABLERO.items()},
+    }
+
+
+def bench_aulas(args: argparse.Namespace) -> None:
+    """
+    Prueba de carga: N aulas jugando a la vez R1 -> Cierre contra un Ollama simulado.
+
+    Cada equipo de cada aula es un hilo que, en cada ronda, espera un
+    tiempo de "escritura" al azar, pide turno en la cola justa, evalúa con
+    el pipeline, guarda en el estado compartido (logs incluidos) y lee el
+    ranking como la Pantalla. Los equipos de un aula pasan de ronda juntos.
+    Todo corre en un directorio de logs temporal.
+    """
+    from app.mock_ollama import iniciar_mock
+    from app.pipeline import evaluar_entrega, preparar_entrega, presupuestos_logs
+    from app.state import EstadoJuego
+    from app.turnos import ColaLlena, Planificador
+
+    servidor = None
+    url = args.url
+    if url is None:
+        servidor, url = iniciar_mock(demora=args.demora, por_token=args.por_token, modelo=args.modelo, semilla=args.semilla)
+
+    registros: Dict[str, List[float]] = {"espera": [], "evaluacion": [], "guardado": [], "ranking": [], "total": []}
+    errores: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    with _logs_temporales() as tmp:
+        estado = EstadoJuego()
+        planificador = Planificador(max_concurrentes=args.workers, max_en_cola=args.en_cola)
+        presupuestos = presupuestos_logs()
+        rondas = list(EVENTOS)
+        equipos = EQUIPOS_INICIALES
+
+        def jugar(aula: int, equipo, barrera: threading.Barrier) -> None:
+            try:
+                rondas_equipo(aula, equipo, barrera)
+            except BaseException:
+                # Que el resto del aula no quede esperando en la barrera
+                barrera.abort()
+                raise
+
+        def rondas_equipo(aula: int, equipo, barrera: threading.Barrier) -> None:
+            azar = random.Random(f"{args.semilla}-{aula}-{equipo.nombre}")
+            for ronda in rondas:
+                time.sleep(azar.uniform(0, args.pensar))
+                entrega = preparar_entrega(entrega_aula(equipo, ronda, azar))
+                inicio = time.perf_counter()
+                try:
+                    with planificador.turno(f"aula-{aula}", equipo.candidato):
+                        turno = time.perf_counter()
+                        resultado = evaluar_entrega(entrega, url, args.modelo, presupuestos)
+                    evaluado = time.perf_counter()
+                    estado.agregar(
+                        evaluacion=resultado.evaluacion,
+                        prompt_completo=resultado.prompt_completo,
+                        respuesta_llm=resultado.respuesta_llm,
+                        modelo_usado=args.modelo,
+                        metadatos=resultado.metadatos
+                    )
+                    guardado = time.perf_counter()
+                    estado.ranking()
+                    fin = time.perf_counter()
+                    with lock:
+                        registros["espera"].append(turno - inicio)
+                        registros["evaluacion"].append(evaluado - turno)
+                        registros["guardado"].append(guardado - evaluado)
+                        registros["ranking"].append(fin - guardado)
+                        registros["total"].append(guardado - inicio)
+                except ColaLlena:
+                    with lock:
+                        errores["cola llena"] = errores.get("cola llena", 0) + 1
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    with lock:
+                        errores[type(e).__name__] = errores.get(type(e).__name__, 0) + 1
+                barrera.wait()
+
+        escrituras_antes, espera_antes = ESPERA_ESCRITURA.totales(archivo="session")
+        rss_antes = _rss_pico_mib()
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.aulas * len(equipos)) as pool:
+            futuros = []
+            for aula in range(args.aulas):
+                barrera = threading.Barrier(len(equipos))
+                futuros += [pool.submit(jugar, aula, equipo, barrera) for equipo in equipos]
+            for futuro in futuros:
+                futuro.result()
+        segundos = time.perf_counter() - inicio
+        rss_despues = _rss_pico_mib()
+        escrituras, espera = ESPERA_ESCRITURA.totales(archivo="session")
+        escrituras, espera = escrituras - escrituras_antes, espera - espera_antes
+        archivos = len(list(tmp.glob("session_*.jsonl")))
+
+    if servidor is not None:
+        servidor.shutdown()
+
+    pedidas = args.aulas * len(equipos) * len(rondas)
+    ok = len(registros["total"])
+    cola = planificador.estadisticas()
+    print(
+        f"aulas={args.aulas} equipos/aula={len(equipos)} rondas={len(rondas)} workers={args.workers} "
+        f"en_cola={args.en_cola} demora={args.demora}s por_token={args.por_token}s"
+    )
+    detalle = ", ".join(f"{n} {tipo}" for tipo, n in sorted(errores.items()))
+    print(f"evaluaciones: {ok}/{pedidas} ok" + (f" ({detalle})" if detalle else ""))
+    print(f"duración={segundos:.1f}s  throughput={ok / segundos * 60:.1f} eval/min")
+    print("latencias:")
+    print(_fila_latencias("espera de turno", registros["espera"]))
+    print(_fila_latencias("evaluación", registros["evaluacion"]))
+    print(_fila_latencias("guardado", registros["guardado"]))
+    print(_fila_latencias("ranking", registros["ranking"]))
+    print(_fila_latencias("total", registros["total"]))
+    print(f"cola: máximo configurado {args.workers} en curso + {args.en_cola} esperando, {cola['rechazados']} rechazados")
+    if rss_despues:
+        print(f"memoria: RSS pico +{rss_despues - rss_antes:.1f}MiB  ≈{(rss_despues - rss_antes) / args.aulas:.2f}MiB por aula")
+    espera_media = espera / escrituras * 1e3 if escrituras else 0.0
+    print(f"almacenamiento: {escrituras} escrituras en {archivos} archivos  espera media del lock={espera_media:.3f}ms")
+
+
+# Corpus fijo del A/B de prompts: los cuatro formatos, entregas buenas, flojas e incoherentes con el tablero
+CORPUS_PROMPTS = [
+    {"equipo": "Equipo 1", "ronda": "R1", "formato": "Afiche",
+     "slogan": "Ciudad Oriental, de todos", "propuesta": "Boleto gratuito para estudiantes y jubilados en todo el departamento.",
+     "segmento": "Jóvenes urbanos", "tono": "Positivo (propuesta)", "canal": "Redes sociales", "alianza_interna": "Unidad (mix)"},
+    {"equipo": "Equipo 2", "ronda": "R1", "formato": "Afiche",
+     "slogan": "Basta de lo mismo", "propuesta": "Vamos a cambiar todo.",
+     "segmento": "Interior / rural", "tono": "Duro (mano firme)", "canal": "TV", "alianza_interna": "Nuevas generaciones"},
+    {"equipo": "Equipo 3", "ronda": "R2", "formato": "Discurso",
+     "apertura": "Vengo del campo y sé lo que cuesta levantarse antes que el sol.",
+     "ejes": "1) Caminería rural en todo el departamento. 2) Créditos a tasa cero para pequeños productores. 3) Liceos con transporte asegurado.",
+     "cierre": "El interior no pide favores: pide que lo escuchen.",
+     "segmento": "Interior / rural", "tono": "Empático (cercanía)", "canal": "Acto partidario", "alianza_interna": "Históricos"},
+    {"equipo": "Equipo 4", "ronda": "R2", "formato": "Discurso",
+     "apertura": "Soy empresario y no vengo a hacer política.", "ejes": "Eficiencia. Gestión. Resultados.",
+     "cierre": "Voten por mí.",
+     "segmento": "Jóvenes urbanos", "tono": "Empático (cercanía)", "canal": "Puerta a puerta", "alianza_interna": "Históricos"},
+    {"equipo": "Equipo 1", "ronda": "R3", "formato": "Ataque",
+     "linea": "Mi rival promete orden, pero cuando gobernó la inseguridad subió un 30 %.",
+     "segmento": "Clase media metropolitana", "tono": "Contraste (comparación)", "canal": "TV", "alianza_interna": "Unidad (mix)"},
+    {"equipo": "Equipo 3", "ronda": "R3", "formato": "Ataque",
+     "linea": "Son todos unos corruptos y unos inútiles.",
+     "segmento": "Indecisos moderados", "tono": "Positivo (propuesta)", "canal": "Radio", "alianza_interna": "Neutral (evita interna)"},
+    {"equipo": "Equipo 2", "ronda": "R4", "formato": "Crisis",
+     "declaracion": "Reconozco el error de mi asesor y pido disculpas a quienes se sintieron ofendidos.",
+     "accion": "Lo aparté de la campaña hoy y publico mañana la lista completa de donantes.",
+     "segmento": "Indecisos moderados", "tono": "Empático (cercanía)", "canal": "Redes sociales", "alianza_interna": "Nuevas generaciones"},
+    {"equipo": "Equipo 4", "ronda": "R4", "formato": "Crisis",
+     "declaracion": "No tengo nada que explicar, es una operación de prensa.", "accion": "Seguimos con la agenda.",
+     "segmento": "Clase media metropolitana", "tono": "Duro (mano firme)", "canal": "TV", "alianza_interna": "Históricos"},
+    {"equipo": "Equipo 1", "ronda": "Cierre", "formato": "Discurso",
+     "apertura": "Hace cinco meses les dije que esta ciudad era de todos. Hoy lo demostramos juntos.",
+     "ejes": "1) Transporte gratuito para estudiantes. 2) Vivienda para jóvenes con ahorro previo. 3) Seguridad con policía de cercanía en cada barrio.",
+     "cierre": "El domingo no votamos a una persona: votamos a una ciudad que nos incluya.",
+     "segmento": "Jóvenes urbanos", "tono": "Positivo (propuesta)", "canal": "Acto partidario", "alianza_interna": "Unidad (mix)"},
+    {"equipo": "Equipo 4", "ronda": "Cierre", "formato": "Discurso",
+     "apertura": "Gracias.", "ejes": "Trabajo, seguridad, educación.", "cierre": "Nos vemos el domingo.",
+     "segmento": "Trabajadores formales", "tono": "Contraste (comparación)", "canal": "TV", "alianza_interna": "Neutral (evita interna)"},
+]
+
+DIMENSIONES = ("claridad", "estrategia", "credibilidad", "emocion_identidad", "riesgo_backlash")
+
+
+def _concordancia(a: List[Evaluacion], b: List[Evaluacion]) -> str:
+    """Diferencias entre dos listas de evaluaciones de las mismas entregas, en una línea."""
+    diferencias = [abs(x.total_final - y.total_final) for x, y in zip(a, b)]
+    if not diferencias:
+        return "sin pares para comparar"
+    dimensiones = {
+        d: statistics.mean(abs(getattr(x.scores, d) - getattr(y.scores, d)) for x, y in zip(a, b))
+        for d in DIMENSIONES
+    }
+    escandalo = statistics.mean(x.escandalo.visible == y.escandalo.visible for x, y in zip(a, b))
+    return (
+        f"pares={len(diferencias)}  |Δ total| media={statistics.mean(diferencias):5.2f} máx={max(diferencias)}  "
+        f"±5 pts={statistics.mean(d <= 5 for d in diferencias) * 100:5.1f}%  escándalo igual={escandalo * 100:5.1f}%\n"
+        f"    |Δ| por dimensión: " + "  ".join(f"{d}={v:.2f}" for d, v in dimensiones.items())
+    )
+
+
+def bench_prompts(args: argparse.Namespace) -> None:
+    """
+    A/B de variantes de prompt sobre un corpus fijo: tamaño del prompt,
+    tokens de prompt según Ollama, latencia y concordancia de puntajes.
+
+    Cada entrega se evalúa con todas las variantes, alternando el orden en
+    cada repetición. Con más de una repetición se reporta también la
+    concordancia de cada variante consigo misma (el ruido del modelo), que
+    es la referencia para juzgar la diferencia entre variantes.
+    """
+    from app.cli import leer_filas
+    from app.pipeline import contar_tokens_prompt, evaluar_entrega, preparar_entrega, presupuestos_logs
+
+    filas = leer_filas(Path(args.entrada)) if args.entrada else CORPUS_PROMPTS
+    entregas = [preparar_entrega(fila, numero) for numero, fila in enumerate(filas, 1)]
+    variantes = list(VARIANTES_PROMPT)
+
+    print(f"entregas={len(entregas)} variantes={variantes}")
+    tamanos = {v: [len(e.prompt_completo(v)) for e in entregas] for v in variantes}
+    base = statistics.mean(tamanos[variantes[0]])
+    for variante, valores in tamanos.items():
+        media = statistics.mean(valores)
+        print(f"  {variante:<10} caracteres: media={media:7.0f}  ({(media / base - 1) * 100:+5.1f}% vs {variantes[0]})")
+    if args.solo_tamano:
+        return
+
+    presupuestos = presupuestos_logs()
+    # variante -> repetición -> evaluación por entrega (None si falló)
+    evaluaciones: Dict[str, List[list]] = {v: [] for v in variantes}
+    medidas: Dict[str, Dict[str, list]] = {v: {"segundos": [], "tokens": [], "reparadas": []} for v in variantes}
+    for repeticion in range(args.repeticiones):
+        for v in variantes:
+            evaluaciones[v].append([None] * len(entregas))
+        for i, entrega in enumerate(entregas):
+            orden = variantes if (i + repeticion) % 2 == 0 else variantes[::-1]
+            for variante in orden:
+                try:
+                    resultado = evaluar_entrega(entrega, args.url, args.modelo, presupuestos, variante_prompt=variante)
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"  {variante} entrega {entrega.fila}: {e}")
+                    continue
+                generacion = resultado.metadatos["generacion"]
+                medidas[variante]["segundos"].append(generacion["segundos"])
+                medidas[variante]["tokens"].append(generacion["eval_count"])
+                medidas[variante]["reparadas"].append(bool(generacion.get("reparacion")))
+                evaluaciones[variante][repeticion][i] = resultado.evaluacion
+
+    # Con el corte temprano Ollama no llega a informar prompt_eval_count: se cuenta
+    # aparte, con la marca de contar_tokens_prompt para que el prompt recién
+    # evaluado no salga del caché de Ollama con casi cero tokens
+    tokens_prompt: Dict[str, List[int]] = {}
+    for variante in variantes:
+        try:
+            tokens_prompt[variante] = [
+                contar_tokens_prompt(args.url, args.modelo, e.prompt_completo(variante))[1]
+                for e in entregas
+            ]
+        except requests.exceptions.RequestException as e:
+            print(f"  no se pudieron contar los tokens de {variante}: {e}")
+            tokens_prompt[variante] = [0]
+
+    print(f"repeticiones={args.repeticiones} modelo={args.modelo}")
+    for variante in variantes:
+        m = medidas[variante]
+        if not m["segundos"]:
+            print(f"  {variante:<10} sin evaluaciones exitosas")
+            continue
+        print(
+            f"  {variante:<10} ok={len(m['segundos']):<4} tokens prompt={statistics.mean(tokens_prompt[variante]):7.1f}  "
+            f"tokens generados={statistics.mean(m['tokens']):6.1f}  p50={_percentil(m['segundos'], 0.5):6.2f}s  "
+            f"p95={_percentil(m['segundos'], 0.95):6.2f}s  reparadas={sum(m['reparadas'])}"
+        )
+
+    def pares(x: list, y: list):
+        juntas = [(a, b) for a, b in zip(x, y) if a is not None and b is not None]
+        return [a for a, _ in juntas], [b for _, b in juntas]
+
+    print("concordancia:")
+    for a, b in zip(variantes, variantes[1:]):
+        xs, ys = [], []
+        for repeticion in range(args.repeticiones):
+            x, y = pares(evaluaciones[a][repeticion], evaluaciones[b][repeticion])
+            xs += x
+            ys += y
+        print(f"  {a} vs {b}: {_concordancia(xs, ys)}")
+    if args.repeticiones > 1:
+        for variante in variantes:
+            x, y = pares(evaluaciones[variante][0], evaluaciones[variante][1])
+            print(f"  {variante} vs {variante} (ruido): {_concordancia(x, y)}")
+
+
+# Golden set versionado para detectar regresiones de latencia y estabilidad
+GOLDEN_DIR = Path(__file__).resolve().parent.parent / "golden"
+GOLDEN_SET_DEFAULT = GOLDEN_DIR / "entregas_v1.jsonl"
+
+# Generación reproducible: sin temperatura y con semilla fija
+OPCIONES_GOLDEN = {"temperature": 0.0, "seed": 42}
+
+# Puntos de total_final desde los que una entrega cuenta como deriva
+UMBRAL_DERIVA = 5
+
+
+def _ruta_base(golden: Path, modelo: str, variante: str) -> Path:
+    """Archivo de la línea base de un set, modelo y variante de prompt."""
+    modelo_archivo = re.sub(r"[^\w.-]+", "_", modelo)
+    return GOLDEN_DIR / "baselines" / f"{golden.stem}__{modelo_archivo}__{variante}.json"
+
+
+def _corrida_golden(entrega, args: argparse.Namespace, presupuestos: dict) -> dict:
+    """Una evaluación del golden set; los errores quedan en el resultado."""
+    from app.pipeline import evaluar_entrega
+
+    try:
+        resultado = evaluar_entrega(
+            entrega, args.url, args.modelo, presupuestos,
+            variante_prompt=args.prompt, opciones=OPCIONES_GOLDEN
+        )
+    except ErrorRespuestaLLM as e:
+        return {"error": "parseo", "detalle": str(e)}
+    except requests.exceptions.RequestException as e:
+        return {"error": "conexion", "detalle": str(e)}
+    except ValueError as e:
+        return {"error": "entrega", "detalle": str(e)}
+    evaluacion, generacion = resultado.evaluacion, resultado.metadatos["generacion"]
+    return {
+        "total_final": evaluacion.total_final,
+        "scores": {d: getattr(evaluacion.scores, d) for d in DIMENSIONES},
+        "escandalo_visible": evaluacion.escandalo.visible,
+        "severidad": evaluacion.escandalo.severidad,
+        "segundos": generacion["segundos"],
+        "eval_count": generacion["eval_count"],
+        "tokens_prompt": resultado.metadatos["tokens_prompt_estimados"],
+        "reparada": bool(generacion.get("reparacion")),
+    }
+
+
+def _consolidar(corridas: List[dict]) -> dict:
+    """Mediana de las repeticiones exitosas de una entrega (lo que se compara con la base)."""
+    ok = [c for c in corridas if "error" not in c]
+    if not ok:
+        return {}
+    return {
+        "total_final": statistics.median_low(c["total_final"] for c in ok),
+        "scores": {d: statistics.median_low(c["scores"][d] for c in ok) for d in DIMENSIONES},
+        "escandalo_visible": sum(c["escandalo_visible"] for c in ok) * 2 > len(ok),
+        "segundos": round(statistics.median(c["segundos"] for c in ok), 3),
+        "eval_count": statistics.median_low(c["eval_count"] for c in ok),
+    }
+
+
+def bench_golden(args: argparse.Namespace) -> int:
+    """
+    Golden set de regresión: latencia, tokens, fallas de parseo y deriva de puntajes.
+
+    Evalúa cada entrega del set con temperatura 0 y semilla fija, compara
+    con la línea base guardada para el mismo set, modelo y variante de
+    prompt, y revisa lo esperado de los casos de escándalo y contenido
+    sexual. Con --guardar-base la corrida pasa a ser la nueva línea base.
+
+    Returns:
+        1 si hubo fallas de parseo, expectativas incumplidas o deriva por
+        encima de UMBRAL_DERIVA; 0 si no
+    """
+    from app.cli import leer_filas
+    from app.pipeline import preparar_entrega, presupuestos_logs
+
+    golden = Path(args.set)
+    filas = leer_filas(golden)
+    huella = hashlib.sha1(golden.read_bytes()).hexdigest()[:12]
+    entregas = [preparar_entrega(fila, numero) for numero, fila in enumerate(filas, 1)]
+    ids = [fila["id"] for fila in filas]
+    faltan = (set(FORMATOS_ENTREGA) - {e.formato for e in entregas}) | (set(EVENTOS) - {e.ronda for e in entregas})
+    print(f"set={golden.name} ({huella}) entregas={len(entregas)} modelo={args.modelo} prompt={args.prompt} "
+          f"repeticiones={args.repeticiones} opciones={OPCIONES_GOLDEN}")
+    if faltan:
+        print(f"  aviso: el set no cubre {sorted(faltan)}")
+
+    presupuestos = presupuestos_logs()
+    corridas: Dict[str, List[dict]] = {i: [] for i in ids}
+    for _ in range(args.repeticiones):
+        for id_entrega, entrega in zip(ids, entregas):
+            corridas[id_entrega].append(_corrida_golden(entrega, args, presupuestos))
+
+    todas = [c for cs in corridas.values() for c in cs]
+    ok = [c for c in todas if "error" not in c]
+    errores: Dict[str, int] = {}
+    for c in todas:
+        if "error" in c:
+            errores[c["error"]] = errores.get(c["error"], 0) + 1
+    print(f"  llamadas={len(todas)} ok={len(ok)} fallas de parseo={errores.get('parseo', 0) / len(todas) * 100:.1f}% "
+          f"reparadas={sum(c['reparada'] for c in ok)} errores={errores or 'ninguno'}")
+    for id_entrega, cs in corridas.items():
+        for c in cs:
+            if "error" in c:
+                print(f"    {id_entrega}: {c['error']}: {c['detalle'][:120]}")
+    if not ok:
+        return 1
+    print(_fila_latencias("latencia", [c["segundos"] for c in ok]))
+    print(f"  tokens: prompt (estimado) media={statistics.mean(c['tokens_prompt'] for c in ok):.0f}  "
+          f"generados media={statistics.mean(c['eval_count'] for c in ok):.0f} "
+          f"p95={_percentil([c['eval_count'] for c in ok], 0.95):.0f}")
+
+    regresiones: List[str] = [f"{errores['parseo']} fallas de parseo"] if errores.get("parseo") else []
+
+    # Estabilidad: con semilla fija, las repeticiones deberían dar lo mismo
+    if args.repeticiones > 1:
+        inestables = [
+            (i, sorted({c["total_final"] for c in cs if "error" not in c}))
+            for i, cs in corridas.items()
+            if len({c["total_final"] for c in cs if "error" not in c}) > 1
+        ]
+        print(f"  estabilidad: {len(ids) - len(inestables)}/{len(ids)} entregas con el mismo total en todas las repeticiones")
+        for i, totales in inestables:
+            print(f"    {i}: totales {totales}")
+
+    # Casos con resultado esperado (escándalo, contenido sexual)
+    actual = {i: _consolidar(cs) for i, cs in corridas.items()}
+    esperadas = [(fila["id"], fila["esperado"]) for fila in filas if fila.get("esperado")]
+    incumplidas = []
+    for id_entrega, esperado in esperadas:
+        vistas = [c for c in corridas[id_entrega] if "error" not in c]
+        for c in vistas:
+            if ("escandalo_visible" in esperado and c["escandalo_visible"] != esperado["escandalo_visible"]) or \
+                    ("severidad" in esperado and c["severidad"] != esperado["severidad"]):
+                incumplidas.append(f"{id_entrega}: esperado {esperado}, vino visible={c['escandalo_visible']} severidad={c['severidad']}")
+                break
+    print(f"  casos esperados: {len(esperadas) - len(incumplidas)}/{len(esperadas)} cumplidos")
+    for linea in incumplidas:
+        print(f"    {linea}")
+    regresiones += incumplidas
+
+    # Deriva contra la línea base
+    ruta_base = _ruta_base(golden, args.modelo, args.prompt)
+    if ruta_base.exists():
+        base = json.loads(ruta_base.read_text(encoding="utf-8"))
+        if base.get("huella") != huella:
+            print(f"  aviso: la base se guardó con otra versión del set ({base.get('huella')})")
+        pares = [(i, actual[i], base["resultados"][i]) for i in ids if actual[i] and i in base["resultados"]]
+        if pares:
+            deltas = [(i, a["total_final"] - b["total_final"]) for i, a, b in pares]
+            dimensiones = {d: statistics.mean(abs(a["scores"][d] - b["scores"][d]) for _, a, b in pares) for d in DIMENSIONES}
+            escandalo = statistics.mean(a["escandalo_visible"] == b["escandalo_visible"] for _, a, b in pares)
+            segundos = statistics.median(a["segundos"] for _, a, _ in pares) / max(statistics.median(b["segundos"] for _, _, b in pares), 1e-9)
+            tokens = statistics.mean(a["eval_count"] for _, a, _ in pares) / max(statistics.mean(b["eval_count"] for _, _, b in pares), 1e-9)
+            print(f"  deriva vs base ({base.get('fecha', '?')}, {len(pares)} entregas): "
+                  f"|Δ total| media={statistics.mean(abs(d) for _, d in deltas):.2f} máx={max(abs(d) for _, d in deltas)}  "
+                  f"escándalo igual={escandalo * 100:.0f}%  latencia p50 x{segundos:.2f}  tokens generados x{tokens:.2f}")
+            print("    |Δ| por dimensión: " + "  ".join(f"{d}={v:.2f}" for d, v in dimensiones.items()))
+            derivas = [f"{i}: total {d:+d} vs base" for i, d in deltas if abs(d) > UMBRAL_DERIVA]
+            for linea in derivas:
+                print(f"    {linea}")
+            regresiones += derivas
+    else:
+        print(f"  sin línea base en {ruta_base} (guardarla con --guardar-base)")
+
+    if args.guardar_base:
+        ruta_base.parent.mkdir(parents=True, exist_ok=True)
+        ruta_base.write_text(json.dumps({
+            "set": golden.name,
+            "huella": huella,
+            "modelo": args.modelo,
+            "prompt": args.prompt,
+            "opciones": OPCIONES_GOLDEN,
+            "repeticiones": args.repeticiones,
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "resultados": {i: r for i, r in actual.items() if r},
+        }, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"  línea base guardada en {ruta_base}")
+
+    if regresiones:
+        print(f"REGRESIÓN: {len(regresiones)} problema(s)")
+        return 1
+    print("sin regresiones")
+    return 0
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.bench", description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("multimuestra", help="Una muestra vs N muestras concurrentes")
+    p.add_argument("--url", default=URL_OLLAMA_DEFAULT)
+    p.add_argument("--modelo", default=MODELO_DEFAULT)
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.add_argument("--n", type=int, default=3)
+    p.set_defaults(func=bench_multimuestra)
+
+    p = sub.add_parser("corte", help="Generación completa vs corte al cerrar el JSON")
+    p.add_argument("--url", default=URL_OLLAMA_DEFAULT)
+    p.add_argument("--modelo", default=MODELO_DEFAULT)
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.set_defaults(func=bench_corte)
+
+    p = sub.add_parser("carga", help="Recarga de logs: from_dict vs from_dict_confiable")
+    p.add_argument("--registros", type=int, default=100_000)
+    p.set_defaults(func=bench_carga)
+
+    p = sub.add_parser("normalizacion", help="Costo de from_dict sobre salida cruda del LLM")
+    p.add_argument("--registros", type=int, default=20_000)
+    p.set_defaults(func=bench_normalizacion)
+
+    p = sub.add_parser("memoria", help="Memoria por registro: lista de Evaluacion vs EvaluacionBatch")
+    p.add_argument("--registros", type=int, default=20_000)
+    p.set_defaults(func=bench_memoria)
+
+    p = sub.add_parser("reruns", help="Tiempo de rerun del script por página")
+    p.add_argument("--evaluaciones", type=int, default=40)
+    p.add_argument("--repeticiones", type=int, default=20)
+    p.set_defaults(func=bench_reruns)
+
+    p = sub.add_parser("historial", help="Página del Noticiero: historial completo vs cursor")
+    p.add_argument("--registros", type=int, default=50_000)
+    p.set_defaults(func=bench_historial)
+
+    p = sub.add_parser("arranque", help="Perfil de arranque: import por módulo y primer render")
+    p.add_argument("--evaluaciones", type=int, default=2000)
+    p.add_argument("--repeticiones", type=int, default=3)
+    p.set_defaults(func=bench_arranque)
+
+    p = sub.add_parser("aulas", help="Prueba de carga: N aulas jugando a la vez contra un Ollama simulado")
+    p.add_argument("--aulas", type=int, default=10)
+    p.add_argument("--workers", type=int, default=2, help="Evaluaciones simultáneas (cola de turnos)")
+    p.add_argument("--en-cola", type=int, default=12, help="Lugares en la cola de turnos")
+    p.add_argument("--demora", type=float, default=0.2, help="Segundos del mock antes de responder")
+    p.add_argument("--por-token", type=float, default=0.0, help="Segundos del mock por fragmento generado")
+    p.add_argument("--pensar", type=float, default=2.0, help="Máximo de segundos al azar antes de cada entrega")
+    p.add_argument("--url", help="Ollama real o simulado aparte (por defecto se levanta uno simulado)")
+    p.add_argument("--modelo", default=MODELO_DEFAULT)
+    p.add_argument("--semilla", type=int, default=0)
+    p.set_defaults(func=bench_aulas)
+
+    p = sub.add_parser("prompts", help="A/B de variantes de prompt: tamaño, tokens, latencia y concordancia")
+    p.add_argument("--entrada", help="Corpus propio en JSONL o CSV (mismo formato que la CLI); por defecto uno fijo")
+    p.add_argument("--repeticiones", type=int, default=1)
+    p.add_argument("--solo-tamano", action="store_true", help="Solo comparar el tamaño de los prompts, sin llamar al LLM")
+    p.add_argument("--url", default=URL_OLLAMA_DEFAULT)
+    p.add_argument("--modelo", default=MODELO_DEFAULT)
+    p.set_defaults(func=bench_prompts)
+
+    p = sub.add_parser("golden", help="Golden set de regresión: latencia, tokens, fallas de parseo y deriva vs la línea base")
+    p.add_argument("--set", default=str(GOLDEN_SET_DEFAULT), help="Golden set en JSONL (cada fila con id y, opcional, esperado)")
+    p.add_argument("--repeticiones", type=int, default=1)
+    p.add_argument("--guardar-base", action="store_true", help="Guardar esta corrida como línea base del set, modelo y prompt")
+    p.add_argument("--prompt", choices=list(VARIANTES_PROMPT), default=VARIANTE_PROMPT_DEFAULT, help="Variante del prompt")
+    p.add_argument("--url", default=URL_OLLAMA_DEFAULT)
+    p.add_argument("--modelo", default=MODELO_DEFAULT)
+    p.set_defaults(func=bench_golden)
+
+    args = parser.parse_args(argv)
+    sys.exit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
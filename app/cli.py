@@ -0,0 +1,432 @@
+"""
+Evaluación por lotes sin interfaz (corrección offline).
+
+Uso:
+    python -m app.cli evaluate entregas.jsonl --workers 2
+    python -m app.cli evaluate entregas.csv --muestras 3 --logs logs/curso_a
+    python -m app.cli replay --modelos llama3.2:3b gemma2:2b --limite 100
+    python -m app.cli calibrar --modelo qwen2.5:3b-instruct --limite 20
+
+Cada fila es una entrega: equipo (nombre o candidato), ronda, etapa,
+formato, las decisiones del tablero (segmento, tono, canal,
+alianza_interna) y los campos del formato (slogan, propuesta, ...). En
+JSONL el tablero y los campos pueden venir anidados en "tablero" y
+"campos". Los resultados se guardan en los mismos logs que la interfaz.
+
+`replay` vuelve a correr los prompts ya guardados en los logs contra
+otros modelos y compara puntajes, latencia y tokens/s con lo registrado.
+
+`calibrar` mide con Ollama los tokens de prompts de los logs para que la
+estimación local (tokens.py) use los caracteres por token del modelo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import requests
+
+from app import storage
+from app.cliente import ClienteServicio
+from app.llm import (
+    MAX_MUESTRAS,
+    MODELO_DEFAULT,
+    TIMEOUT_DEFAULT,
+    URL_OLLAMA_DEFAULT,
+    evaluar_prompt,
+)
+from app.pipeline import (
+    Entrega, buscar_duplicados, calibrar_tokens, evaluar_entrega, preparar_entrega, presupuestos_logs, reusar_evaluacion
+)
+from app.prompts import VARIANTE_PROMPT_DEFAULT, VARIANTES_PROMPT
+from app.router import obtener_router
+from app.tokens import MIN_OBSERVACIONES, calibracion, medir_prompt
+from app.turnos import ColaLlena
+
+
+# ============================================================================
+# LECTURA DEL LOTE
+# ============================================================================
+
+def leer_filas(ruta: Path) -> List[dict]:
+    """Lee un lote en JSONL (una entrega por línea) o CSV (con encabezado)."""
+    if ruta.suffix.lower() == ".csv":
+        with open(ruta, 'r', encoding='utf-8-sig', newline='') as f:
+            return [dict(fila) for fila in csv.DictReader(f)]
+    filas = []
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            if linea.strip():
+                filas.append(json.loads(linea))
+    return filas
+
+
+# ============================================================================
+# EVALUACIÓN
+# ============================================================================
+
+class Progreso:
+    """Contador thread-safe que imprime avance, throughput y ETA por cada entrega terminada."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.ok = 0
+        self.fallidas = 0
+        self.inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def registrar(self, ok: bool, detalle: str) -> None:
+        with self._lock:
+            if ok:
+                self.ok += 1
+            else:
+                self.fallidas += 1
+            hechas = self.ok + self.fallidas
+            segundos = time.perf_counter() - self.inicio
+            ritmo = hechas / segundos if segundos > 0 else 0.0
+            eta = (self.total - hechas) / ritmo if ritmo > 0 else 0.0
+            print(
+                f"[{hechas:>{len(str(self.total))}}/{self.total}] {hechas / self.total:6.1%}  "
+                f"{ritmo * 60:6.1f} eval/min  ETA {_duracion(eta)}  ok={self.ok} err={self.fallidas}  {detalle}",
+                flush=True
+            )
+
+
+def reporte_endpoints(url: str) -> None:
+    """Llamadas, errores y latencia por endpoint si la URL reparte entre varios."""
+    router = obtener_router(url)
+    if router is None:
+        return
+    print("\nEndpoints:")
+    for e in router.estadisticas():
+        print(f"  {'ok ' if e['sano'] else 'mal'} {e['url']:<40} llamadas={e['llamadas']:<5} "
+              f"errores={e['errores']:<4} s/llamada={e['segundos_promedio']:.2f}"
+              + (f"  último error: {e['ultimo_error']}" if e['errores'] else ""))
+
+
+def _duracion(segundos: float) -> str:
+    minutos, segundos = divmod(int(segundos), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas:d}:{minutos:02d}:{segundos:02d}"
+
+
+def _avisar_duplicados(entrega: Entrega, duplicados: List[dict]) -> None:
+    for d in duplicados:
+        print(
+            f"Fila {entrega.fila}: casi igual ({d['similitud']:.0%}) a una entrega de {d['equipo']} "
+            f"en {d['ronda']} ({d['timestamp']}, total {d['total_final']})",
+            file=sys.stderr
+        )
+
+
+def evaluar_y_guardar(entrega: Entrega, args: argparse.Namespace, presupuestos: dict) -> str:
+    """
+    Evalúa una entrega en este proceso y la guarda en los logs.
+
+    El juego es el nombre del lote: las entregas casi iguales a otras ya
+    evaluadas con el mismo archivo se avisan y, con `--duplicados reusar`,
+    toman esa evaluación sin llamar al LLM.
+
+    Returns:
+        Ruta del archivo de log
+    """
+    juego = Path(args.entrada).name
+    metadatos = {"lote": {"archivo": juego, "fila": entrega.fila}, "juego": juego}
+    coincidencias = buscar_duplicados(entrega, juego)
+    _avisar_duplicados(entrega, [c.resumen() for c in coincidencias])
+    reusable = next((c for c in coincidencias if c.reusable(entrega.to_dict())), None)
+    if args.duplicados == "reusar" and reusable is not None:
+        resultado = reusar_evaluacion(entrega, reusable, metadatos, args.prompt)
+    else:
+        resultado = evaluar_entrega(
+            entrega, args.url, args.modelo, presupuestos,
+            n_muestras=args.muestras, timeout=args.timeout,
+            metadatos=metadatos,
+            variante_prompt=args.prompt
+        )
+    return storage.guardar_evaluacion(
+        evaluacion=resultado.evaluacion,
+        prompt_completo=resultado.prompt_completo,
+        respuesta_llm=resultado.respuesta_llm,
+        modelo_usado=args.modelo,
+        metadatos=resultado.metadatos
+    )
+
+
+def evaluar_en_servicio(entrega: Entrega, args: argparse.Namespace, cliente: ClienteServicio) -> str:
+    """Manda la entrega al servicio de evaluación y espera el resultado (lo guarda el servicio)."""
+    trabajo = cliente.evaluar(
+        entrega.to_dict(), juego=Path(args.entrada).name, modelo=args.modelo, muestras=args.muestras, prompt=args.prompt,
+        duplicados=args.duplicados
+    )
+    _avisar_duplicados(entrega, trabajo.get("duplicados", []))
+    return trabajo["log_file"]
+
+
+def comando_evaluate(args: argparse.Namespace) -> int:
+    """Valida el lote completo, lo evalúa con un pool de workers y reporta el resultado."""
+    if args.logs:
+        storage.configurar_logs(args.logs)
+
+    filas = leer_filas(Path(args.entrada))
+    entregas: List[Entrega] = []
+    invalidas = 0
+    for numero, fila in enumerate(filas, 1):
+        try:
+            entregas.append(preparar_entrega(fila, numero))
+        except ValueError as e:
+            invalidas += 1
+            print(f"Fila {numero} inválida: {e}", file=sys.stderr)
+    print(f"{len(filas)} filas leídas: {len(entregas)} para evaluar, {invalidas} inválidas")
+    if not entregas:
+        return 1
+
+    if args.servicio:
+        evaluar, extra = evaluar_en_servicio, ClienteServicio(args.servicio, timeout=args.timeout)
+    else:
+        evaluar, extra = evaluar_y_guardar, presupuestos_logs()
+    progreso = Progreso(len(entregas))
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futuros = {pool.submit(evaluar, e, args, extra): e for e in entregas}
+        for futuro in as_completed(futuros):
+            entrega = futuros[futuro]
+            etiqueta = f"fila {entrega.fila} ({entrega.equipo.candidato}, {entrega.ronda})"
+            try:
+                futuro.result()
+                progreso.registrar(True, etiqueta)
+            except (requests.exceptions.RequestException, ValueError, ColaLlena) as e:
+                progreso.registrar(False, f"{etiqueta}: {e}")
+            except Exception as e:
+                # Un error inesperado (p. ej. OSError al guardar) no corta el resto del lote
+                progreso.registrar(False, f"{etiqueta}: {type(e).__name__}: {e}")
+
+    segundos = time.perf_counter() - progreso.inicio
+    print(
+        f"Listo en {_duracion(segundos)}: {progreso.ok} evaluadas, {progreso.fallidas} fallidas, "
+        f"{invalidas} inválidas ({progreso.ok / segundos * 60 if segundos else 0:.1f} eval/min). "
+        f"Logs en {args.servicio or storage.LOGS_DIR}"
+    )
+    reporte_endpoints(args.url)
+    return 0 if progreso.fallidas == 0 and invalidas == 0 else 1
+
+
+# ============================================================================
+# REPLAY Y COMPARACIÓN DE MODELOS
+# ============================================================================
+
+def _leer_checkpoint(ruta: Path) -> Dict[Tuple[str, str], dict]:
+    """Último resultado guardado por (clave del prompt, modelo)."""
+    resultados: Dict[Tuple[str, str], dict] = {}
+    if not ruta.exists():
+        return resultados
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                resultado = json.loads(linea)
+            except json.JSONDecodeError:
+                # Línea cortada si la corrida anterior se interrumpió a mitad de escritura
+                continue
+            resultados[(resultado["clave"], resultado["modelo"])] = resultado
+    return resultados
+
+
+def repetir_prompt(registro: dict, modelo: str, args: argparse.Namespace) -> dict:
+    """Corre un prompt de los logs con otro modelo; los errores quedan en el resultado."""
+    opciones = None
+    if registro.get("num_predict"):
+        medida = medir_prompt(registro["prompt_completo"], {}, registro["num_predict"], calibracion(modelo))
+        opciones = {"num_predict": registro["num_predict"], "num_ctx": medida.num_ctx}
+    resultado = {"clave": registro["clave"], "modelo": modelo}
+    try:
+        r = evaluar_prompt(args.url, modelo, registro["prompt_completo"], opciones=opciones, timeout=args.timeout)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        resultado["error"] = str(e)
+        return resultado
+    resultado.update({
+        "total_final": r.evaluacion.total_final,
+        "scores": r.evaluacion.to_dict()["scores"],
+        "segundos": round(r.segundos, 3),
+        "eval_count": r.eval_count,
+        "reparaciones": len(r.reparaciones),
+    })
+    return resultado
+
+
+def _p95(valores: List[float]) -> float:
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(0.95 * len(ordenados)) - 1)]
+
+
+def _fila_reporte(nombre: str, corridas: List[dict], errores: int, originales: Dict[str, int]) -> str:
+    """Una línea de la tabla comparativa (corridas con segundos, eval_count y total_final)."""
+    if not corridas:
+        return f"{nombre:<28} {0:>4} {errores:>4}"
+    segundos = [c["segundos"] for c in corridas]
+    tokens_por_seg = sum(c["eval_count"] for c in corridas) / max(sum(segundos), 1e-9)
+    diferencias = [abs(c["total_final"] - originales[c["clave"]]) for c in corridas if c["clave"] in originales]
+    return (
+        f"{nombre:<28} {len(corridas):>4} {errores:>4} {statistics.median(segundos):>7.2f} {_p95(segundos):>7.2f} "
+        f"{tokens_por_seg:>7.1f} {statistics.mean(c['total_final'] for c in corridas):>8.2f} "
+        f"{statistics.mean(diferencias) if diferencias else 0:>8.2f}"
+    )
+
+
+def reporte_replay(prompts: List[dict], resultados: Dict[Tuple[str, str], dict], modelos: List[str], ruta_csv: Path) -> None:
+    """Imprime la tabla por modelo (incluye lo registrado en los logs) y escribe el CSV lado a lado."""
+    originales = {p["clave"]: p["evaluacion"].get("total_final", 0) for p in prompts}
+    base = [
+        {"clave": p["clave"], "total_final": originales[p["clave"]], **p["generacion"]}
+        for p in prompts if p["generacion"].get("segundos")
+    ]
+
+    print(f"\n{'modelo':<28} {'ok':>4} {'err':>4} {'s p50':>7} {'s p95':>7} {'tok/s':>7} {'total':>8} {'|Δ logs|':>8}")
+    print(_fila_reporte("(logs)", base, 0, originales))
+    for modelo in modelos:
+        propios = [resultados.get((p["clave"], modelo)) for p in prompts]
+        corridas = [r for r in propios if r and "error" not in r]
+        errores = sum(1 for r in propios if r and "error" in r)
+        print(_fila_reporte(modelo, corridas, errores, originales))
+
+    with open(ruta_csv, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(
+            ["clave", "formato", "modelo_logs", "total_logs"]
+            + [f"{columna}_{m}" for m in modelos for columna in ("total", "segundos")]
+        )
+        for p in prompts:
+            fila = [p["clave"], p["formato"] or "", p["modelo"], originales[p["clave"]]]
+            for modelo in modelos:
+                r = resultados.get((p["clave"], modelo)) or {}
+                fila += [r.get("total_final", ""), r.get("segundos", "")]
+            escritor.writerow(fila)
+    print(f"\nComparación lado a lado en {ruta_csv}")
+
+
+def comando_replay(args: argparse.Namespace) -> int:
+    """
+    Re-ejecuta los prompts de los logs con cada modelo pedido.
+
+    Cada resultado se agrega al archivo de salida apenas termina, así que
+    una corrida interrumpida retoma donde quedó (solo se repiten los que
+    fallaron). Las tareas van agrupadas por modelo para que Ollama no
+    cambie de modelo en memoria a cada llamada.
+    """
+    if args.logs:
+        storage.configurar_logs(args.logs)
+    salida = Path(args.salida) if args.salida else storage.LOGS_DIR / "replay" / "replay.jsonl"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+
+    prompts = storage.cargar_prompts()
+    if args.limite:
+        prompts = prompts[-args.limite:]
+    resultados = _leer_checkpoint(salida)
+    pendientes = [
+        (p, modelo) for modelo in args.modelos for p in prompts
+        if "error" in resultados.get((p["clave"], modelo), {"error": None})
+    ]
+    print(f"{len(prompts)} prompts × {len(args.modelos)} modelos: "
+          f"{len(prompts) * len(args.modelos) - len(pendientes)} ya hechos, {len(pendientes)} pendientes")
+
+    if pendientes:
+        progreso = Progreso(len(pendientes))
+        escritura = threading.Lock()
+        with open(salida, 'a', encoding='utf-8') as f, ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futuros = [pool.submit(repetir_prompt, p, modelo, args) for p, modelo in pendientes]
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                with escritura:
+                    f.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+                    f.flush()
+                resultados[(resultado["clave"], resultado["modelo"])] = resultado
+                detalle = f"{resultado['modelo']} {resultado['clave']}"
+                if "error" in resultado:
+                    detalle += f": {resultado['error']}"
+                progreso.registrar("error" not in resultado, detalle)
+
+    reporte_replay(prompts, resultados, args.modelos, salida.with_suffix(".csv"))
+    reporte_endpoints(args.url)
+    return 0
+
+
+# ============================================================================
+# CALIBRACIÓN DE TOKENS
+# ============================================================================
+
+def comando_calibrar(args: argparse.Namespace) -> int:
+    """Cuenta con Ollama los tokens de los prompts de los logs y guarda las mediciones (ver calibrar_tokens)."""
+    if args.logs:
+        storage.configurar_logs(args.logs)
+    try:
+        medidos, nueva = calibrar_tokens(args.url, args.modelo, args.limite, args.timeout)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    estado = "" if nueva.calibrada else f" (sin calibrar: hacen falta {MIN_OBSERVACIONES} observaciones válidas)"
+    print(
+        f"{medidos} prompts medidos, guardados en {storage.LOGS_DIR / 'calibracion_tokens.jsonl'}. "
+        f"{args.modelo}: {nueva.caracteres_por_token} caracteres/token con {nueva.observaciones} observaciones{estado}"
+    )
+    return 0
+
+
+def _positivo(valor: str) -> int:
+    numero = int(valor)
+    if numero < 1:
+        raise argparse.ArgumentTypeError(f"tiene que ser al menos 1 (vino {valor})")
+    return numero
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("evaluate", help="Evalúa un lote de entregas (JSONL o CSV)")
+    p.add_argument("entrada", help="Archivo .jsonl o .csv con una entrega por fila")
+    p.add_argument("--workers", type=_positivo, default=2, help="Evaluaciones en paralelo")
+    p.add_argument("--muestras", type=int, default=1, choices=range(1, MAX_MUESTRAS + 1), metavar="N",
+                   help=f"Muestras por entrega (1 a {MAX_MUESTRAS})")
+    p.add_argument("--url", default=URL_OLLAMA_DEFAULT, help="Endpoint de Ollama (varios separados por coma)")
+    p.add_argument("--modelo", default=MODELO_DEFAULT)
+    p.add_argument("--timeout", type=float, default=TIMEOUT_DEFAULT)
+    p.add_argument("--logs", help="Carpeta de logs (por defecto la de la app)")
+    p.add_argument("--servicio", help="URL de un servicio de evaluación (python -m app.servicio) en lugar de llamar a Ollama")
+    p.add_argument("--prompt", choices=list(VARIANTES_PROMPT), default=VARIANTE_PROMPT_DEFAULT, help="Variante del prompt")
+    p.add_argument("--duplicados", choices=["avisar", "reusar"], default="avisar",
+                   help="Entregas casi iguales a otras ya evaluadas del mismo lote: solo avisar o reusar su evaluación")
+    p.set_defaults(func=comando_evaluate)
+
+    p = sub.add_parser("replay", help="Re-ejecuta los prompts de los logs con otros modelos y los compara")
+    p.add_argument("--modelos", nargs="+", required=True, help="Modelos de Ollama a comparar")
+    p.add_argument("--workers", type=_positivo, default=2,
+                   help="Llamadas en paralelo (con más de 1 la latencia medida incluye la espera en Ollama)")
+    p.add_argument("--limite", type=int, help="Solo los N prompts más recientes")
+    p.add_argument("--salida", help="Archivo JSONL de resultados/checkpoint (por defecto logs/replay/replay.jsonl)")
+    p.add_argument("--url", default=URL_OLLAMA_DEFAULT)
+    p.add_argument("--timeout", type=float, default=TIMEOUT_DEFAULT)
+    p.add_argument("--logs", help="Carpeta de logs de donde leer los prompts")
+    p.set_defaults(func=comando_replay)
+
+    p = sub.add_parser("calibrar", help="Mide los tokens de prompts de los logs para calibrar la estimación local")
+    p.add_argument("--modelo", default=MODELO_DEFAULT)
+    p.add_argument("--limite", type=int, default=20, help="Cantidad de prompts (los más recientes)")
+    p.add_argument("--url", default=URL_OLLAMA_DEFAULT)
+    p.add_argument("--timeout", type=float, default=TIMEOUT_DEFAULT)
+    p.add_argument("--logs", help="Carpeta de logs de donde leer los prompts")
+    p.set_defaults(func=comando_calibrar)
+
+    args = parser.parse_args(argv)
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Cliente del servicio de evaluación (app.servicio).
+
+Con JUEGO_SERVICIO_URL definida (p. ej. http://localhost:8600), la página de
+Juego manda las entregas al servicio en lugar de llamar a Ollama desde el
+proceso de Streamlit. La CLI lo usa con `evaluate --servicio URL`.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Callable, Optional
+
+import requests
+
+from app.llm import ErrorRespuestaLLM, TIMEOUT_DEFAULT
+from app.turnos import ColaLlena
+
+
+SERVICIO_URL = os.environ.get("JUEGO_SERVICIO_URL")
+
+# Cada cuánto (segundos) se consulta el estado de un trabajo
+INTERVALO_CONSULTA = 0.5
+
+
+class ClienteServicio:
+    """Envía entregas al servicio y espera sus resultados."""
+
+    def __init__(self, base: str, timeout: float = TIMEOUT_DEFAULT):
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+        self._sesion = requests.Session()
+
+    def _json(self, respuesta: requests.Response):
+        if respuesta.status_code == 503:
+            raise ColaLlena(respuesta.json().get("error", "Servicio saturado"))
+        if respuesta.status_code == 400:
+            raise ValueError(respuesta.json().get("error", "Entrega inválida"))
+        respuesta.raise_for_status()
+        return respuesta.json()
+
+    def enviar(self, entrega: dict, **opciones) -> dict:
+        """
+        Encola una entrega (dict de Entrega.to_dict() o fila de la CLI).
+
+        `opciones` puede traer juego, modelo y muestras.
+
+        Returns:
+            Trabajo recién creado (con su "id")
+        """
+        return self._json(self._sesion.post(f"{self.base}/evaluaciones", json={**entrega, **opciones}, timeout=10))
+
+    def consultar(self, id_trabajo: str) -> dict:
+        return self._json(self._sesion.get(f"{self.base}/evaluaciones/{id_trabajo}", timeout=10))
+
+    def esperar(self, id_trabajo: str, al_esperar: Optional[Callable[[int], None]] = None) -> dict:
+        """
+        Consulta el trabajo hasta que termine.
+
+        Raises:
+            ColaLlena: El trabajo no consiguió turno
+            requests.exceptions.ConnectionError: El servicio no llegó a Ollama
+            ErrorRespuestaLLM: El LLM no devolvió una evaluación válida
+            requests.exceptions.Timeout: El trabajo no terminó dentro del timeout
+        """
+        limite = time.monotonic() + self.timeout
+        posicion_previa = None
+        while time.monotonic() < limite:
+            trabajo = self.consultar(id_trabajo)
+            if trabajo["estado"] == "lista":
+                return trabajo
+            if trabajo["estado"] == "error":
+                if trabajo["tipo_error"] == "cola":
+                    raise ColaLlena(trabajo["error"])
+                if trabajo["tipo_error"] == "conexion":
+                    raise requests.exceptions.ConnectionError(trabajo["error"])
+                raise ErrorRespuestaLLM(trabajo["error"], trabajo.get("respuesta_llm") or "")
+            if al_esperar is not None and trabajo["posicion"] and trabajo["posicion"] != posicion_previa:
+                al_esperar(trabajo["posicion"])
+                posicion_previa = trabajo["posicion"]
+            time.sleep(INTERVALO_CONSULTA)
+        raise requests.exceptions.Timeout(f"El trabajo {id_trabajo} no terminó en {self.timeout:.0f} s")
+
+    def evaluar(self, entrega: dict, al_esperar: Optional[Callable[[int], None]] = None, **opciones) -> dict:
+        """Envía la entrega y espera el resultado (trabajo con "evaluacion" y "log_file")."""
+        return self.esperar(self.enviar(entrega, **opciones)["id"], al_esperar)
+
+    def ranking(self) -> list:
+        return self._json(self._sesion.get(f"{self.base}/ranking", timeout=10))
+
+
+def obtener_cliente() -> Optional[ClienteServicio]:
+    """Cliente del servicio configurado en JUEGO_SERVICIO_URL, o None para evaluar en el proceso."""
+    return ClienteServicio(SERVICIO_URL) if SERVICIO_URL else None
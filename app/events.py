@@ -1,8 +1,13 @@
 """
 Eventos del juego
-Define los textos base para cada etapa y ronda
+Define los textos base para cada etapa y ronda, los formatos de entrega,
+las opciones del tablero de campaña y los equipos precargados
 """
 
+from typing import Dict, List
+
+from app.models import Equipo
+
 EVENTOS = {
     "R1": {
         "titulo": "Ronda 1 - Internas Partido A",
@@ -57,6 +62,123 @@ Contexto: Última oportunidad de convencer a los indecisos y movilizar a los pro
 }
 
 
+# presupuesto_tokens: num_predict por defecto del formato hasta que haya
+# suficientes evaluaciones en los logs para aprenderlo (ver llm.calcular_presupuestos)
+FORMATOS_ENTREGA = {
+    "Afiche (slogan + promesa)": {
+        "campos": {
+            "slogan": {"label": "Slogan", "max_chars": 60},
+            "propuesta": {"label": "Propuesta", "max_chars": 220}
+        },
+        "presupuesto_tokens": 650
+    },
+    "Discurso (apertura + 3 ejes + cierre)": {
+        "campos": {
+            "apertura": {"label": "Apertura", "max_chars": 220},
+            "ejes": {"label": "3 Ejes", "max_chars": 420},
+            "cierre": {"label": "Cierre", "max_chars": 180}
+        },
+        "presupuesto_tokens": 800
+    },
+    "Crisis (qué decís + qué hacés)": {
+        "campos": {
+            "declaracion": {"label": "Qué decís", "max_chars": 220},
+            "accion": {"label": "Qué hacés", "max_chars": 220}
+        },
+        "presupuesto_tokens": 700
+    },
+    "Ataque/Defensa (1 línea)": {
+        "campos": {
+            "linea": {"label": "Línea", "max_chars": 180}
+        },
+        "presupuesto_tokens": 600
+    }
+}
+
+
+# Opciones del tablero de campaña (las mismas en la interfaz y en la CLI)
+OPCIONES_TABLERO = {
+    "segmento": ["Jóvenes urbanos", "Clase media metropolitana", "Interior / rural", "Trabajadores formales", "Indecisos moderados"],
+    "tono": ["Positivo (propuesta)", "Contraste (comparación)", "Duro (mano firme)", "Empático (cercanía)"],
+    "canal": ["Acto partidario", "Redes sociales", "Radio", "Puerta a puerta", "TV"],
+    "alianza_interna": ["Históricos", "Nuevas generaciones", "Unidad (mix)", "Neutral (evita interna)"],
+}
+
+SITUACION_INTERNA_DEFAULT = "Tensiones entre corrientes históricas y nuevas generaciones."
+
+# Incorporar en el futuro la posibilidad de que sean generado por los jugadores los perfiles
+
+EQUIPOS_INICIALES = [
+    Equipo(
+        nombre="Equipo 1",
+        partido="Partido Progresista",
+        candidato="Ana Martínez",
+        perfil="Ex intendente, 15 años en política, perfil moderado"
+    ),
+    Equipo(
+        nombre="Equipo 2",
+        partido="Partido Progresista",
+        candidato="Carlos Ramírez",
+        perfil="Diputado joven, perfil más radical, redes sociales fuertes"
+    ),
+    Equipo(
+        nombre="Equipo 3",
+        partido="Partido Conservador",
+        candidato="María Fernández",
+        perfil="Senadora experimentada, perfil conservador, base rural"
+    ),
+    Equipo(
+        nombre="Equipo 4",
+        partido="Partido Conservador",
+        candidato="Juan López",
+        perfil="Empresario, primera vez en política, perfil técnico"
+    )
+]
+
+
+def formato_sugerido(tipo_entrega: str) -> str:
+    """Formato de entrega que corresponde al tipo de entrega del evento."""
+    tipo_lower = tipo_entrega.lower()
+    if "discurso" in tipo_lower:
+        return "Discurso (apertura + 3 ejes + cierre)"
+    if "afiche" in tipo_lower:
+        return "Afiche (slogan + promesa)"
+    if "crisis" in tipo_lower:
+        return "Crisis (qué decís + qué hacés)"
+    return "Ataque/Defensa (1 línea)"
+
+
+def armar_entrega(formato: str, campos: Dict[str, str]) -> str:
+    """Texto de la entrega ("Label: texto" por campo completo, separados por línea en blanco)."""
+    partes_entrega = []
+    for campo_key, texto in campos.items():
+        if texto.strip():
+            label = FORMATOS_ENTREGA[formato]["campos"][campo_key]["label"]
+            partes_entrega.append(f"{label}: {texto.strip()}")
+    return "\n\n".join(partes_entrega)
+
+
+def validar_entrega(formato: str, campos: Dict[str, str]) -> List[str]:
+    """
+    Valida los campos de una entrega contra el formato.
+    
+    Returns:
+        Lista de errores (vacía si la entrega es válida)
+    """
+    errores = []
+    
+    if not armar_entrega(formato, campos).strip():
+        errores.append("Por favor, completa al menos un campo de la entrega.")
+    
+    for campo_key, texto in campos.items():
+        max_chars = FORMATOS_ENTREGA[formato]["campos"][campo_key]["max_chars"]
+        if len(texto) > max_chars:
+            label = FORMATOS_ENTREGA[formato]["campos"][campo_key]["label"]
+            errores.append(f"El campo '{label}' excede el límite de {max_chars} caracteres ({len(texto)} caracteres).")
+    
+    return errores
+
+
 def obtener_evento(ronda: str) -> dict:
     """
     Obtener información del evento para una ronda.
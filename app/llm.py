@@ -0,0 +1,463 @@
+"""
+Cliente del LLM Game Master (Ollama).
+Centraliza la llamada HTTP a Ollama y el parseo de la respuesta a Evaluacion.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+from app.metricas import ERRORES_LLM, ETAPA_SEGUNDOS, FALLOS_PARSEO, REPARACIONES
+from app.models import Evaluacion, agregar_evaluaciones
+from app.prompts import ExtractorJSON, construir_prompt_reparacion, extraer_json_de_respuesta
+from app.router import obtener_router
+
+
+MODELO_DEFAULT = "qwen2.5:3b-instruct"
+URL_OLLAMA_DEFAULT = "http://localhost:11434/api/generate"
+
+OPCIONES_DEFAULT = {
+    "temperature": 0.5,
+    "num_predict": 1000,
+}
+
+TIMEOUT_DEFAULT = 300
+
+# Mantiene el modelo cargado en memoria entre llamadas consecutivas
+KEEP_ALIVE_DEFAULT = "10m"
+
+MAX_MUESTRAS = 5
+
+# Presupuesto de tokens de salida por formato (num_predict)
+NUM_PREDICT_MAX = OPCIONES_DEFAULT["num_predict"]
+PRESUPUESTO_MIN = 300
+MARGEN_PRESUPUESTO = 1.25
+MIN_OBSERVACIONES = 5
+
+# La reparación solo reescribe el JSON: sin creatividad y con presupuesto corto
+OPCIONES_REPARACION = {
+    "temperature": 0.0,
+    "num_predict": 600,
+}
+
+class ErrorRespuestaLLM(ValueError):
+    """Respuesta del LLM que no se pudo convertir en Evaluacion."""
+
+    def __init__(self, mensaje: str, respuesta_llm: str = "", costos: Optional[dict] = None):
+        super().__init__(mensaje)
+        self.respuesta_llm = respuesta_llm
+        # Tokens y tiempo gastados en el intento fallido (para el log)
+        self.costos = costos or {}
+
+
+# Sesión HTTP compartida: reutiliza conexiones hacia el mismo Ollama
+_sesion = requests.Session()
+
+
+def _tipo_error(e: requests.exceptions.RequestException) -> str:
+    if isinstance(e, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(e, requests.exceptions.HTTPError):
+        return "http"
+    if isinstance(e, requests.exceptions.ConnectionError):
+        return "conexion"
+    return "otro"
+
+
+def llamar_ollama(
+    url: str,
+    modelo: str,
+    prompt: str,
+    opciones: Optional[dict] = None,
+    timeout: float = TIMEOUT_DEFAULT,
+) -> dict:
+    """
+    Envía un prompt a Ollama (sin streaming) y devuelve el JSON de respuesta.
+
+    Args:
+        url: Endpoint /api/generate de Ollama (o varios separados por coma, ver router.py)
+        modelo: Nombre del modelo
+        prompt: Prompt completo (sistema + usuario)
+        opciones: Opciones de generación (se combinan con OPCIONES_DEFAULT)
+        timeout: Timeout de la llamada en segundos
+
+    Returns:
+        Diccionario devuelto por Ollama ('response', 'eval_count', ...)
+    """
+    router = obtener_router(url)
+    if router is not None:
+        return router.ejecutar(modelo, lambda endpoint: llamar_ollama(endpoint, modelo, prompt, opciones, timeout))
+    payload = {
+        "model": modelo,
+        "prompt": prompt,
+        "stream": False,
+        "keep_alive": KEEP_ALIVE_DEFAULT,
+        "options": {**OPCIONES_DEFAULT, **(opciones or {})},
+    }
+    try:
+        response = _sesion.post(url, json=payload, timeout=timeout)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        ERRORES_LLM.inc(tipo=_tipo_error(e))
+        raise
+    return response.json()
+
+
+def _percentil(valores: List[int], p: float) -> int:
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def calcular_presupuestos(observados: Dict[str, List[int]], por_defecto: Dict[str, int]) -> Dict[str, dict]:
+    """
+    Calcula num_predict por formato de entrega a partir de los eval_count
+    observados en los logs: p95 * MARGEN_PRESUPUESTO, acotado entre
+    PRESUPUESTO_MIN y NUM_PREDICT_MAX. Con pocas observaciones usa el
+    presupuesto por defecto del formato.
+
+    Returns:
+        {formato: {"num_predict", "fuente", "n", "p50", "p95", "max"}}
+    """
+    presupuestos = {}
+    for formato, defecto in por_defecto.items():
+        obs = observados.get(formato, [])
+        info = {"n": len(obs), "p50": None, "p95": None, "max": None}
+        if obs:
+            info.update(p50=_percentil(obs, 50), p95=_percentil(obs, 95), max=max(obs))
+        if len(obs) >= MIN_OBSERVACIONES:
+            num_predict = math.ceil(info["p95"] * MARGEN_PRESUPUESTO)
+            info["fuente"] = "aprendido"
+        else:
+            num_predict = defecto
+            info["fuente"] = "por defecto"
+        info["num_predict"] = max(PRESUPUESTO_MIN, min(NUM_PREDICT_MAX, num_predict))
+        presupuestos[formato] = info
+    return presupuestos
+
+
+def generar_hasta_json(
+    url: str,
+    modelo: str,
+    prompt: str,
+    opciones: Optional[dict] = None,
+    timeout: float = TIMEOUT_DEFAULT,
+) -> dict:
+    """
+    Genera en modo streaming y corta apenas se completa el primer objeto JSON.
+
+    Al cerrar la conexión Ollama cancela la generación, así que los tokens
+    que el modelo escribiría después del JSON no se llegan a generar.
+    Además se pide format="json": la gramática de Ollama termina la salida
+    en la llave de cierre (una secuencia de stop no sirve para esto porque
+    Ollama la recorta de la salida y el objeto quedaría sin cerrar).
+
+    Returns:
+        Diccionario estilo Ollama: 'response' (texto recibido), 'eval_count'
+        (tokens generados; si se cortó, los fragmentos recibidos),
+        'corte_temprano' (True si se cerró la conexión antes de 'done') y
+        'truncada' (True si se agotó num_predict: el JSON pudo quedar cortado)
+    """
+    router = obtener_router(url)
+    if router is not None:
+        return router.ejecutar(modelo, lambda endpoint: generar_hasta_json(endpoint, modelo, prompt, opciones, timeout))
+    payload = {
+        "model": modelo,
+        "prompt": prompt,
+        "stream": True,
+        "format": "json",
+        "keep_alive": KEEP_ALIVE_DEFAULT,
+        "options": {**OPCIONES_DEFAULT, **(opciones or {})},
+    }
+    extractor = ExtractorJSON()
+    final: dict = {}
+    fragmentos = 0
+
+    try:
+        with _sesion.post(url, json=payload, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for linea in response.iter_lines():
+                if not linea:
+                    continue
+                chunk = json.loads(linea)
+                if "error" in chunk:
+                    ERRORES_LLM.inc(tipo="ollama")
+                    raise ErrorRespuestaLLM(f"Ollama: {chunk['error']}", extractor.texto)
+                fragmentos += 1
+                if chunk.get("done"):
+                    extractor.alimentar(chunk.get("response", ""))
+                    final = chunk
+                    break
+                if extractor.alimentar(chunk.get("response", "")):
+                    break
+    except requests.exceptions.RequestException as e:
+        ERRORES_LLM.inc(tipo=_tipo_error(e))
+        raise
+
+    resultado = dict(final)
+    resultado["response"] = extractor.texto
+    resultado["corte_temprano"] = not final.get("done", False)
+    resultado.setdefault("eval_count", fragmentos)
+    num_predict = payload["options"].get("num_predict") or 0
+    resultado["truncada"] = final.get("done_reason") == "length" or 0 < num_predict <= resultado["eval_count"]
+    return resultado
+
+
+@dataclass
+class ResultadoEvaluacion:
+    """Resultado de una evaluación de una sola muestra."""
+    evaluacion: Evaluacion
+    respuesta_llm: str
+    reparaciones: List[str] = field(default_factory=list)
+    eval_count: int = 0
+    prompt_eval_count: int = 0
+    segundos: float = 0.0
+    # Costo de la llamada de reparación, si la hubo
+    reparacion: Optional[dict] = None
+    # La generación original agotó num_predict
+    truncada: bool = False
+
+    @property
+    def tokens_respuesta(self) -> int:
+        """Tokens de la generación original, sin los de la reparación."""
+        if self.reparacion:
+            return self.reparacion["reintento_completo"]["tokens_generados"]
+        return self.eval_count
+
+    def resumen(self) -> dict:
+        """Metadatos serializables para el log."""
+        resumen = {
+            "reparaciones": self.reparaciones,
+            "eval_count": self.eval_count,
+            "prompt_eval_count": self.prompt_eval_count,
+            "segundos": round(self.segundos, 3),
+        }
+        if self.reparacion:
+            resumen["reparacion"] = self.reparacion
+        if self.truncada:
+            resumen["truncada"] = True
+        return resumen
+
+
+def _parsear_respuesta(respuesta_llm: str) -> tuple[Evaluacion, List[str]]:
+    etapa = "extraccion"
+    try:
+        with ETAPA_SEGUNDOS.medir(etapa=etapa):
+            json_str = extraer_json_de_respuesta(respuesta_llm)
+        etapa = "normalizacion"
+        with ETAPA_SEGUNDOS.medir(etapa=etapa):
+            return Evaluacion.from_json_reparado(json_str)
+    except ValueError as e:
+        FALLOS_PARSEO.inc(etapa=etapa)
+        raise ErrorRespuestaLLM(str(e), respuesta_llm) from e
+
+
+def _costo(generado: dict, segundos: float) -> dict:
+    return {
+        "tokens_prompt": generado.get("prompt_eval_count", 0),
+        "tokens_generados": generado.get("eval_count", 0),
+        "segundos": round(segundos, 3),
+        "truncada": generado.get("truncada", False),
+    }
+
+
+def reparar_respuesta(
+    url: str,
+    modelo: str,
+    respuesta_rota: str,
+    error: str,
+    timeout: float = TIMEOUT_DEFAULT,
+    num_ctx: Optional[int] = None,
+) -> tuple[Evaluacion, List[str], str, dict]:
+    """
+    Pide al modelo que corrija su salida JSON, enviando solo la salida rota
+    y un recordatorio compacto del esquema (sin el prompt completo).
+
+    `num_ctx` conviene que sea el de la llamada original: con otro valor
+    Ollama recarga el modelo para una llamada que alcanza con mucho menos.
+
+    Returns:
+        Tupla (evaluacion, reparaciones, respuesta_reparada, costo)
+
+    Raises:
+        ErrorRespuestaLLM: Si la salida corregida tampoco se puede leer
+    """
+    inicio = time.perf_counter()
+    with ETAPA_SEGUNDOS.medir(etapa="reparacion"):
+        opciones = {**OPCIONES_REPARACION, "num_ctx": num_ctx} if num_ctx else OPCIONES_REPARACION
+        generado = generar_hasta_json(
+            url, modelo, construir_prompt_reparacion(respuesta_rota, error), opciones, timeout
+        )
+    costo = _costo(generado, time.perf_counter() - inicio)
+    respuesta = generado.get("response", "")
+    try:
+        evaluacion, reparaciones = _parsear_respuesta(respuesta)
+    except ErrorRespuestaLLM as e:
+        e.costos = costo
+        raise
+    return evaluacion, reparaciones, respuesta, costo
+
+
+def evaluar_prompt(
+    url: str,
+    modelo: str,
+    prompt: str,
+    opciones: Optional[dict] = None,
+    timeout: float = TIMEOUT_DEFAULT,
+    reparar: bool = True,
+) -> ResultadoEvaluacion:
+    """
+    Ejecuta una evaluación de una sola muestra.
+
+    Si la respuesta no se puede parsear y `reparar` es True, hace como
+    máximo una llamada corta de reparación en lugar de fallar el turno.
+
+    Returns:
+        ResultadoEvaluacion con la evaluación, la respuesta cruda, las
+        reparaciones aplicadas al normalizar y el conteo de tokens
+
+    Raises:
+        requests.exceptions.RequestException: Error de conexión con Ollama
+        ErrorRespuestaLLM: Respuesta vacía o JSON inválido (con costos del intento)
+    """
+    inicio = time.perf_counter()
+    with ETAPA_SEGUNDOS.medir(etapa="modelo"):
+        generado = generar_hasta_json(url, modelo, prompt, opciones, timeout)
+    segundos = time.perf_counter() - inicio
+    respuesta_llm = generado.get("response", "")
+    if not respuesta_llm:
+        raise ErrorRespuestaLLM("El LLM no devolvió respuesta.", costos={"original": _costo(generado, segundos)})
+
+    try:
+        evaluacion, reparaciones = _parsear_respuesta(respuesta_llm)
+    except ErrorRespuestaLLM as e:
+        costos = {"original": _costo(generado, segundos)}
+        if not reparar:
+            e.costos = costos
+            raise
+        try:
+            evaluacion, reparaciones, respuesta_reparada, costo = reparar_respuesta(
+                url, modelo, respuesta_llm, str(e), timeout, (opciones or {}).get("num_ctx")
+            )
+        except ErrorRespuestaLLM as e_rep:
+            REPARACIONES.inc(resultado="fallo")
+            costos["reparacion"] = e_rep.costos
+            raise ErrorRespuestaLLM(f"{e} (la reparación también falló: {e_rep})", respuesta_llm, costos) from e_rep
+        REPARACIONES.inc(resultado="ok")
+        reparacion = {
+            **costo,
+            "error_original": str(e),
+            "respuesta_original": respuesta_llm,
+            # Un reintento completo repetiría la llamada original entera
+            "reintento_completo": costos["original"],
+            "segundos_ahorrados_vs_reintento": round(segundos - costo["segundos"], 3),
+        }
+        return ResultadoEvaluacion(
+            evaluacion=evaluacion,
+            respuesta_llm=respuesta_reparada,
+            reparaciones=reparaciones,
+            eval_count=generado.get("eval_count", 0) + costo["tokens_generados"],
+            prompt_eval_count=generado.get("prompt_eval_count", 0) + costo["tokens_prompt"],
+            segundos=time.perf_counter() - inicio,
+            reparacion=reparacion,
+            truncada=generado.get("truncada", False),
+        )
+
+    return ResultadoEvaluacion(
+        evaluacion=evaluacion,
+        respuesta_llm=respuesta_llm,
+        reparaciones=reparaciones,
+        eval_count=generado.get("eval_count", 0),
+        prompt_eval_count=generado.get("prompt_eval_count", 0),
+        segundos=segundos,
+        truncada=generado.get("truncada", False),
+    )
+
+
+@dataclass
+class ResultadoMultimuestra:
+    """Resultado agregado de N muestras del mismo prompt."""
+    evaluacion: Evaluacion
+    muestras: List[ResultadoEvaluacion]
+    dispersion: Dict[str, Dict[str, float]]
+    muestras_fallidas: int
+    segundos: float
+    errores: List[str] = field(default_factory=list)
+    # Costo de la generación original de las muestras que no se pudieron leer
+    costos_fallidas: List[dict] = field(default_factory=list)
+
+    @property
+    def respuestas(self) -> List[str]:
+        return [m.respuesta_llm for m in self.muestras]
+
+    def resumen(self) -> dict:
+        """Metadatos serializables para el log."""
+        return {
+            "n": len(self.muestras) + self.muestras_fallidas,
+            "validas": len(self.muestras),
+            "fallidas": self.muestras_fallidas,
+            "segundos": round(self.segundos, 3),
+            "dispersion": self.dispersion,
+            "reparaciones": [len(m.reparaciones) for m in self.muestras],
+            # Tokens de la generación original de cada muestra (también las
+            # reparadas y las fallidas: las que se cortaron son las que más pesan
+            # al aprender num_predict) y cuáles agotaron el presupuesto
+            "eval_counts": [m.tokens_respuesta for m in self.muestras] + [c["tokens_generados"] for c in self.costos_fallidas],
+            "truncadas": [m.truncada for m in self.muestras] + [c.get("truncada", False) for c in self.costos_fallidas],
+        }
+
+
+def evaluar_multimuestra(
+    url: str,
+    modelo: str,
+    prompt: str,
+    n: int = 3,
+    opciones: Optional[dict] = None,
+    timeout: float = TIMEOUT_DEFAULT,
+) -> ResultadoMultimuestra:
+    """
+    Lanza N muestras concurrentes del mismo prompt contra el mismo modelo
+    y las agrega (mediana por dimensión, mayoría en escándalo e impacto).
+
+    Las muestras que fallan (conexión o JSON) se descartan; si fallan todas
+    se relanza el último error.
+    """
+    n = max(1, min(int(n), MAX_MUESTRAS))
+    inicio = time.perf_counter()
+
+    muestras: List[ResultadoEvaluacion] = []
+    errores: List[str] = []
+    costos_fallidas: List[dict] = []
+    ultimo_error: Optional[Exception] = None
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        futuros = [pool.submit(evaluar_prompt, url, modelo, prompt, opciones, timeout) for _ in range(n)]
+        for futuro in futuros:
+            try:
+                muestras.append(futuro.result())
+            except (requests.exceptions.RequestException, ValueError) as e:
+                ultimo_error = e
+                errores.append(str(e))
+                if isinstance(e, ErrorRespuestaLLM) and "original" in e.costos:
+                    costos_fallidas.append(e.costos["original"])
+
+    if not muestras:
+        raise ultimo_error  # type: ignore[misc]
+
+    agregada, dispersion = agregar_evaluaciones([m.evaluacion for m in muestras])
+    return ResultadoMultimuestra(
+        evaluacion=agregada,
+        muestras=muestras,
+        dispersion=dispersion,
+        muestras_fallidas=len(errores),
+        segundos=time.perf_counter() - inicio,
+        errores=errores,
+        costos_fallidas=costos_fallidas,
+    )
+
@@ -0,0 +1,250 @@
+"""
+Métricas operativas en formato de texto de Prometheus.
+
+Registro en memoria del proceso (sin dependencias): contadores e
+histogramas con etiquetas, más colectores que se leen al exponer (caché de
+render, cola de turnos). La app de Streamlit las sirve en
+http://127.0.0.1:9464/metrics (JUEGO_METRICAS_PUERTO; 0 lo desactiva) y el
+servicio de evaluación en su ruta /metrics.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+PUERTO_DEFAULT = 9464
+
+# Límites (segundos) de los histogramas de latencia: de escrituras de ms a llamadas de minutos
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+Etiquetas = Tuple[Tuple[str, str], ...]
+
+
+def _etiquetas(valores: dict) -> Etiquetas:
+    return tuple(sorted((k, str(v)) for k, v in valores.items()))
+
+
+def _formato_etiquetas(etiquetas: Etiquetas, extra: Optional[Tuple[str, str]] = None) -> str:
+    pares = list(etiquetas) + ([extra] if extra else [])
+    if not pares:
+        return ""
+    escapado = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pares)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pares, escapado)) + "}"
+
+
+def _numero(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class Contador:
+    """Valor que solo sube, por combinación de etiquetas."""
+
+    def __init__(self, nombre: str, ayuda: str):
+        self.nombre, self.ayuda = nombre, ayuda
+        self._valores: Dict[Etiquetas, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valor: float = 1, **etiquetas) -> None:
+        clave = _etiquetas(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def exponer(self) -> List[str]:
+        with self._lock:
+            valores = sorted(self._valores.items())
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        lineas += [f"{self.nombre}{_formato_etiquetas(e)} {_numero(v)}" for e, v in valores]
+        return lineas
+
+
+class Histograma:
+    """Distribución de valores (latencias) en buckets acumulados, por etiquetas."""
+
+    def __init__(self, nombre: str, ayuda: str, buckets: Tuple[float, ...] = BUCKETS_SEGUNDOS):
+        self.nombre, self.ayuda, self.buckets = nombre, ayuda, buckets
+        # etiquetas -> [conteo por bucket (+Inf al final), suma, cantidad]
+        self._series: Dict[Etiquetas, list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **etiquetas) -> None:
+        clave = _etiquetas(etiquetas)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def totales(self, **etiquetas) -> Tuple[int, float]:
+        """Cantidad y suma observadas con esas etiquetas."""
+        with self._lock:
+            serie = self._series.get(_etiquetas(etiquetas))
+            return (serie[2], serie[1]) if serie else (0, 0.0)
+
+    @contextmanager
+    def medir(self, **etiquetas) -> Iterator[None]:
+        """Observa la duración del bloque (también si termina con una excepción)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **etiquetas)
+
+    def exponer(self) -> List[str]:
+        with self._lock:
+            series = sorted((e, [list(s[0]), s[1], s[2]]) for e, s in self._series.items())
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for etiquetas, (conteos, suma, cantidad) in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else _numero(limite)
+                lineas.append(f"{self.nombre}_bucket{_formato_etiquetas(etiquetas, ('le', le))} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_formato_etiquetas(etiquetas)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_formato_etiquetas(etiquetas)} {cantidad}")
+        return lineas
+
+
+# Un colector devuelve, al exponer, [(nombre, tipo, ayuda, [(etiquetas, valor), ...]), ...]
+Colector = Callable[[], List[Tuple[str, str, str, List[Tuple[dict, float]]]]]
+
+
+class Registro:
+    """Métricas del proceso y colectores que se leen al exponer."""
+
+    def __init__(self):
+        self._metricas: list = []
+        self._colectores: Dict[str, Colector] = {}
+        self._lock = threading.Lock()
+
+    def contador(self, nombre: str, ayuda: str) -> Contador:
+        metrica = Contador(nombre, ayuda)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(self, nombre: str, ayuda: str, buckets: Tuple[float, ...] = BUCKETS_SEGUNDOS) -> Histograma:
+        metrica = Histograma(nombre, ayuda, buckets)
+        self._metricas.append(metrica)
+        return metrica
+
+    def colector(self, clave: str, funcion: Colector) -> None:
+        """Registra (o reemplaza, si la clave ya existe) un colector."""
+        with self._lock:
+            self._colectores[clave] = funcion
+
+    def exponer(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus."""
+        lineas: List[str] = []
+        for metrica in self._metricas:
+            lineas += metrica.exponer()
+        with self._lock:
+            colectores = list(self._colectores.values())
+        por_nombre: Dict[str, list] = {}
+        for colector in colectores:
+            try:
+                for nombre, tipo, ayuda, muestras in colector():
+                    por_nombre.setdefault(nombre, [tipo, ayuda, []])[2].extend(muestras)
+            except Exception as e:
+                print(f"Error en colector de métricas: {e}")
+        for nombre, (tipo, ayuda, muestras) in por_nombre.items():
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+            lineas += [f"{nombre}{_formato_etiquetas(_etiquetas(e))} {_numero(v)}" for e, v in muestras]
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRO = Registro()
+
+ETAPA_SEGUNDOS = REGISTRO.histograma(
+    "juego_etapa_segundos",
+    "Duración de cada etapa de una evaluación (prompt, modelo, extraccion, normalizacion, almacenamiento)"
+)
+ESCRITURA_SEGUNDOS = REGISTRO.histograma(
+    "juego_escritura_segundos",
+    "Latencia de escritura en los logs, incluida la espera del lock (archivo: session, fallos)"
+)
+ESPERA_ESCRITURA = REGISTRO.histograma(
+    "juego_escritura_espera_segundos",
+    "Espera del lock de escritura de logs (contención entre sesiones y workers)"
+)
+EVALUACIONES = REGISTRO.contador("juego_evaluaciones_total", "Evaluaciones terminadas por resultado")
+ERRORES_LLM = REGISTRO.contador("juego_llm_errores_total", "Llamadas a Ollama fallidas por tipo")
+FALLOS_PARSEO = REGISTRO.contador("juego_parseo_fallos_total", "Respuestas del LLM que no se pudieron leer como Evaluacion")
+REPARACIONES = REGISTRO.contador("juego_reparaciones_total", "Llamadas de reparación de JSON por resultado")
+DUPLICADOS = REGISTRO.contador("juego_duplicados_total", "Entregas casi idénticas a una anterior del juego (detectada, reusada)")
+
+
+def registrar_caches(nombre: str, caches: Dict[str, Callable]) -> None:
+    """
+    Expone aciertos y fallos de cachés con `cache_info()` (hits/misses).
+
+    Args:
+        nombre: Clave del colector (reemplaza a uno anterior con la misma)
+        caches: {etiqueta: función cacheada}
+    """
+    def colector():
+        aciertos, fallos = [], []
+        for cache, funcion in caches.items():
+            info = funcion.cache_info()
+            aciertos.append(({"cache": cache}, info.hits))
+            fallos.append(({"cache": cache}, info.misses))
+        return [
+            ("juego_cache_aciertos_total", "counter", "Aciertos de caché por caché", aciertos),
+            ("juego_cache_fallos_total", "counter", "Fallos de caché por caché", fallos),
+        ]
+    REGISTRO.colector(nombre, colector)
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    def log_message(self, formato: str, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        cuerpo = REGISTRO.exponer().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+_servidor: Optional[ThreadingHTTPServer] = None
+_servidor_lock = threading.Lock()
+
+
+def iniciar_servidor(puerto: Optional[int] = None, host: str = "127.0.0.1") -> Optional[int]:
+    """
+    Sirve /metrics en un hilo aparte (una sola vez por proceso).
+
+    El puerto sale de JUEGO_METRICAS_PUERTO si no se pasa; 0 lo desactiva.
+    Si el puerto está ocupado se avisa y la app sigue sin métricas.
+
+    Returns:
+        Puerto en el que quedó escuchando, o None
+    """
+    global _servidor
+    if puerto is None:
+        puerto = int(os.environ.get("JUEGO_METRICAS_PUERTO", PUERTO_DEFAULT))
+    if not puerto:
+        return None
+    with _servidor_lock:
+        if _servidor is None:
+            try:
+                _servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+            except OSError as e:
+                print(f"No se pudo abrir el puerto de métricas {puerto}: {e}")
+                return None
+            _servidor.daemon_threads = True
+            threading.Thread(target=_servidor.serve_forever, name="metricas", daemon=True).start()
+        return _servidor.server_address[1]
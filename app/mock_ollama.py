@@ -0,0 +1,210 @@
+"""
+Servidor que imita a Ollama para pruebas de carga sin GPU.
+
+Uso:
+    python -m app.mock_ollama --puerto 11500 --demora 0.5 --por-token 0.002
+
+Responde /api/generate (con y sin streaming) con una evaluación válida para
+el candidato, la etapa y la ronda que vienen en el prompt, y /api/tags y
+/api/ps con el modelo pedido, así el router lo ve sano. Los puntajes son
+aleatorios (fijos por prompt si el pedido trae `seed`) y la salida se corta
+en `num_predict` fragmentos; la demora imita el tiempo de leer el prompt
+(`demora`) y de generar cada fragmento (`por_token`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+from app.llm import MODELO_DEFAULT
+
+
+# Caracteres por fragmento del stream (Ollama manda ~1 token por línea)
+CARACTERES_FRAGMENTO = 4
+
+# Identidad del equipo: las dos variantes del prompt terminan con la plantilla
+# JSON ya completada ("candidato": "...", "ronda": "...")
+_IDENTIDAD = re.compile(r'"(partido|candidato|etapa|ronda)"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+def _identidad(prompt: str) -> dict:
+    """Identidad de la última plantilla del prompt (la entrega, que va antes, no la pisa)."""
+    datos = {}
+    for clave, valor in _IDENTIDAD.findall(prompt):
+        try:
+            datos[clave] = json.loads(valor)
+        except json.JSONDecodeError:
+            datos[clave] = valor.strip('"')
+    return datos
+
+
+def evaluacion_falsa(prompt: str, azar: random.Random) -> dict:
+    """Evaluación con puntajes al azar para el equipo y la ronda del prompt."""
+    identidad = _identidad(prompt)
+    candidato = identidad.get("candidato") or "Ana Martínez"
+    scores = {
+        "claridad": azar.randint(8, 18),
+        "estrategia": azar.randint(8, 18),
+        "credibilidad": azar.randint(8, 18),
+        "emocion_identidad": azar.randint(8, 18),
+        "riesgo_backlash": azar.randint(8, 18),
+    }
+    shock = azar.randint(-3, 3)
+    return {
+        "equipo": candidato,
+        "partido": identidad.get("partido") or "Partido Progresista",
+        "candidato": candidato,
+        "etapa": identidad.get("etapa") or "Internas",
+        "ronda": identidad.get("ronda") or "R1",
+        "scores": scores,
+        "total_sin_shock": sum(scores.values()),
+        "shock_opinion_publica": shock,
+        "total_final": sum(scores.values()) + shock,
+        "escandalo": {"visible": azar.random() < 0.2, "severidad": "Media", "motivo": "Declaraciones improvisadas"},
+        "fortalezas": ["Mensaje claro", "Buen uso del canal"],
+        "debilidades": ["Propuesta poco financiada"],
+        "titular": f"{candidato} instala su propuesta",
+        "devolucion_gm": "La pieza es clara y coherente con el tablero, aunque le falta detalle sobre el financiamiento.",
+        "impacto_politico": {
+            "instalacion": azar.choice(["Sube", "Se mantiene", "Baja"]),
+            "persuasion": "Se mantiene",
+            "movilizacion": "Sube",
+            "reputacion": "Se mantiene",
+            "riesgo": "Baja",
+        },
+    }
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato: str, *args) -> None:
+        pass
+
+    def _json(self, datos: dict) -> None:
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self) -> None:
+        if self.path in ("/api/tags", "/api/ps"):
+            self._json({"models": [{"name": self.server.modelo}]})  # type: ignore[attr-defined]
+        else:
+            self.send_error(404)
+
+    def do_POST(self) -> None:
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        servidor = self.server
+        pedido = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = pedido.get("prompt", "")
+        semilla = (pedido.get("options") or {}).get("seed")
+        with servidor.lock:  # type: ignore[attr-defined]
+            # Con seed, como Ollama: el mismo prompt da siempre la misma respuesta
+            azar = random.Random(f"{semilla}:{prompt}") if semilla is not None else servidor.azar  # type: ignore[attr-defined]
+            evaluacion = evaluacion_falsa(prompt, azar)
+            servidor.atendidos += 1  # type: ignore[attr-defined]
+        texto = json.dumps(evaluacion, ensure_ascii=False)
+        fragmentos = [texto[i:i + CARACTERES_FRAGMENTO] for i in range(0, len(texto), CARACTERES_FRAGMENTO)]
+        # Como Ollama, num_predict corta la salida (y el JSON queda sin cerrar)
+        num_predict = (pedido.get("options") or {}).get("num_predict") or 0
+        truncada = 0 < num_predict < len(fragmentos)
+        if truncada:
+            fragmentos = fragmentos[:num_predict]
+            texto = "".join(fragmentos)
+        inicio = time.perf_counter()
+        time.sleep(servidor.demora * random.uniform(1 - servidor.variacion, 1 + servidor.variacion))  # type: ignore[attr-defined]
+        final = {
+            "model": pedido.get("model", servidor.modelo),  # type: ignore[attr-defined]
+            "done": True,
+            "prompt_eval_count": len(prompt) // 4,
+            "eval_count": len(fragmentos),
+            "done_reason": "length" if truncada else "stop",
+        }
+
+        if not pedido.get("stream", True):
+            time.sleep(servidor.por_token * len(fragmentos))  # type: ignore[attr-defined]
+            self._json({**final, "response": texto, "total_duration": int((time.perf_counter() - inicio) * 1e9)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for fragmento in fragmentos:
+                if servidor.por_token:  # type: ignore[attr-defined]
+                    time.sleep(servidor.por_token)  # type: ignore[attr-defined]
+                self.wfile.write((json.dumps({"response": fragmento, "done": False}, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            final["total_duration"] = int((time.perf_counter() - inicio) * 1e9)
+            self.wfile.write((json.dumps({**final, "response": ""}) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente corta apenas cierra el JSON (llm.generar_hasta_json)
+            pass
+        self.close_connection = True
+
+
+def iniciar_mock(
+    puerto: int = 0,
+    demora: float = 0.2,
+    por_token: float = 0.0,
+    variacion: float = 0.2,
+    modelo: str = MODELO_DEFAULT,
+    semilla: Optional[int] = None,
+    host: str = "127.0.0.1"
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Levanta el servidor en un hilo aparte.
+
+    Args:
+        puerto: 0 para elegir uno libre
+        demora: Segundos antes del primer fragmento (lectura del prompt)
+        por_token: Segundos por fragmento generado
+        variacion: Variación relativa al azar de la demora (0.2 = ±20 %)
+
+    Returns:
+        Tupla (servidor, url de /api/generate); cerrar con servidor.shutdown()
+    """
+    servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.demora, servidor.por_token, servidor.variacion = demora, por_token, variacion  # type: ignore[attr-defined]
+    servidor.modelo = modelo  # type: ignore[attr-defined]
+    servidor.azar = random.Random(semilla)  # type: ignore[attr-defined]
+    servidor.lock = threading.Lock()  # type: ignore[attr-defined]
+    servidor.atendidos = 0  # type: ignore[attr-defined]
+    threading.Thread(target=servidor.serve_forever, name="mock-ollama", daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}/api/generate"
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.mock_ollama", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=11500)
+    parser.add_argument("--demora", type=float, default=0.2, help="Segundos antes del primer fragmento")
+    parser.add_argument("--por-token", type=float, default=0.0, help="Segundos por fragmento generado")
+    parser.add_argument("--variacion", type=float, default=0.2, help="Variación relativa de la demora")
+    parser.add_argument("--modelo", default=MODELO_DEFAULT)
+    args = parser.parse_args(argv)
+
+    servidor, url = iniciar_mock(args.puerto, args.demora, args.por_token, args.variacion, args.modelo, host=args.host)
+    print(f"Ollama simulado en {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,24 @@ Define los esquemas de datos para equipos, evaluaciones y rankings.
 Versión robusta:
 - Normaliza claves (tildes / aliases), valores (sinónimos), tipos (str->int/bool),
   y repara estructuras comunes devueltas por LLM.
+- La normalización se compila una vez por dataclass (NormalizadorEsquema) a partir
+  de sus type hints y reporta las reparaciones aplicadas.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, List
+from array import array
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, asdict, fields
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple, get_type_hints
+import dataclasses
 import json
+import os
+import re
+import statistics
+import threading
+import unicodedata
 
 
 # -----------------------------
@@ -78,145 +89,287 @@ def _clamp_int(x: int, lo: int, hi: int) -> int:
     return max(lo, min(hi, x))
 
 
-def _norm_key(k: str) -> str:
+@lru_cache(maxsize=4096)
+def _plegar(texto: str) -> str:
     """
-    Normaliza claves (tildes y aliases frecuentes).
+    Forma canónica para comparar claves y valores:
+    casefold, sin tildes y con separadores (espacio, /, -) como "_".
     """
-    if not isinstance(k, str):
-        return k
-    kk = k.strip()
-
-    # Normalización simple de tildes en claves conocidas
-    aliases = {
-        # top-level
-        "equipo_nombre": "equipo",
-        "team": "equipo",
-        "candidate": "candidato",
-        "stage": "etapa",
-        "round": "ronda",
-        "shock": "shock_opinion_publica",
-        "total": "total_final",
-        # nested impacto_politico
-        "instalación": "instalacion",
-        "persuasión": "persuasion",
-        "movilización": "movilizacion",
-        "reputación": "reputacion",
-        # nested scores
-        "emoción_identidad": "emocion_identidad",
-        "emocion/identidad": "emocion_identidad",
-        "riesgo/backlash": "riesgo_backlash",
-        # escandalo
-        "escándalo": "escandalo",
-    }
-    return aliases.get(kk, kk)
+    t = unicodedata.normalize("NFKD", texto.strip().casefold())
+    t = "".join(ch for ch in t if not unicodedata.combining(ch))
+    return re.sub(r"[\s/\-]+", "_", t)
+
 
+# -----------------------------
+# Tablas del esquema
+# -----------------------------
 
-def _normalize_keys_deep(obj: Any) -> Any:
+DIMENSIONES_SCORES = ["claridad", "estrategia", "credibilidad", "emocion_identidad", "riesgo_backlash"]
+DIMENSIONES_IMPACTO = ["instalacion", "persuasion", "movilizacion", "reputacion", "riesgo"]
+
+# Aliases de claves top-level (las variantes de tildes/mayúsculas/separadores
+# se resuelven solas al plegar)
+ALIAS_CLAVES = {
+    "equipo_nombre": "equipo",
+    "team": "equipo",
+    "candidate": "candidato",
+    "stage": "etapa",
+    "round": "ronda",
+    "shock": "shock_opinion_publica",
+    "total": "total_final",
+    "impacto": "impacto_politico",
+}
+
+# Valores válidos finales: "Sube", "Baja", "Se mantiene".
+SINONIMOS_IMPACTO = {
+    "Sube": ["aumenta", "sube mucho", "mejora", "crece", "al alza",
+             # Confusión con severidad de escándalo (Baja/Media/Alta) y Bajo/Medio/Alto
+             "alta", "alto"],
+    "Baja": ["desciende", "cae", "empeora", "baja mucho", "a la baja", "bajo"],
+    "Se mantiene": ["mantiene", "sin cambio", "sin cambios", "igual", "estable", "neutral",
+                    "media", "medio"],
+}
+
+SINONIMOS_SEVERIDAD = {
+    "Baja": ["bajo"],
+    "Media": ["medio"],
+    "Alta": ["alto"],
+}
+
+
+class _Dominio:
     """
-    Recorre dicts/listas y normaliza claves.
+    Conjunto cerrado de valores de texto con sinónimos.
+    La tabla se compila una vez (claves plegadas) y el mapeo se memoiza.
     """
-    if isinstance(obj, dict):
-        new: Dict[str, Any] = {}
-        for k, v in obj.items():
-            nk = _norm_key(k)
-            new[nk] = _normalize_keys_deep(v)
-        return new
-    if isinstance(obj, list):
-        return [_normalize_keys_deep(i) for i in obj]
-    return obj
+
+    def __init__(self, sinonimos: Dict[str, List[str]], defecto: str):
+        self.defecto = defecto
+        self.valores = tuple(sinonimos)
+        tabla = {}
+        for canonico, variantes in sinonimos.items():
+            for v in [canonico, *variantes]:
+                tabla[_plegar(v)] = canonico
+        self._tabla = tabla
+        self.mapear = lru_cache(maxsize=256)(self._mapear)
+
+    def _mapear(self, valor: str) -> str:
+        return self._tabla.get(_plegar(valor), self.defecto)
+
+    def convertir(self, valor: Any) -> str:
+        if valor is None:
+            return self.defecto
+        return self.mapear(valor if isinstance(valor, str) else str(valor))
+
+
+DOMINIO_IMPACTO = _Dominio(SINONIMOS_IMPACTO, "Se mantiene")
+DOMINIO_SEVERIDAD = _Dominio(SINONIMOS_SEVERIDAD, "Baja")
+
+# Topes de largo del texto generado (también se piden en el prompt):
+# acotan los tokens de salida y el tamaño de cada registro
+MAX_CHARS_TITULAR = 160
+MAX_CHARS_DEVOLUCION = 900
+MAX_CHARS_MOTIVO = 200
+MAX_ITEMS_LISTA = 3
+MAX_CHARS_ITEM = 160
+
+
+def _to_str(x: Any) -> str:
+    if x is None:
+        return ""
+    return x.strip() if isinstance(x, str) else str(x).strip()
+
+
+def _recortar(t: str, max_chars: int) -> str:
+    if len(t) <= max_chars:
+        return t
+    return t[:max_chars - 1].rstrip() + "…"
 
 
 # -----------------------------
-# Normalizadores específicos
+# Normalizador compilado
 # -----------------------------
 
-def _normalizar_impacto_valor(value: Any) -> str:
+class _Campo:
+    __slots__ = ("nombre", "convertir", "defecto", "anidado")
+
+    def __init__(self, nombre: str, convertir: Any, defecto: Any, anidado: "NormalizadorEsquema | None" = None):
+        self.nombre = nombre
+        self.convertir = convertir
+        self.defecto = defecto
+        self.anidado = anidado
+
+
+class NormalizadorEsquema:
     """
-    Normaliza valores para ImpactoPolitico.
-    Valores válidos finales: "Sube", "Baja", "Se mantiene".
+    Normalizador de un dict crudo (salida del LLM) hacia los campos de una
+    dataclass, compilado una sola vez a partir de sus type hints.
+
+    - claves: lookup plegado (casefold, sin tildes) + aliases
+    - valores: conversor por tipo (int con rango, bool, lista, dominio de texto)
+    - dataclasses anidadas: se normalizan en la misma pasada
+    - cada cambio queda registrado como "reparación"
     """
-    if value is None:
-        return "Se mantiene"
-    v = _strip(value)
-    if not isinstance(v, str):
-        v = str(v)
-
-    t = v.strip()
-
-    mapping = {
-        # correctos
-        "Sube": "Sube",
-        "Baja": "Baja",
-        "Se mantiene": "Se mantiene",
-
-        # mayúsculas / variantes
-        "SE MANTIENE": "Se mantiene",
-        "Se Mantiene": "Se mantiene",
-        "Mantiene": "Se mantiene",
-        "Sin cambio": "Se mantiene",
-        "Sin cambios": "Se mantiene",
-        "Igual": "Se mantiene",
-        "Estable": "Se mantiene",
-        "Neutral": "Se mantiene",
-
-        "Aumenta": "Sube",
-        "Sube mucho": "Sube",
-        "Mejora": "Sube",
-        "Crece": "Sube",
-        "Al alza": "Sube",
-
-        "Desciende": "Baja",
-        "Cae": "Baja",
-        "Empeora": "Baja",
-        "Baja mucho": "Baja",
-        "A la baja": "Baja",
-
-        # Confusión con severidad de escándalo (Baja/Media/Alta)
-        "Alta": "Sube",
-        "Media": "Se mantiene",
-        "Baja": "Baja",
-
-        # Variantes Bajo/Medio/Alto
-        "Alto": "Sube",
-        "Medio": "Se mantiene",
-        "Bajo": "Baja",
-
-        # minúsculas comunes
-        "sube": "Sube",
-        "baja": "Baja",
-        "se mantiene": "Se mantiene",
-        "alto": "Sube",
-        "medio": "Se mantiene",
-        "bajo": "Baja",
-    }
 
-    return mapping.get(t, t)
-
-
-def _normalizar_severidad(value: Any) -> str:
-    if value is None:
-        return "Baja"
-    v = _strip(value)
-    if not isinstance(v, str):
-        v = str(v)
-    t = v.strip()
-
-    mapping = {
-        "Baja": "Baja",
-        "Media": "Media",
-        "Alta": "Alta",
-        # variantes
-        "baja": "Baja",
-        "media": "Media",
-        "alta": "Alta",
-        "Bajo": "Baja",
-        "Medio": "Media",
-        "Alto": "Alta",
-        "bajo": "Baja",
-        "medio": "Media",
-        "alto": "Alta",
-    }
-    return mapping.get(t, "Baja")
+    def __init__(self, cls: type, rangos: Dict[str, Tuple[int, int]] = None,
+                 dominios: Dict[str, _Dominio] = None, alias: Dict[str, str] = None,
+                 limites: Dict[str, Any] = None):
+        self.cls = cls
+        rangos = rangos or {}
+        dominios = dominios or {}
+        limites = limites or {}
+        self.campos: Dict[str, _Campo] = {}
+        for nombre, tipo in get_type_hints(cls).items():
+            self.campos[nombre] = self._compilar_campo(nombre, tipo, rangos, dominios, limites)
+
+        self._claves = {_plegar(n): n for n in self.campos}
+        for variante, nombre in (alias or {}).items():
+            self._claves[_plegar(variante)] = nombre
+
+    @staticmethod
+    def _compilar_campo(nombre: str, tipo: Any, rangos: dict, dominios: dict, limites: dict) -> _Campo:
+        if dataclasses.is_dataclass(tipo):
+            return _Campo(nombre, None, None, esquema(tipo))
+        if tipo is bool:
+            return _Campo(nombre, lambda v: _to_bool(v, False), False)
+        if tipo is int:
+            lo, hi = rangos.get(nombre, (None, None))
+            if lo is None:
+                return _Campo(nombre, lambda v: _to_int(v, 0), 0)
+            return _Campo(nombre, lambda v: _clamp_int(_to_int(v, 0), lo, hi), _clamp_int(0, lo, hi))
+        if nombre in dominios:
+            dominio = dominios[nombre]
+            return _Campo(nombre, dominio.convertir, dominio.defecto)
+        if tipo is str:
+            if nombre in limites:
+                max_chars = limites[nombre]
+                return _Campo(nombre, lambda v: _recortar(_to_str(v), max_chars), "")
+            return _Campo(nombre, _to_str, "")
+        # List[str]
+        if nombre in limites:
+            max_items, max_chars = limites[nombre]
+            return _Campo(nombre, lambda v: [_recortar(i, max_chars) for i in _to_list_str(v)[:max_items]], [])
+        return _Campo(nombre, _to_list_str, [])
+
+    def clave(self, k: Any) -> str | None:
+        """Nombre canónico del campo para una clave cruda (None si no existe)."""
+        if not isinstance(k, str):
+            return None
+        if k in self.campos:
+            return k
+        return self._claves.get(_plegar(k))
+
+    def defectos(self) -> dict:
+        return {
+            nombre: campo.anidado.defectos() if campo.anidado else
+            (list(campo.defecto) if isinstance(campo.defecto, list) else campo.defecto)
+            for nombre, campo in self.campos.items()
+        }
+
+    def normalizar(self, data: dict, reparaciones: List[str] | None = None, prefijo: str = "") -> dict:
+        """
+        Devuelve un dict con exactamente los campos del esquema, con tipos
+        y valores normalizados. Si se pasa `reparaciones`, agrega una línea
+        por cada clave renombrada/descartada, valor corregido o faltante.
+        """
+        salida: Dict[str, Any] = {}
+        for k, v in data.items():
+            nombre = self.clave(k)
+            if nombre is None:
+                if reparaciones is not None:
+                    reparaciones.append(f"{prefijo}{k}: clave desconocida (descartada)")
+                continue
+            if nombre in salida:
+                if reparaciones is not None:
+                    reparaciones.append(f"{prefijo}{k}: clave duplicada de '{nombre}' (descartada)")
+                continue
+            if nombre != k and reparaciones is not None:
+                reparaciones.append(f"{prefijo}{k}: clave renombrada a '{nombre}'")
+
+            campo = self.campos[nombre]
+            if campo.anidado is not None:
+                if not isinstance(v, dict):
+                    if reparaciones is not None:
+                        reparaciones.append(f"{prefijo}{nombre}: se esperaba un objeto, se recibió {v!r}")
+                    v = {}
+                salida[nombre] = campo.anidado.normalizar(v, reparaciones, f"{prefijo}{nombre}.")
+                continue
+
+            nuevo = campo.convertir(v)
+            if reparaciones is not None and (nuevo != v or type(nuevo) is not type(v)):
+                reparaciones.append(f"{prefijo}{nombre}: {v!r} → {nuevo!r}")
+            salida[nombre] = nuevo
+
+        for nombre, campo in self.campos.items():
+            if nombre not in salida:
+                if reparaciones is not None:
+                    reparaciones.append(f"{prefijo}{nombre}: faltante (valor por defecto)")
+                salida[nombre] = campo.anidado.defectos() if campo.anidado else (
+                    list(campo.defecto) if isinstance(campo.defecto, list) else campo.defecto)
+        return salida
+
+    def aplicar(self, obj: Any) -> None:
+        """Normaliza in situ los campos simples de una instancia (para __post_init__)."""
+        for nombre, campo in self.campos.items():
+            if campo.anidado is None:
+                setattr(obj, nombre, campo.convertir(getattr(obj, nombre)))
+
+    def instanciar(self, datos: dict) -> Any:
+        """Crea la dataclass (y las anidadas) desde un dict ya normalizado."""
+        valores = dict(datos)
+        for nombre, campo in self.campos.items():
+            if campo.anidado is not None:
+                valores[nombre] = campo.anidado.instanciar(datos[nombre])
+        return _instanciar_confiable(self.cls, valores)
+
+
+# Especificación por dataclass: rangos de enteros, dominios de texto y aliases
+_ESPECIFICACIONES: Dict[str, dict] = {
+    "Scores": {"rangos": {d: (0, 20) for d in DIMENSIONES_SCORES}},
+    "Escandalo": {"dominios": {"severidad": DOMINIO_SEVERIDAD}, "limites": {"motivo": MAX_CHARS_MOTIVO}},
+    "ImpactoPolitico": {"dominios": {d: DOMINIO_IMPACTO for d in DIMENSIONES_IMPACTO}},
+    "Evaluacion": {
+        "rangos": {"shock_opinion_publica": (-3, 3)},
+        "alias": ALIAS_CLAVES,
+        "limites": {
+            "titular": MAX_CHARS_TITULAR,
+            "devolucion_gm": MAX_CHARS_DEVOLUCION,
+            "fortalezas": (MAX_ITEMS_LISTA, MAX_CHARS_ITEM),
+            "debilidades": (MAX_ITEMS_LISTA, MAX_CHARS_ITEM),
+        },
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def esquema(cls: type) -> NormalizadorEsquema:
+    """Normalizador compilado (una vez por proceso) para una dataclass."""
+    return NormalizadorEsquema(cls, **_ESPECIFICACIONES.get(cls.__name__, {}))
+
+
+# -----------------------------
+# Carga confiable (sin normalizar)
+# -----------------------------
+
+# Versión del formato canónico que escribe Evaluacion.to_dict().
+# Los registros con esta versión se recargan por el camino rápido.
+ESQUEMA_VERSION = 1
+
+
+@lru_cache(maxsize=None)
+def _nombres_campos(cls: type) -> tuple:
+    return tuple(f.name for f in fields(cls))
+
+
+def _instanciar_confiable(cls: type, data: dict) -> Any:
+    """
+    Crea una instancia de dataclass sin ejecutar __init__/__post_init__.
+    Solo para datos ya canónicos (escritos por to_dict).
+    """
+    obj = object.__new__(cls)
+    for nombre in _nombres_campos(cls):
+        object.__setattr__(obj, nombre, data[nombre])
+    return obj
 
 
 # -----------------------------
@@ -225,6 +378,8 @@ def _normalizar_severidad(value: Any) -> str:
 
 @dataclass
 class Scores:
+    __slots__ = ("claridad", "estrategia", "credibilidad", "emocion_identidad", "riesgo_backlash")
+
     claridad: int
     estrategia: int
     credibilidad: int
@@ -233,11 +388,7 @@ class Scores:
 
     def __post_init__(self):
         # Tipos y clamps (tolerante)
-        self.claridad = _clamp_int(_to_int(self.claridad, 0), 0, 20)
-        self.estrategia = _clamp_int(_to_int(self.estrategia, 0), 0, 20)
-        self.credibilidad = _clamp_int(_to_int(self.credibilidad, 0), 0, 20)
-        self.emocion_identidad = _clamp_int(_to_int(self.emocion_identidad, 0), 0, 20)
-        self.riesgo_backlash = _clamp_int(_to_int(self.riesgo_backlash, 0), 0, 20)
+        esquema(Scores).aplicar(self)
 
     def total(self) -> int:
         return self.claridad + self.estrategia + self.credibilidad + self.emocion_identidad + self.riesgo_backlash
@@ -245,18 +396,20 @@ class Scores:
 
 @dataclass
 class Escandalo:
+    __slots__ = ("visible", "severidad", "motivo")
+
     visible: bool
     severidad: str
     motivo: str
 
     def __post_init__(self):
-        self.visible = _to_bool(self.visible, False)
-        self.severidad = _normalizar_severidad(self.severidad)
-        self.motivo = (self.motivo or "").strip()
+        esquema(Escandalo).aplicar(self)
 
 
 @dataclass
 class ImpactoPolitico:
+    __slots__ = ("instalacion", "persuasion", "movilizacion", "reputacion", "riesgo")
+
     instalacion: str
     persuasion: str
     movilizacion: str
@@ -264,22 +417,20 @@ class ImpactoPolitico:
     riesgo: str
 
     def __post_init__(self):
-        self.instalacion = _normalizar_impacto_valor(self.instalacion)
-        self.persuasion = _normalizar_impacto_valor(self.persuasion)
-        self.movilizacion = _normalizar_impacto_valor(self.movilizacion)
-        self.reputacion = _normalizar_impacto_valor(self.reputacion)
-        self.riesgo = _normalizar_impacto_valor(self.riesgo)
-
-        validos = {"Sube", "Baja", "Se mantiene"}
-        for field in ["instalacion", "persuasion", "movilizacion", "reputacion", "riesgo"]:
-            v = getattr(self, field)
-            if v not in validos:
-                # fallback duro: si viene cualquier otra cosa, no rompemos el juego
-                setattr(self, field, "Se mantiene")
+        # Valores fuera del dominio caen en "Se mantiene": no rompemos el juego
+        esquema(ImpactoPolitico).aplicar(self)
 
 
 @dataclass
 class Evaluacion:
+    # __slots__ explícito (compatible con Python 3.8): sin __dict__ por instancia
+    __slots__ = (
+        "equipo", "partido", "candidato", "etapa", "ronda",
+        "scores", "total_sin_shock", "shock_opinion_publica", "total_final",
+        "escandalo", "fortalezas", "debilidades", "titular", "devolucion_gm",
+        "impacto_politico",
+    )
+
     equipo: str
     partido: str
     candidato: str
@@ -297,23 +448,12 @@ class Evaluacion:
     impacto_politico: ImpactoPolitico
 
     def __post_init__(self):
-        self.equipo = (self.equipo or "").strip()
-        self.partido = (self.partido or "").strip()
-        self.candidato = (self.candidato or "").strip()
-        self.etapa = (self.etapa or "").strip()
-        self.ronda = (self.ronda or "").strip()
-
-        self.shock_opinion_publica = _clamp_int(_to_int(self.shock_opinion_publica, 0), -3, 3)
+        esquema(Evaluacion).aplicar(self)
 
         # Recalcular totales para robustez (fuente de verdad: scores + shock)
         self.total_sin_shock = self.scores.total()
         self.total_final = self.total_sin_shock + self.shock_opinion_publica
 
-        self.fortalezas = _to_list_str(self.fortalezas)
-        self.debilidades = _to_list_str(self.debilidades)
-        self.titular = (self.titular or "").strip()
-        self.devolucion_gm = (self.devolucion_gm or "").strip()
-
     def to_dict(self) -> dict:
         d = asdict(self)
         d["scores"] = asdict(self.scores)
@@ -326,85 +466,423 @@ class Evaluacion:
         """
         Crea Evaluacion desde un dict ya parseado, aplicando normalizaciones robustas.
         """
+        return cls.from_dict_reparado(data)[0]
+
+    @classmethod
+    def from_dict_reparado(cls, data: dict) -> Tuple["Evaluacion", List[str]]:
+        """
+        Igual que from_dict, pero devuelve también la lista de reparaciones
+        aplicadas (claves renombradas, valores corregidos, campos faltantes).
+        """
         if not isinstance(data, dict):
             raise ValueError("La evaluación debe ser un objeto JSON (dict).")
 
-        # Normalizar claves (incluye tildes y aliases)
-        data = _normalize_keys_deep(data)
-
-        # Normalizar estructuras esperadas
-        scores_raw = data.get("scores", {}) or {}
-        esc_raw = data.get("escandalo", {}) or {}
-        imp_raw = data.get("impacto_politico", {}) or {}
-
-        # Impacto: normalizar claves con tildes si aparecen
-        # (ya se hace en normalize_keys_deep, pero cubrimos casos residuales)
-        for old, new in {
-            "reputación": "reputacion",
-            "movilización": "movilizacion",
-            "persuasión": "persuasion",
-            "instalación": "instalacion",
-        }.items():
-            if old in imp_raw and new not in imp_raw:
-                imp_raw[new] = imp_raw.pop(old)
-
-        # Completar defaults para impacto si faltan campos
-        for k in ["instalacion", "persuasion", "movilizacion", "reputacion", "riesgo"]:
-            imp_raw.setdefault(k, "Se mantiene")
-
-        # Normalizar valores impacto
-        for k in list(imp_raw.keys()):
-            imp_raw[k] = _normalizar_impacto_valor(imp_raw[k])
-
-        # Completar defaults para scores si faltan campos
-        for k in ["claridad", "estrategia", "credibilidad", "emocion_identidad", "riesgo_backlash"]:
-            scores_raw.setdefault(k, 0)
-
-        # Escándalo defaults
-        esc_raw.setdefault("visible", False)
-        esc_raw.setdefault("severidad", "Baja")
-        esc_raw.setdefault("motivo", "")
-
-        # Listas
-        fortalezas = _to_list_str(data.get("fortalezas", []))
-        debilidades = _to_list_str(data.get("debilidades", []))
-
-        # Construcción de objetos
-        data["scores"] = Scores(**scores_raw)
-        data["escandalo"] = Escandalo(**esc_raw)
-        data["impacto_politico"] = ImpactoPolitico(**imp_raw)
-
-        # Normalizar ints (aunque luego recalculamos)
-        data["total_sin_shock"] = _to_int(data.get("total_sin_shock", data["scores"].total()), data["scores"].total())
-        data["shock_opinion_publica"] = _to_int(data.get("shock_opinion_publica", 0), 0)
-        data["total_final"] = _to_int(data.get("total_final", data["total_sin_shock"] + data["shock_opinion_publica"]),
-                                      data["total_sin_shock"] + data["shock_opinion_publica"])
-
-        data["fortalezas"] = fortalezas
-        data["debilidades"] = debilidades
-        data.setdefault("titular", "")
-        data.setdefault("devolucion_gm", "")
-
-        # Campos top-level obligatorios con fallback razonable
-        data.setdefault("equipo", data.get("candidato", ""))
-        data.setdefault("partido", "")
-        data.setdefault("candidato", "")
-        data.setdefault("etapa", "")
-        data.setdefault("ronda", "")
-
-        return cls(**data)
+        reparaciones: List[str] = []
+        datos = esquema(cls).normalizar(data, reparaciones)
+
+        # Campo top-level obligatorio con fallback razonable
+        if not datos["equipo"]:
+            datos["equipo"] = datos["candidato"]
+
+        # Recalcular totales (fuente de verdad: scores + shock)
+        total_sin_shock = sum(datos["scores"].values())
+        total_final = total_sin_shock + datos["shock_opinion_publica"]
+        for campo, esperado in (("total_sin_shock", total_sin_shock), ("total_final", total_final)):
+            if datos[campo] != esperado:
+                reparaciones.append(f"{campo}: {datos[campo]} → {esperado} (recalculado)")
+                datos[campo] = esperado
+
+        return esquema(cls).instanciar(datos), reparaciones
+
+    @classmethod
+    def from_dict_confiable(cls, data: dict) -> "Evaluacion":
+        """
+        Reconstruye una Evaluacion desde un dict canónico escrito por to_dict().
+
+        No normaliza claves ni valores ni recalcula totales: es el camino rápido
+        para recargar nuestros propios logs. Para salida del LLM usar from_dict.
+
+        Raises:
+            KeyError: Si falta algún campo del esquema canónico
+        """
+        d = dict(data)
+        d["scores"] = _instanciar_confiable(Scores, data["scores"])
+        d["escandalo"] = _instanciar_confiable(Escandalo, data["escandalo"])
+        d["impacto_politico"] = _instanciar_confiable(ImpactoPolitico, data["impacto_politico"])
+        return _instanciar_confiable(cls, d)
 
     @classmethod
     def from_json(cls, json_str: str) -> "Evaluacion":
+        return cls.from_json_reparado(json_str)[0]
+
+    @classmethod
+    def from_json_reparado(cls, json_str: str) -> Tuple["Evaluacion", List[str]]:
         try:
             data = json.loads(json_str)
-            return cls.from_dict(data)
+            return cls.from_dict_reparado(data)
         except json.JSONDecodeError as e:
             raise ValueError(f"JSON inválido: {e}")
         except Exception as e:
             raise ValueError(f"Error al parsear evaluación: {e}")
 
 
+# -----------------------------
+# Agregación de muestras
+# -----------------------------
+
+
+def _mayoria(valores: List[Any]) -> Any:
+    """
+    Voto por mayoría; ante empate gana el valor que apareció primero.
+    """
+    conteo = Counter(valores)
+    maximo = max(conteo.values())
+    for v in valores:
+        if conteo[v] == maximo:
+            return v
+
+
+def _dispersion(valores: List[int]) -> Dict[str, float]:
+    return {
+        "min": min(valores),
+        "max": max(valores),
+        "rango": max(valores) - min(valores),
+        "desvio": round(statistics.pstdev(valores), 2),
+    }
+
+
+def agregar_evaluaciones(evaluaciones: List[Evaluacion]) -> Tuple[Evaluacion, Dict[str, Dict[str, float]]]:
+    """
+    Agrega varias muestras de la misma entrega en una sola Evaluacion.
+
+    - scores y shock: mediana (median_low, siempre un valor observado)
+    - escandalo.visible / severidad e impacto_politico.*: voto por mayoría
+    - textos (titular, devolución, listas): de la muestra más cercana a la mediana
+
+    Returns:
+        Tupla (evaluacion_agregada, dispersion) donde dispersion tiene
+        min/max/rango/desvio por dimensión, shock y total_final.
+    """
+    if not evaluaciones:
+        raise ValueError("Se necesita al menos una evaluación para agregar.")
+
+    scores = Scores(**{
+        dim: statistics.median_low([getattr(e.scores, dim) for e in evaluaciones])
+        for dim in DIMENSIONES_SCORES
+    })
+    shock = statistics.median_low([e.shock_opinion_publica for e in evaluaciones])
+
+    visible = _mayoria([e.escandalo.visible for e in evaluaciones])
+    con_voto = [e for e in evaluaciones if e.escandalo.visible == visible]
+    severidad = _mayoria([e.escandalo.severidad for e in con_voto])
+    motivo = next(e.escandalo.motivo for e in con_voto if e.escandalo.severidad == severidad)
+
+    impacto = ImpactoPolitico(**{
+        dim: _mayoria([getattr(e.impacto_politico, dim) for e in evaluaciones])
+        for dim in DIMENSIONES_IMPACTO
+    })
+
+    # Muestra representativa para la parte narrativa
+    total_mediana = scores.total() + shock
+    representativa = min(evaluaciones, key=lambda e: abs(e.total_final - total_mediana))
+
+    agregada = Evaluacion(
+        equipo=representativa.equipo,
+        partido=representativa.partido,
+        candidato=representativa.candidato,
+        etapa=representativa.etapa,
+        ronda=representativa.ronda,
+        scores=scores,
+        total_sin_shock=0,
+        shock_opinion_publica=shock,
+        total_final=0,
+        escandalo=Escandalo(visible=visible, severidad=severidad, motivo=motivo),
+        fortalezas=list(representativa.fortalezas),
+        debilidades=list(representativa.debilidades),
+        titular=representativa.titular,
+        devolucion_gm=representativa.devolucion_gm,
+        impacto_politico=impacto,
+    )
+
+    dispersion = {
+        dim: _dispersion([getattr(e.scores, dim) for e in evaluaciones])
+        for dim in DIMENSIONES_SCORES
+    }
+    dispersion["shock_opinion_publica"] = _dispersion([e.shock_opinion_publica for e in evaluaciones])
+    dispersion["total_final"] = _dispersion([e.total_final for e in evaluaciones])
+
+    return agregada, dispersion
+
+
+# -----------------------------
+# Representación columnar
+# -----------------------------
+
+CAMPOS_CATEGORICOS = ("equipo", "partido", "candidato", "etapa", "ronda")
+# Registros materializados que EvaluacionBatch recuerda (mismo objeto en cada acceso)
+MAX_MATERIALIZADAS = 512
+SEVERIDADES = ("Baja", "Media", "Alta")
+VALORES_IMPACTO = ("Se mantiene", "Sube", "Baja")
+
+
+def _codigo(valores: tuple, valor: str) -> int:
+    # Código 0 (valor por defecto) si aparece algo fuera de la tabla
+    return valores.index(valor) if valor in valores else 0
+
+
+class _Catalogo:
+    """Tabla de strings <-> códigos enteros chicos."""
+
+    __slots__ = ("valores", "_codigos")
+
+    def __init__(self):
+        self.valores: List[str] = []
+        self._codigos: Dict[str, int] = {}
+
+    def buscar(self, valor: str) -> Optional[int]:
+        return self._codigos.get(valor)
+
+    def codigo(self, valor: str) -> int:
+        c = self._codigos.get(valor)
+        if c is None:
+            c = len(self.valores)
+            self.valores.append(valor)
+            self._codigos[valor] = c
+        return c
+
+
+class EvaluacionBatch:
+    """
+    Contenedor columnar (struct-of-arrays) de evaluaciones.
+
+    - scores y shock: arrays int8, una columna por dimensión
+    - equipo/partido/candidato/etapa/ronda: códigos uint16 sobre un catálogo
+    - escándalo e impacto político: códigos uint8
+    - texto narrativo (titular, devolución, listas, motivo): se lee del log
+      JSONL recién cuando se pide (offset por registro); las evaluaciones
+      agregadas en memoria guardan su texto aparte.
+
+    Las agregaciones (totales, ranking) recorren arrays sin materializar
+    objetos Evaluacion. Los últimos registros materializados se recuerdan:
+    pedir dos veces el mismo índice devuelve el mismo objeto, así los
+    fragmentos HTML memoizados por identidad (render.py) se reutilizan.
+
+    Solo se agregan registros. La longitud sube recién cuando el registro
+    quedó completo en todas las columnas, así que un lector sin lock (otra
+    sesión) nunca ve un registro a medias.
+    """
+
+    def __init__(self):
+        self._catalogos = {c: _Catalogo() for c in CAMPOS_CATEGORICOS}
+        self.categoricos = {c: array("H") for c in CAMPOS_CATEGORICOS}
+        self.scores = {dim: array("b") for dim in DIMENSIONES_SCORES}
+        self.shock = array("b")
+        self.escandalo_visible = array("B")
+        self.severidad = array("B")
+        self.impacto = {dim: array("B") for dim in DIMENSIONES_IMPACTO}
+        # Origen del texto narrativo: (archivo, offset) o -1 si está en memoria
+        # Un archivo de log por segundo: en una carpeta de logs de meses pasan los 65535
+        self._archivos: List[str] = []
+        self._indice_archivos: Dict[str, int] = {}
+        self._archivo = array("I")
+        self._offset = array("q")
+        self._narrativa_memoria: Dict[int, dict] = {}
+        self._materializadas: "OrderedDict[int, Evaluacion]" = OrderedDict()
+        self._materializadas_lock = threading.Lock()
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _agregar_comun(self, categoricos: dict, scores: dict, shock: int, escandalo: dict, impacto: dict) -> int:
+        for c in CAMPOS_CATEGORICOS:
+            self.categoricos[c].append(self._catalogos[c].codigo(categoricos[c]))
+        for dim in DIMENSIONES_SCORES:
+            self.scores[dim].append(scores[dim])
+        self.shock.append(shock)
+        self.escandalo_visible.append(1 if escandalo["visible"] else 0)
+        self.severidad.append(_codigo(SEVERIDADES, escandalo["severidad"]))
+        for dim in DIMENSIONES_IMPACTO:
+            self.impacto[dim].append(_codigo(VALORES_IMPACTO, impacto[dim]))
+        return len(self.shock) - 1
+
+    def agregar(self, evaluacion: Evaluacion) -> None:
+        """Agrega una Evaluacion ya construida (texto queda en memoria)."""
+        i = self._agregar_comun(
+            {c: getattr(evaluacion, c) for c in CAMPOS_CATEGORICOS},
+            asdict(evaluacion.scores),
+            evaluacion.shock_opinion_publica,
+            {"visible": evaluacion.escandalo.visible, "severidad": evaluacion.escandalo.severidad},
+            asdict(evaluacion.impacto_politico),
+        )
+        self._archivo.append(0)
+        self._offset.append(-1)
+        self._narrativa_memoria[i] = _narrativa_de_dict(evaluacion.to_dict())
+        self._n = i + 1
+
+    def agregar_registro(self, eval_dict: dict, archivo: str, offset: int) -> None:
+        """
+        Agrega un dict canónico (to_dict) cuyo texto se recargará desde
+        `archivo` en la posición `offset` (línea JSONL del log).
+        """
+        i = self._agregar_comun(eval_dict, eval_dict["scores"], eval_dict["shock_opinion_publica"],
+                                eval_dict["escandalo"], eval_dict["impacto_politico"])
+        indice = self._indice_archivos.get(archivo)
+        if indice is None:
+            indice = self._indice_archivos[archivo] = len(self._archivos)
+            self._archivos.append(archivo)
+        self._archivo.append(indice)
+        self._offset.append(offset)
+        self._n = i + 1
+
+    @classmethod
+    def desde_evaluaciones(cls, evaluaciones: List[Evaluacion]) -> "EvaluacionBatch":
+        batch = cls()
+        for e in evaluaciones:
+            batch.agregar(e)
+        return batch
+
+    def _indice(self, i: int) -> int:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("índice fuera de rango")
+        return i
+
+    def valor(self, campo: str, i: int) -> str:
+        """Valor de un campo categórico (equipo, partido, ...) del registro i."""
+        i = self._indice(i)
+        return self._catalogos[campo].valores[self.categoricos[campo][i]]
+
+    def origen(self, i: int) -> Optional[Tuple[str, int]]:
+        """
+        (nombre del archivo de log, offset) del registro i, o None si se
+        agregó en memoria. No cambia aunque otro proceso escriba ni al
+        volver a cargar los logs: sirve de identificador estable.
+        """
+        i = self._indice(i)
+        offset = self._offset[i]
+        if offset < 0:
+            return None
+        return os.path.basename(self._archivos[self._archivo[i]]), offset
+
+    def narrativa(self, i: int) -> dict:
+        """Texto narrativo del registro i (se lee del log si no está en memoria)."""
+        i = self._indice(i)
+        offset = self._offset[i]
+        if offset < 0:
+            return self._narrativa_memoria[i]
+        with open(self._archivos[self._archivo[i]], "rb") as f:
+            f.seek(offset)
+            log_entry = json.loads(f.readline())
+        eval_dict = log_entry.get("evaluacion", {})
+        if log_entry.get("esquema") != ESQUEMA_VERSION:
+            # Registros viejos: misma normalización que al cargarlos (ver storage.leer_evaluaciones_nuevas)
+            eval_dict = Evaluacion.from_dict(eval_dict).to_dict()
+        return _narrativa_de_dict(eval_dict)
+
+    def evaluacion(self, i: int) -> Evaluacion:
+        """Materializa el registro i como Evaluacion (incluye texto)."""
+        i = self._indice(i)
+        with self._materializadas_lock:
+            evaluacion = self._materializadas.get(i)
+            if evaluacion is not None:
+                self._materializadas.move_to_end(i)
+                return evaluacion
+        evaluacion = self._materializar(i)
+        with self._materializadas_lock:
+            evaluacion = self._materializadas.setdefault(i, evaluacion)
+            if len(self._materializadas) > MAX_MATERIALIZADAS:
+                self._materializadas.popitem(last=False)
+        return evaluacion
+
+    def _materializar(self, i: int) -> Evaluacion:
+        texto = self.narrativa(i)
+        scores = _instanciar_confiable(Scores, {dim: self.scores[dim][i] for dim in DIMENSIONES_SCORES})
+        total_sin_shock = scores.total()
+        return _instanciar_confiable(Evaluacion, {
+            **{c: self.valor(c, i) for c in CAMPOS_CATEGORICOS},
+            "scores": scores,
+            "total_sin_shock": total_sin_shock,
+            "shock_opinion_publica": self.shock[i],
+            "total_final": total_sin_shock + self.shock[i],
+            "escandalo": _instanciar_confiable(Escandalo, {
+                "visible": bool(self.escandalo_visible[i]),
+                "severidad": SEVERIDADES[self.severidad[i]],
+                "motivo": texto["motivo"],
+            }),
+            "fortalezas": texto["fortalezas"],
+            "debilidades": texto["debilidades"],
+            "titular": texto["titular"],
+            "devolucion_gm": texto["devolucion_gm"],
+            "impacto_politico": _instanciar_confiable(ImpactoPolitico, {
+                dim: VALORES_IMPACTO[self.impacto[dim][i]] for dim in DIMENSIONES_IMPACTO
+            }),
+        })
+
+    def __getitem__(self, i):
+        """Evaluacion del registro i, o lista de Evaluacion para un slice."""
+        if isinstance(i, slice):
+            return [self.evaluacion(j) for j in range(*i.indices(len(self)))]
+        return self.evaluacion(i)
+
+    def __iter__(self) -> Iterator[Evaluacion]:
+        for i in range(len(self)):
+            yield self.evaluacion(i)
+
+    def totales_sin_shock(self) -> array:
+        n = len(self)
+        return array("h", map(sum, zip(*(self.scores[dim][:n] for dim in DIMENSIONES_SCORES))))
+
+    def totales_finales(self) -> array:
+        return array("h", (t + s for t, s in zip(self.totales_sin_shock(), self.shock)))
+
+    def filtrar(self, campo: str, valor: str) -> List[int]:
+        """Índices cuyo campo categórico coincide con valor."""
+        codigo = self._catalogos[campo].buscar(valor)
+        if codigo is None:
+            return []
+        return [i for i, c in enumerate(self.categoricos[campo][:len(self)]) if c == codigo]
+
+    def ranking(self) -> list:
+        """Mismo resultado que storage.obtener_ranking, calculado sobre arrays."""
+        equipos = self._catalogos["equipo"].valores
+        n_equipos = len(equipos)
+        acumulado = [0] * n_equipos
+        cantidad = [0] * n_equipos
+        partido: List[Optional[int]] = [None] * n_equipos
+        n = len(self)
+        columnas = zip(self.categoricos["equipo"][:n], self.categoricos["partido"][:n], self.shock[:n],
+                       *(self.scores[dim][:n] for dim in DIMENSIONES_SCORES))
+        for c, p, shock, a, b, d, e, f in columnas:
+            acumulado[c] += a + b + d + e + f + shock
+            cantidad[c] += 1
+            if partido[c] is None:
+                partido[c] = p
+        partidos = self._catalogos["partido"].valores
+        filas = [
+            {
+                'equipo': equipos[c],
+                'partido': partidos[partido[c]],
+                'total_acumulado': acumulado[c],
+                'cantidad_entregas': cantidad[c]
+            }
+            for c in range(n_equipos) if cantidad[c]
+        ]
+        return sorted(filas, key=lambda x: x['total_acumulado'], reverse=True)
+
+
+def _narrativa_de_dict(eval_dict: dict) -> dict:
+    return {
+        "titular": eval_dict.get("titular", ""),
+        "devolucion_gm": eval_dict.get("devolucion_gm", ""),
+        "fortalezas": eval_dict.get("fortalezas", []),
+        "debilidades": eval_dict.get("debilidades", []),
+        "motivo": (eval_dict.get("escandalo") or {}).get("motivo", ""),
+    }
+
+
 @dataclass
 class Equipo:
     nombre: str
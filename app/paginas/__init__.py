@@ -0,0 +1,57 @@
+"""
+Páginas de la interfaz.
+
+Cada página es un módulo con una función `render(ctx)`. app.py importa
+solo la página seleccionada (la primera vez que se elige) y en cada rerun
+ejecuta únicamente su `render`; el resto de las páginas no se toca.
+"""
+
+import importlib
+from dataclasses import dataclass
+from types import ModuleType
+
+import streamlit as st
+
+from app.pipeline import presupuestos_logs
+from app.state import EstadoJuego
+
+
+# Nombre en la navegación -> módulo de la página
+PAGINAS = {
+    "Juego": "app.paginas.juego",
+    "Pantalla": "app.paginas.pantalla",
+    "Ranking": "app.paginas.ranking",
+    "Noticiero": "app.paginas.noticiero",
+    "Rúbrica": "app.paginas.rubrica",
+    "Configuración": "app.paginas.configuracion",
+}
+
+
+@dataclass
+class Contexto:
+    """Datos del sidebar y estado compartido que recibe cada página."""
+    estado: EstadoJuego
+    etapa: str
+    ronda: str
+    evento: dict
+    modelo_ollama: str
+    url_ollama: str
+    juego_id: str
+    modo_proyector: bool = False
+
+
+def presupuestos_sesion() -> dict:
+    """
+    Presupuesto de num_predict por formato, calculado la primera vez que se usa.
+
+    Recorre todos los logs, así que no se hace en el arranque sino al
+    evaluar o al abrir la configuración técnica.
+    """
+    if "presupuestos" not in st.session_state:
+        st.session_state.presupuestos = presupuestos_logs()
+    return st.session_state.presupuestos
+
+
+def cargar_pagina(nombre: str) -> ModuleType:
+    """Importa (una sola vez por proceso) el módulo de la página."""
+    return importlib.import_module(PAGINAS[nombre])
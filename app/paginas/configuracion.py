@@ -0,0 +1,185 @@
+"""
+Configuración técnica: modelo y URL de Ollama, muestras, presupuestos y estadísticas.
+"""
+
+import streamlit as st
+import requests
+
+from app import perfiles
+from app.llm import MAX_MUESTRAS
+from app.paginas import Contexto, presupuestos_sesion
+from app.pipeline import calibrar_tokens
+from app.prompts import VARIANTES_PROMPT
+from app.router import obtener_router
+from app.tokens import calibracion, recalibrar
+from app.turnos import obtener_planificador
+from app.ui import card
+
+
+def test_conexion_ollama(url: str, modelo: str) -> tuple[bool, str]:
+    """Prueba la conexión con Ollama (con varios endpoints, el chequeo de salud de cada uno)."""
+    router = obtener_router(url)
+    if router is not None:
+        sanos = sum(1 for e in router.revisar_todos() if e["sano"])
+        if sanos == 0:
+            return False, "❌ Error: ningún endpoint responde"
+        return True, f"✅ {sanos} de {len(router.endpoints)} endpoints disponibles"
+    try:
+        payload = {
+            "model": modelo,
+            "prompt": "test",
+            "stream": False,
+            "options": {"num_predict": 5}
+        }
+        response = requests.post(url, json=payload, timeout=5)
+        response.raise_for_status()
+        return True, "✅ Conexión exitosa"
+    except requests.exceptions.RequestException as e:
+        return False, f"❌ Error: {str(e)}"
+
+
+def sidebar_tecnica() -> None:
+    """
+    Controles técnicos del sidebar (solo con la página de Configuración abierta).
+
+    Los valores se guardan en session_state para que sigan vigentes al
+    volver a Juego.
+    """
+    st.divider()
+    st.subheader("Configuración Técnica")
+    st.session_state.modelo_ollama = st.text_input(
+        "Modelo Ollama",
+        value=st.session_state.modelo_ollama,
+        help="Nombre del modelo local configurado en Ollama"
+    )
+    st.session_state.url_ollama = st.text_input(
+        "URL Ollama",
+        value=st.session_state.url_ollama,
+        help="URL del endpoint de generación de Ollama (varias separadas por coma para repartir la carga)"
+    )
+    st.session_state.n_muestras = st.number_input(
+        "Muestras por evaluación",
+        min_value=1,
+        max_value=MAX_MUESTRAS,
+        value=st.session_state.n_muestras,
+        help="Con más de 1 muestra se evalúa varias veces en paralelo y se agrega (mediana / mayoría)"
+    )
+    variantes = list(VARIANTES_PROMPT)
+    st.session_state.variante_prompt = st.selectbox(
+        "Prompt",
+        variantes,
+        index=variantes.index(st.session_state.variante_prompt),
+        help="'compacto' manda el mismo contenido en la mitad de tokens (comparar con python -m app.bench prompts)"
+    )
+    st.caption("Presupuesto de tokens por formato (num_predict)")
+    for formato, info in presupuestos_sesion().items():
+        st.caption(
+            f"**{formato}**: {info['num_predict']} ({info['fuente']}; "
+            f"n={info['n']}, p50={info['p50']}, p95={info['p95']}, máx={info['max']})"
+        )
+    calibracion_modelo = calibracion(st.session_state.modelo_ollama)
+    fuente = "calibrado" if calibracion_modelo.calibrada else "sin calibrar"
+    st.caption(
+        f"Tokens del prompt: {calibracion_modelo.caracteres_por_token} caracteres/token "
+        f"({fuente}; n={calibracion_modelo.observaciones}). "
+        "Se mide con Ollama sobre los prompts recientes de los logs (o con `python -m app.cli calibrar`)."
+    )
+    col1, col2 = st.columns(2)
+    if col1.button("📏 Calibrar ahora", help="Manda a Ollama los últimos 20 prompts de los logs para contar sus tokens"):
+        with st.spinner("Midiendo prompts con Ollama..."):
+            try:
+                medidos, nueva = calibrar_tokens(st.session_state.url_ollama, st.session_state.modelo_ollama)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.toast(f"{medidos} prompts medidos: {nueva.caracteres_por_token} caracteres/token")
+                st.rerun()
+    if col2.button("🔁 Releer calibración"):
+        recalibrar()
+        st.rerun()
+
+
+def _perfilado() -> None:
+    """Interruptor del perfilado y resumen de los últimos perfiles del proceso."""
+    st.subheader("⏱️ Perfilado")
+    activo = st.toggle(
+        "Perfilar reruns y evaluaciones",
+        value=perfiles.activo(),
+        help="Vale para todo el proceso (todas las sesiones). Cada rerun y cada evaluación deja un .prof en logs/profiles"
+    )
+    if activo != perfiles.activo():
+        perfiles.activar(activo)
+    recientes = perfiles.recientes()
+    if not recientes:
+        st.caption(f"Sin perfiles en este proceso. Se guardan en `{perfiles.carpeta_perfiles()}`.")
+        return
+    etiquetas = [f"{p.timestamp} — {p.nombre} ({p.segundos:.3f} s)" for p in recientes]
+    elegido = st.selectbox("Perfil", range(len(recientes)), format_func=etiquetas.__getitem__)
+    perfil = recientes[elegido]
+    st.caption(f"Funciones más costosas (tiempo acumulado). Archivo: `{perfil.ruta}`")
+    st.dataframe(perfil.top, use_container_width=True, hide_index=True)
+
+
+def render(ctx: Contexto) -> None:
+    """Prueba de conexión con Ollama y estadísticas del juego."""
+    estado = ctx.estado
+    st.title("⚙️ Configuración")
+    
+    st.subheader("🔧 Configuración Técnica")
+    
+    # Los valores se editan en el sidebar y se conservan al cambiar de página
+    modelo_ollama, url_ollama = ctx.modelo_ollama, ctx.url_ollama
+    st.caption(f"Modelo: `{modelo_ollama}` — URL: `{url_ollama}`")
+    
+    # Test de conexión
+    if st.button("🔌 Probar Conexión", type="primary"):
+        with st.spinner("Probando conexión..."):
+            ok, mensaje = test_conexion_ollama(url_ollama, modelo_ollama)
+            if ok:
+                st.success(mensaje)
+            else:
+                st.error(mensaje)
+    
+    # Reparto entre endpoints
+    router = obtener_router(url_ollama)
+    if router is not None:
+        st.caption("Endpoints de Ollama")
+        st.dataframe(
+            [
+                {
+                    "Endpoint": e["url"],
+                    "Estado": "🟢" if e["sano"] else "🔴",
+                    "En curso": e["en_curso"],
+                    "Llamadas": e["llamadas"],
+                    "Errores": e["errores"],
+                    "s/llamada": e["segundos_promedio"],
+                    "Cargados": ", ".join(e["cargados"]),
+                }
+                for e in router.estadisticas()
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    # Cola de evaluaciones compartida por todas las sesiones
+    cola = obtener_planificador().estadisticas()
+    st.caption(
+        f"Cola de evaluaciones: {cola['en_curso']} en curso, {cola['en_cola']} esperando, "
+        f"{cola['atendidos']} atendidas, {cola['rechazados']} rechazadas "
+        f"(espera p50 {cola['espera_p50']:.1f} s, p95 {cola['espera_p95']:.1f} s)"
+    )
+    
+    st.divider()
+    _perfilado()
+    
+    st.divider()
+    
+    # Estadísticas
+    st.subheader("📊 Estadísticas")
+    total_evaluaciones = len(estado.evaluaciones)
+    card("Total de evaluaciones", f"<strong>{total_evaluaciones}</strong> entregas evaluadas", border_color="#666666")
+    
+    if total_evaluaciones > 0:
+        ranking = estado.ranking()
+        if ranking:
+            card("Equipos activos", f"<strong>{len(ranking)}</strong> equipos en competencia", border_color="#666666")
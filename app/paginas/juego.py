@@ -0,0 +1,409 @@
+"""
+Pantalla de turnos: tablero de campaña, entrega del equipo y evaluación con el LLM.
+"""
+
+import json
+from typing import Optional, Tuple
+
+import streamlit as st
+import requests
+
+from app.cliente import obtener_cliente
+from app.events import (
+    EQUIPOS_INICIALES, FORMATOS_ENTREGA, OPCIONES_TABLERO, SITUACION_INTERNA_DEFAULT,
+    formato_sugerido, validar_entrega
+)
+from app.models import Equipo, Evaluacion, EvaluacionBatch
+from app.paginas import Contexto, presupuestos_sesion
+from app.pipeline import Entrega, buscar_duplicados, evaluar_entrega, reusar_evaluacion
+from app.render import (
+    party_color, badge, badges_evaluacion_html, dimensiones_html, escandalo_html, devolucion_html
+)
+from app.similitud import Coincidencia, texto_entrega
+from app.tokens import PRESUPUESTOS_SECCION, calibracion
+from app.turnos import ColaLlena, obtener_planificador
+from app.ui import card, headline
+
+
+def obtener_equipos_evaluados_ronda(evaluaciones: EvaluacionBatch, ronda: str) -> set:
+    """Retorna set de candidatos que ya evaluaron en esta ronda (sobre las columnas, sin leer texto)."""
+    return {evaluaciones.valor("equipo", i) for i in evaluaciones.filtrar("ronda", ronda)}
+
+def obtener_siguiente_equipo_sugerido(evaluaciones: EvaluacionBatch, ronda: str) -> Equipo:
+    """Retorna el primer equipo que aún no evaluó en esta ronda."""
+    evaluados = obtener_equipos_evaluados_ronda(evaluaciones, ronda)
+    for equipo in EQUIPOS_INICIALES:
+        if equipo.candidato not in evaluados:
+            return equipo
+    return EQUIPOS_INICIALES[0]  # Si todos evaluaron, retorna el primero
+
+
+def _clave_entrega(entrega: Entrega) -> str:
+    return json.dumps(entrega.to_dict(), sort_keys=True, ensure_ascii=False)
+
+
+def aviso_duplicado(entrega: Entrega) -> Optional[Tuple[str, Coincidencia]]:
+    """
+    Compara la entrega con la anterior casi igual que quedó pendiente al enviarla.
+
+    Returns:
+        ("evaluar" o "reusar", coincidencia) cuando el docente elige; None
+        mientras no hay aviso o no se eligió (si la entrega cambió, el aviso se descarta)
+    """
+    pendiente = st.session_state.get("duplicado")
+    if pendiente is None:
+        return None
+    clave, coincidencia = pendiente
+    if clave != _clave_entrega(entrega):
+        del st.session_state.duplicado
+        return None
+    
+    anterior, evaluacion = coincidencia.entrega, coincidencia.evaluacion
+    card(
+        "🔁 Entrega casi igual a una anterior",
+        f"Se parece un <strong>{coincidencia.similitud:.0%}</strong> a la entrega de <strong>{anterior.get('equipo')}</strong> "
+        f"en {anterior.get('ronda')} ({coincidencia.timestamp[:16].replace('T', ' ')}), que sacó "
+        f"<strong>{evaluacion.get('total_final')}</strong>: “{evaluacion.get('titular', '')}”",
+        border_color="#F2994A"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("Anterior")
+        st.text(texto_entrega(anterior.get("campos") or {}))
+    with col2:
+        st.caption("Nueva")
+        st.text(texto_entrega(entrega.campos))
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        evaluar_igual = st.button("Evaluar igual", use_container_width=True)
+    with col2:
+        reusar = st.button(
+            "Reusar evaluación anterior",
+            disabled=not coincidencia.reusable(entrega.to_dict()),
+            help="Solo para el mismo equipo, ronda, tablero y situación interna, con un texto casi idéntico",
+            use_container_width=True
+        )
+    if not (evaluar_igual or reusar):
+        return None
+    del st.session_state.duplicado
+    return ("reusar" if reusar else "evaluar"), coincidencia
+
+
+def render(ctx: Contexto) -> None:
+    """Turno de un equipo: estado de la ronda, entrega y resultado."""
+    estado, etapa, ronda, evento = ctx.estado, ctx.etapa, ctx.ronda, ctx.evento
+    modelo_ollama, url_ollama = ctx.modelo_ollama, ctx.url_ollama
+    # Juego del sidebar: turno en la cola compartida y entregas que se comparan entre sí
+    juego_id = ctx.juego_id
+    
+    st.title("Juego — Turnos")
+    
+    # Estado de la ronda
+    equipos_evaluados = obtener_equipos_evaluados_ronda(estado.evaluaciones, ronda)
+    total_equipos = len(EQUIPOS_INICIALES)
+    entregas_evaluadas = len(estado.evaluaciones.filtrar("ronda", ronda))
+    # Un equipo puede re-entregar en la misma ronda: el progreso cuenta equipos, no entregas
+    progreso = min(len(equipos_evaluados) / total_equipos, 1.0) if total_equipos > 0 else 0
+    
+    estado_html = f"""
+    <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 8px;">
+        <div>
+            <strong>{etapa}</strong> — <strong>{ronda}</strong><br/>
+            <span class="small-muted">{evento['titulo']}</span>
+        </div>
+        <div style="text-align: right;">
+            <strong>{entregas_evaluadas}/{total_equipos}</strong> entregas<br/>
+            <span class="small-muted">Progreso de ronda</span>
+        </div>
+    </div>
+    """
+    st.progress(progreso)
+    card("Estado de la Ronda", estado_html, border_color="#111111")
+    
+    # Siguiente equipo sugerido
+    siguiente = obtener_siguiente_equipo_sugerido(estado.evaluaciones, ronda)
+    card(
+        "Siguiente Equipo",
+        f"<strong>{siguiente.candidato}</strong> ({siguiente.partido})<br/><span class='small-muted'>{siguiente.perfil}</span>",
+        border_color=party_color(siguiente.partido),
+        icon="➡️"
+    )
+    
+    st.divider()
+    
+    # Turno del equipo
+    st.subheader("Turno del Equipo")
+    
+    # Selección de equipo
+    equipo_seleccionado = st.selectbox(
+        "Equipo",
+        options=range(len(EQUIPOS_INICIALES)),
+        format_func=lambda i: f"{EQUIPOS_INICIALES[i].nombre} - {EQUIPOS_INICIALES[i].candidato} ({EQUIPOS_INICIALES[i].partido})",
+        help="Selecciona el equipo que presenta la entrega"
+    )
+    
+    equipo = EQUIPOS_INICIALES[equipo_seleccionado]
+    col_equipo = party_color(equipo.partido)
+    
+    # Card de información del equipo
+    equipo_html = f"""
+    <div>
+        <strong>Partido:</strong> {equipo.partido}<br/>
+        <strong>Candidato:</strong> {equipo.candidato}<br/>
+        <strong>Perfil:</strong> {equipo.perfil}
+    </div>
+    """
+    card("Información del Equipo", equipo_html, border_color=col_equipo)
+    
+    # Contexto del evento
+    card("Contexto del Evento", evento['descripcion'], border_color="#666666")
+    
+    # Situación interna
+    situacion_interna = st.text_area(
+        "Situación Interna del Partido",
+        value=SITUACION_INTERNA_DEFAULT,
+        help="Describe la situación interna actual del partido",
+        height=100
+    )
+    tokens_situacion = calibracion(modelo_ollama).estimar(situacion_interna)
+    presupuesto_situacion = PRESUPUESTOS_SECCION["situacion_interna"]
+    if tokens_situacion > presupuesto_situacion:
+        st.error(f"⚠️ ~{tokens_situacion}/{presupuesto_situacion} tokens (excede el presupuesto)")
+    else:
+        st.caption(f"~{tokens_situacion}/{presupuesto_situacion} tokens")
+    
+    # Tablero de campaña
+    st.subheader("Tablero de Campaña")
+    col1, col2 = st.columns(2)
+    with col1:
+        segmento = st.selectbox(
+            "Segmento objetivo",
+            OPCIONES_TABLERO["segmento"],
+            help="Segmento objetivo de la campaña"
+        )
+        tono = st.selectbox(
+            "Tono",
+            OPCIONES_TABLERO["tono"],
+            help="Tono comunicacional"
+        )
+    with col2:
+        canal = st.selectbox(
+            "Canal",
+            OPCIONES_TABLERO["canal"],
+            help="Canal de comunicación"
+        )
+        alianza_interna = st.selectbox(
+            "Alianza interna",
+            OPCIONES_TABLERO["alianza_interna"],
+            help="Estrategia de alianza interna"
+        )
+    
+    tablero = {
+        "segmento": segmento,
+        "tono": tono,
+        "canal": canal,
+        "alianza_interna": alianza_interna
+    }
+    
+    # Sistema de formatos de entrega
+    st.subheader(f"Entrega: {evento['tipo_entrega']}")
+    
+    # Determinar formato sugerido
+    formato_default = formato_sugerido(evento['tipo_entrega'])
+    
+    formato_seleccionado = st.selectbox(
+        "Formato",
+        options=list(FORMATOS_ENTREGA.keys()),
+        index=list(FORMATOS_ENTREGA.keys()).index(formato_default) if formato_default in FORMATOS_ENTREGA else 0,
+        help="Selecciona el formato de entrega"
+    )
+    
+    # Campos dinámicos según formato
+    campos_entrega = {}
+    formato_config = FORMATOS_ENTREGA[formato_seleccionado]
+    
+    for campo_key, campo_info in formato_config["campos"].items():
+        max_chars = campo_info["max_chars"]
+        label = campo_info["label"]
+        texto = st.text_area(
+            f"{label} (máx. {max_chars} caracteres)",
+            key=f"entrega_{campo_key}",
+            help=f"Máximo {max_chars} caracteres",
+            height=100 if max_chars > 200 else 60
+        )
+        chars_actuales = len(texto)
+        if chars_actuales > max_chars:
+            st.error(f"⚠️ {chars_actuales}/{max_chars} caracteres (excede el límite)")
+        else:
+            st.caption(f"{chars_actuales}/{max_chars} caracteres")
+        campos_entrega[campo_key] = texto
+    
+    # Tamaño del prompt: tokens estimados y contexto que se le va a pedir a Ollama
+    entrega = Entrega(
+        equipo=equipo,
+        etapa=etapa,
+        ronda=ronda,
+        evento=evento,
+        formato=formato_seleccionado,
+        campos=campos_entrega,
+        tablero=tablero,
+        situacion_interna=situacion_interna
+    )
+    variante_prompt = st.session_state.variante_prompt
+    # Sin presupuestos aprendidos todavía (se calculan al evaluar) se usa el del formato
+    num_predict = st.session_state.get("presupuestos", {}).get(formato_seleccionado, {}).get(
+        "num_predict", formato_config["presupuesto_tokens"]
+    )
+    medida = entrega.medir(modelo_ollama, num_predict, entrega.prompt_completo(variante_prompt))
+    if medida.num_ctx is None:
+        st.warning(f"⚠️ El prompt (~{medida.total} tokens) no entra en el contexto del modelo. Acortá la situación interna o la entrega.")
+    else:
+        st.caption(f"📏 Prompt ~{medida.total} tokens + {num_predict} de respuesta → contexto {medida.num_ctx}")
+    
+    # Botones de acción
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        evaluar = st.button("Enviar a la ciudadanía", type="primary", use_container_width=True)
+    with col2:
+        if st.button("🔄 Limpiar", use_container_width=True):
+            st.rerun()
+    
+    # Si la entrega es casi igual a una anterior del juego, el docente decide antes de evaluar
+    decision = aviso_duplicado(entrega)
+    
+    # Procesamiento de evaluación
+    if evaluar or decision:
+        errores = [f"⚠️ {e}" for e in validar_entrega(formato_seleccionado, campos_entrega) + medida.errores()]
+        coincidencias = buscar_duplicados(entrega, juego_id) if evaluar and not errores else []
+        
+        if errores:
+            errores_html = "<br/>".join(errores)
+            card("❌ Errores de Turno", errores_html, border_color="#EB5757")
+        elif coincidencias:
+            st.session_state.duplicado = (_clave_entrega(entrega), coincidencias[0])
+            st.rerun()
+        else:
+            # Guardar ranking previo antes de agregar nueva evaluación
+            ranking_actual = estado.ranking()
+            st.session_state.ranking_previo = ranking_actual
+            
+            with st.spinner("La ciudadanía está evaluando..."):
+                try:
+                    n_muestras = st.session_state.n_muestras
+                    aviso_cola = st.empty()
+                    
+                    def al_esperar(posicion: int) -> None:
+                        aviso_cola.info(f"⏳ En cola: posición {posicion}. Hay otras evaluaciones en curso.")
+                    
+                    cliente = obtener_cliente()
+                    if decision is not None and decision[0] == "reusar":
+                        # Sin llamar al LLM: se guarda de nuevo la evaluación de la entrega anterior
+                        resultado = reusar_evaluacion(entrega, decision[1], {"juego": juego_id}, variante_prompt)
+                        st.session_state.ultimo_resultado = (resultado.evaluacion, None)
+                        log_file = estado.agregar(
+                            evaluacion=resultado.evaluacion,
+                            prompt_completo=resultado.prompt_completo,
+                            respuesta_llm=resultado.respuesta_llm,
+                            modelo_usado=modelo_ollama,
+                            metadatos=resultado.metadatos
+                        )
+                    elif cliente is not None:
+                        # El servicio evalúa y guarda; acá se suma su evaluación al estado
+                        trabajo = cliente.evaluar(
+                            entrega.to_dict(), al_esperar,
+                            juego=juego_id, modelo=modelo_ollama, muestras=n_muestras,
+                            prompt=variante_prompt
+                        )
+                        evaluacion = Evaluacion.from_dict(trabajo["evaluacion"])
+                        st.session_state.ultimo_resultado = (evaluacion, trabajo["dispersion"])
+                        log_file = trabajo["log_file"]
+                        estado.incorporar(evaluacion, log_file)
+                    else:
+                        with obtener_planificador().turno(juego_id, equipo.candidato, al_esperar):
+                            aviso_cola.empty()
+                            resultado = evaluar_entrega(
+                                entrega, url_ollama, modelo_ollama, presupuestos_sesion(), n_muestras=n_muestras,
+                                metadatos={"juego": juego_id}, variante_prompt=variante_prompt
+                            )
+                        st.session_state.ultimo_resultado = (resultado.evaluacion, resultado.dispersion)
+                        log_file = estado.agregar(
+                            evaluacion=resultado.evaluacion,
+                            prompt_completo=resultado.prompt_completo,
+                            respuesta_llm=resultado.respuesta_llm,
+                            modelo_usado=modelo_ollama,
+                            metadatos=resultado.metadatos
+                        )
+                    
+                    st.success(f"✅ Evaluación completada. Guardada en {log_file}")
+                    st.rerun()
+                
+                except ColaLlena as e:
+                    st.warning(f"🚦 Servidor ocupado: {e}")
+                except requests.exceptions.RequestException as e:
+                    st.error(f"❌ Error de conexión con Ollama: {e}")
+                    st.info("💡 Asegúrate de que Ollama esté corriendo y el modelo esté disponible.")
+                except ValueError as e:
+                    st.error(f"❌ Error de validación: {e}")
+                    with st.expander("🔍 Ver respuesta del LLM"):
+                        st.text(getattr(e, "respuesta_llm", "") or "No disponible")
+                except Exception as e:
+                    st.error(f"❌ Error inesperado: {e}")
+                    st.exception(e)
+    
+    # Mostrar la última evaluación de esta sesión si es de este equipo/ronda (la
+    # última del estado compartido puede ser de otra sesión que evaluó en el medio)
+    if st.session_state.ultimo_resultado is not None:
+        ultima, dispersion = st.session_state.ultimo_resultado
+        if ultima.equipo == equipo.candidato and ultima.ronda == ronda:
+            st.divider()
+            st.subheader("📊 Resultado del Turno")
+            
+            headline(f"📰 {ultima.titular}")
+            
+            # Badges y barras de scores
+            st.markdown(badges_evaluacion_html(ultima), unsafe_allow_html=True)
+            st.markdown(dimensiones_html(ultima), unsafe_allow_html=True)
+            
+            # Dispersión entre muestras (modo multimuestra)
+            if dispersion:
+                dispersion_html = " ".join(
+                    badge(f"{dim}: {d['min']}–{d['max']} (σ {d['desvio']})")
+                    for dim, d in dispersion.items()
+                )
+                card("🎯 Dispersión entre muestras", dispersion_html, border_color="#666666")
+            
+            # Escándalo y devolución
+            if ultima.escandalo.visible:
+                st.markdown(escandalo_html(ultima), unsafe_allow_html=True)
+            st.markdown(devolucion_html(ultima), unsafe_allow_html=True)
+            
+            # Fortalezas y debilidades
+            col1, col2 = st.columns(2)
+            with col1:
+                fortalezas_html = "<ul style='margin: 0; padding-left: 20px;'>"
+                for f in ultima.fortalezas:
+                    fortalezas_html += f"<li>{f}</li>"
+                fortalezas_html += "</ul>"
+                card("✅ Fortalezas", fortalezas_html, border_color="#27AE60")
+            with col2:
+                debilidades_html = "<ul style='margin: 0; padding-left: 20px;'>"
+                for d in ultima.debilidades:
+                    debilidades_html += f"<li>{d}</li>"
+                debilidades_html += "</ul>"
+                card("❌ Debilidades", debilidades_html, border_color="#EB5757")
+            
+            # Impacto político
+            impactos = ultima.impacto_politico
+            impactos_html = ""
+            impactos_data = [
+                ("Instalación", impactos.instalacion),
+                ("Persuasión", impactos.persuasion),
+                ("Movilización", impactos.movilizacion),
+                ("Reputación", impactos.reputacion),
+                ("Riesgo", impactos.riesgo)
+            ]
+            for nombre, valor in impactos_data:
+                icon = "⬆️" if valor == "Sube" else "⬇️" if valor == "Baja" else "➡️"
+                color = "#27AE60" if valor == "Sube" else "#EB5757" if valor == "Baja" else "#999999"
+                impactos_html += f'<div style="display: inline-block; margin-right: 16px; margin-bottom: 8px;"><strong>{nombre}:</strong> <span style="color: {color}; font-weight: 700;">{icon} {valor}</span></div>'
+            card("📈 Impacto Político", impactos_html, border_color="#666666")
@@ -0,0 +1,98 @@
+"""
+Noticiero: feed narrativo paginado sobre el historial completo de los logs.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import streamlit as st
+
+from app.events import EQUIPOS_INICIALES, EVENTOS
+from app.metricas import registrar_caches
+from app.models import Evaluacion
+from app.paginas import Contexto
+from app.render import noticia_html
+from app.storage import CursorHistorial, FiltroHistorial, leer_historial
+from app.ui import card
+
+
+# Noticias por página
+POR_PAGINA = 20
+
+TODOS = "Todos"
+OPCIONES_ESCANDALO = {TODOS: None, "Con escándalo": True, "Sin escándalo": False}
+
+
+@lru_cache(maxsize=64)
+def _pagina(
+    filtro: FiltroHistorial,
+    cursor: Optional[CursorHistorial],
+    version: int
+) -> Tuple[List[Evaluacion], Optional[CursorHistorial]]:
+    """
+    Página del historial, cacheada entre reruns y sesiones.
+
+    Devolver los mismos objetos hace que las cards de render.py salgan del
+    caché. `version` solo invalida la primera página (cursor None): las
+    demás apuntan a registros ya escritos y no cambian.
+    """
+    return leer_historial(filtro, cursor, limite=POR_PAGINA)
+
+
+registrar_caches("noticiero", {"noticiero_pagina": _pagina})
+
+
+def _filtros() -> FiltroHistorial:
+    """Selectores de filtro (ronda, equipo, partido, escándalo)."""
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        ronda = st.selectbox("Ronda", [TODOS] + list(EVENTOS), key="noticiero_ronda")
+    with col2:
+        equipo = st.selectbox("Equipo", [TODOS] + [e.candidato for e in EQUIPOS_INICIALES], key="noticiero_equipo")
+    with col3:
+        partidos = list(dict.fromkeys(e.partido for e in EQUIPOS_INICIALES))
+        partido = st.selectbox("Partido", [TODOS] + partidos, key="noticiero_partido")
+    with col4:
+        escandalo = st.selectbox("Escándalo", list(OPCIONES_ESCANDALO), key="noticiero_escandalo")
+    return FiltroHistorial(
+        ronda=None if ronda == TODOS else ronda,
+        equipo=None if equipo == TODOS else equipo,
+        partido=None if partido == TODOS else partido,
+        escandalo=OPCIONES_ESCANDALO[escandalo]
+    )
+
+
+def render(ctx: Contexto) -> None:
+    """Historial como noticias, de la más nueva a la más vieja, de a POR_PAGINA."""
+    estado = ctx.estado
+    st.title("🗞️ Noticiero — Feed Narrativo")
+
+    filtro = _filtros()
+
+    # Pila de cursores: el último es el inicio de la página actual (None = la más nueva)
+    if st.session_state.get("noticiero_filtro") != filtro:
+        st.session_state.noticiero_filtro = filtro
+        st.session_state.noticiero_cursores = [None]
+    cursores = st.session_state.noticiero_cursores
+
+    cursor = cursores[-1]
+    evaluaciones, siguiente = _pagina(filtro, cursor, estado.version if cursor is None else 0)
+
+    if not evaluaciones:
+        card("📭 Aún no hay noticias", "Las evaluaciones aparecerán aquí como noticias.", border_color="#999999")
+    else:
+        # Un solo bloque armado con las cards cacheadas de cada noticia
+        st.markdown("".join(noticia_html(e) for e in evaluaciones), unsafe_allow_html=True)
+
+    # Navegación entre páginas
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        if st.button("⬅️ Más nuevas", disabled=len(cursores) == 1, use_container_width=True):
+            cursores.pop()
+            st.rerun()
+    with col2:
+        if st.button("Más viejas ➡️", disabled=siguiente is None, use_container_width=True):
+            cursores.append(siguiente)
+            st.rerun()
+    with col3:
+        st.caption(f"Página {len(cursores)}")
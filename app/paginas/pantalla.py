@@ -0,0 +1,88 @@
+"""
+Pantalla de resultados (también usada por el Modo Proyector).
+"""
+
+from typing import List, Optional, Tuple
+
+import streamlit as st
+
+from app.paginas import Contexto
+from app.render import (
+    badges_evaluacion_html, card_html, dimensiones_html, escandalo_html, devolucion_html,
+    headline_html, ticker_item_html, filas_ranking, ranking_html
+)
+from app.state import EstadoJuego, obtener_estado
+
+
+# Cada cuántos segundos la Pantalla revisa si hay evaluaciones nuevas
+INTERVALO_PANTALLA_SEG = 1
+
+
+# HTML de la Pantalla para una versión del estado: (estado, versión, fragmentos)
+_vista: Optional[Tuple[EstadoJuego, int, List[str]]] = None
+
+
+def fragmentos_pantalla(estado: EstadoJuego) -> List[str]:
+    """
+    Fragmentos HTML de la Pantalla (ranking, titular, ticker) en orden.
+    
+    Se arman de nuevo solo cuando cambia la versión del estado: en los
+    ticks sin evaluaciones nuevas no se relee nada de los logs.
+    """
+    global _vista
+    version = estado.version
+    vista = _vista
+    if vista is not None and vista[0] is estado and vista[1] == version:
+        return vista[2]
+    
+    evaluaciones = estado.evaluaciones
+    ranking = estado.ranking()
+    if not ranking:
+        fragmentos = [card_html("Aún no hay resultados", "Realicen la primera entrega y evalúen con el GM.", border_color="#999999")]
+    else:
+        # Top 4 Ranking
+        fragmentos = [ranking_html(filas_ranking(ranking[:4]))]
+        
+        # Última evaluación
+        if evaluaciones:
+            ultima = evaluaciones[-1]
+            fragmentos.append(headline_html(f"📰 {ultima.titular}"))
+            
+            # Badges de contexto, dimensiones, escándalo y devolución
+            fragmentos.append(badges_evaluacion_html(ultima))
+            for fragmento in (dimensiones_html(ultima), escandalo_html(ultima), devolucion_html(ultima)):
+                if fragmento:
+                    fragmentos.append(fragmento)
+            
+            # Ticker: últimas 5 evaluaciones
+            if len(evaluaciones) > 1:
+                ticker_html = "".join(ticker_item_html(e) for e in evaluaciones[-5:][::-1])
+                fragmentos.append(card_html("📰 Ticker — Últimas jugadas", ticker_html, border_color="#666666"))
+    
+    # Se guarda con la versión leída al empezar: si cambió mientras tanto, el próximo tick rearma
+    _vista = (estado, version, fragmentos)
+    return fragmentos
+
+
+@st.fragment(run_every=INTERVALO_PANTALLA_SEG)
+def pantalla_en_vivo() -> None:
+    """
+    Ranking, titular y ticker de la Pantalla como fragmento autónomo.
+    
+    Solo se re-ejecuta esta función (no el script completo) y lee el estado
+    compartido, así el proyector ve los resultados de otras sesiones sin que
+    nadie toque su navegador. El HTML se arma una vez por versión del estado
+    (fragmentos_pantalla).
+    """
+    estado = obtener_estado()
+    estado.sincronizar()
+    for fragmento in fragmentos_pantalla(estado):
+        st.markdown(fragmento, unsafe_allow_html=True)
+
+
+def render(ctx: Contexto) -> None:
+    """Título de la Pantalla y el fragmento en vivo."""
+    st.title("Pantalla de Resultados")
+    st.markdown('<div class="small-muted">Modo proyector: ranking, titulares y shocks en vivo.</div>', unsafe_allow_html=True)
+    
+    pantalla_en_vivo()
@@ -0,0 +1,76 @@
+"""
+Ranking acumulado por equipo, con deltas de posición y gráfico.
+"""
+
+import streamlit as st
+
+from app.paginas import Contexto
+from app.render import party_color
+from app.ui import card
+
+
+def calcular_delta_ranking(ranking_actual: list, ranking_previo: list) -> dict:
+    """Calcula deltas de posición entre rankings."""
+    deltas = {}
+    if ranking_previo:
+        # Crear dict de posiciones previas
+        posiciones_previas = {}
+        for i, pos in enumerate(ranking_previo, 1):
+            equipo = pos.get('equipo', '')
+            posiciones_previas[equipo] = i
+        
+        # Calcular deltas
+        for i, pos in enumerate(ranking_actual, 1):
+            equipo = pos.get('equipo', '')
+            pos_prev = posiciones_previas.get(equipo, i)
+            delta = pos_prev - i  # Positivo si subió, negativo si bajó
+            deltas[equipo] = delta
+    return deltas
+
+
+def render(ctx: Contexto) -> None:
+    """Cards por equipo con medalla, delta y total, más el gráfico de barras."""
+    estado = ctx.estado
+    st.title("📊 Ranking Acumulado")
+    
+    ranking = estado.ranking()
+    deltas = calcular_delta_ranking(ranking, st.session_state.ranking_previo) if st.session_state.ranking_previo else {}
+    
+    if not ranking:
+        card("📭 Aún no hay evaluaciones", "Realiza tu primera evaluación en la pantalla 'Juego'.", border_color="#999999")
+    else:
+        # Cards por equipo
+        for i, pos in enumerate(ranking, 1):
+            col_equipo = party_color(pos.get("partido", ""))
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}°"
+            
+            delta = deltas.get(pos.get('equipo', ''), 0)
+            delta_text = ""
+            if delta > 0:
+                delta_text = f'<span style="color: #27AE60; font-weight: 700;">⬆️ +{delta}</span>'
+            elif delta < 0:
+                delta_text = f'<span style="color: #EB5757; font-weight: 700;">⬇️ {delta}</span>'
+            
+            fila_html = f"""
+            <div style="display: flex; justify-content: space-between; align-items: center;">
+                <div>
+                    <span style="font-size: 1.3rem; margin-right: 12px;">{medal}</span>
+                    <strong style="font-size: 1.1rem;">{pos.get('equipo', '')}</strong>
+                    <span class="small-muted">({pos.get('partido', '')})</span>
+                    {delta_text}
+                </div>
+                <div style="text-align: right;">
+                    <div style="font-size: 1.5rem; font-weight: 900; color: {col_equipo};">{pos.get('total_acumulado', 0)}</div>
+                    <span class="small-muted">{pos.get('cantidad_entregas', 0)} entregas</span>
+                </div>
+            </div>
+            """
+            card(f"", fila_html, border_color=col_equipo)
+        
+        # Gráfico
+        st.subheader("📈 Visualización")
+        import pandas as pd  # diferido: pandas suma ~0,3 s al arranque y solo se usa acá
+        df_ranking = pd.DataFrame(ranking)
+        if not df_ranking.empty:
+            chart_data = df_ranking.set_index('equipo')['total_acumulado']
+            st.bar_chart(chart_data)
@@ -0,0 +1,82 @@
+"""
+Rúbrica de evaluación (texto fijo).
+"""
+
+import streamlit as st
+
+from app.paginas import Contexto
+from app.ui import card
+
+
+def render(ctx: Contexto) -> None:
+    """Muestra la rúbrica completa."""
+    st.title("📋 Rúbrica de Evaluación")
+    
+    rubrica_html = """
+    <h3>Dimensiones de Evaluación (0-20 puntos cada una)</h3>
+    <p>Cada entrega es evaluada en 5 dimensiones, cada una con un puntaje de 0 a 20 puntos.<br/>
+    El total máximo sin shock es 100 puntos.</p>
+    
+    <ol style="line-height: 1.8;">
+        <li><strong>Claridad</strong> (0-20)
+            <ul>
+                <li>¿Es claro el mensaje?</li>
+                <li>¿Se entiende qué se propone?</li>
+                <li>¿La comunicación es efectiva?</li>
+            </ul>
+        </li>
+        <li><strong>Estrategia</strong> (0-20)
+            <ul>
+                <li>¿La pieza está bien pensada estratégicamente?</li>
+                <li>¿Apunta al público correcto?</li>
+                <li>¿Tiene coherencia con el contexto?</li>
+            </ul>
+        </li>
+        <li><strong>Credibilidad</strong> (0-20)
+            <ul>
+                <li>¿Genera confianza?</li>
+                <li>¿Es creíble?</li>
+                <li>¿Hay consistencia con el perfil del candidato?</li>
+            </ul>
+        </li>
+        <li><strong>Emoción/Identidad</strong> (0-20)
+            <ul>
+                <li>¿Mueve emocionalmente?</li>
+                <li>¿Conecta con la identidad del público?</li>
+                <li>¿Genera identificación?</li>
+            </ul>
+        </li>
+        <li><strong>Riesgo/Backlash</strong> (0-20)
+            <ul>
+                <li>¿Qué tan arriesgado es?</li>
+                <li>¿Puede generar reacciones negativas?</li>
+                <li><strong>Nota:</strong> Un puntaje ALTO en esta dimensión indica MÁS riesgo (no es positivo)</li>
+            </ul>
+        </li>
+    </ol>
+    
+    <h3>Shock de Opinión Pública (-3 a +3)</h3>
+    <p>Un ajuste pequeño que refleja reacciones inesperadas de la opinión pública y los medios.<br/>
+    Puede ser positivo o negativo, pero siempre debe estar justificado por el contexto.</p>
+    <p><strong>Total Final = Suma de scores (0-100) + Shock (-3 a +3)</strong></p>
+    
+    <h3>Escándalo</h3>
+    <p>Si la entrega contiene elementos problemáticos que puedan generar controversia pública:</p>
+    <ul>
+        <li><strong>Visible:</strong> Sí/No</li>
+        <li><strong>Severidad:</strong> Baja, Media o Alta</li>
+        <li><strong>Motivo:</strong> Breve descripción</li>
+    </ul>
+    
+    <h3>Impacto Político</h3>
+    <p>Evalúa el impacto en 5 dimensiones cualitativas:</p>
+    <ul>
+        <li><strong>Instalación:</strong> Sube / Baja / Se mantiene</li>
+        <li><strong>Persuasión:</strong> Sube / Baja / Se mantiene</li>
+        <li><strong>Movilización:</strong> Sube / Baja / Se mantiene</li>
+        <li><strong>Reputación:</strong> Sube / Baja / Se mantiene</li>
+        <li><strong>Riesgo:</strong> Sube / Baja / Se mantiene</li>
+    </ul>
+    """
+    
+    card("📋 Rúbrica Completa", rubrica_html, border_color="#111111")
@@ -0,0 +1,124 @@
+"""
+Perfilado opcional (cProfile) de reruns de Streamlit y de evaluaciones.
+
+Apagado por defecto: sin JUEGO_PERFILAR=1 ni el interruptor de la página de
+Configuración, perfilar() solo consulta un booleano. Encendido, cada bloque
+perfilado deja un .prof en logs/profiles (se abre con `python -m pstats` o
+snakeviz) y un resumen de las funciones más costosas que muestra la app.
+
+cProfile no admite dos perfiles a la vez, así que se perfila un bloque por
+vez en todo el proceso: una evaluación que corre dentro de un rerun ya
+perfilado queda incluida en el perfil del rerun, y los bloques que coinciden
+con otro perfil en curso (otras sesiones, otros workers) se saltean.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import itertools
+import os
+import pstats
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List
+
+from app import storage
+
+
+# Funciones que se guardan en el resumen de cada perfil
+TOP_N = 15
+
+# Perfiles recientes que se muestran en Configuración
+MAX_RECIENTES = 20
+
+_activo = os.environ.get("JUEGO_PERFILAR", "").lower() in ("1", "true", "si", "sí")
+_en_curso = threading.Lock()
+_numero = itertools.count(1)
+_recientes: deque = deque(maxlen=MAX_RECIENTES)
+
+
+@dataclass
+class Perfil:
+    """Un bloque perfilado: dónde quedó el .prof y sus funciones más costosas."""
+    nombre: str
+    ruta: str
+    segundos: float
+    timestamp: str
+    # [{funcion, llamadas, propio, acumulado}] ordenado por tiempo acumulado
+    top: List[dict] = field(default_factory=list)
+
+
+def activo() -> bool:
+    return _activo
+
+
+def activar(valor: bool) -> None:
+    """Enciende o apaga el perfilado para todo el proceso."""
+    global _activo
+    _activo = bool(valor)
+
+
+def carpeta_perfiles() -> Path:
+    return storage.LOGS_DIR / "profiles"
+
+
+def _top(perfil: cProfile.Profile, n: int) -> List[dict]:
+    estadisticas = pstats.Stats(perfil).stats  # type: ignore[attr-defined]
+    filas = sorted(estadisticas.items(), key=lambda item: item[1][3], reverse=True)[:n]
+    return [
+        {
+            "funcion": f"{func} ({Path(archivo).name}:{linea})" if linea else func,
+            "llamadas": llamadas,
+            "propio": round(propio, 4),
+            "acumulado": round(acumulado, 4),
+        }
+        for (archivo, linea, func), (_, llamadas, propio, acumulado, _) in filas
+    ]
+
+
+@contextmanager
+def perfilar(nombre: str) -> Iterator[None]:
+    """
+    Perfila el bloque si el perfilado está activo y no hay otro perfil en curso.
+
+    Args:
+        nombre: Identifica el bloque en el nombre del archivo (ej. "rerun_Juego")
+    """
+    if not _activo or not _en_curso.acquire(blocking=False):
+        yield
+        return
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    try:
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+    finally:
+        _en_curso.release()
+        _guardar(nombre, perfil, time.perf_counter() - inicio)
+
+
+def _guardar(nombre: str, perfil: cProfile.Profile, segundos: float) -> None:
+    ahora = datetime.now()
+    limpio = re.sub(r"[^\w-]+", "_", nombre).strip("_") or "perfil"
+    ruta = carpeta_perfiles() / f"{ahora:%Y%m%d_%H%M%S}_{limpio}_{os.getpid()}_{next(_numero)}.prof"
+    try:
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        perfil.dump_stats(str(ruta))
+    except OSError as e:
+        print(f"No se pudo guardar el perfil {ruta}: {e}")
+        return
+    _recientes.append(Perfil(nombre, str(ruta), round(segundos, 3), ahora.isoformat(timespec="seconds"), _top(perfil, TOP_N)))
+
+
+def recientes() -> List[Perfil]:
+    """Perfiles de este proceso, del más nuevo al más viejo."""
+    return list(reversed(_recientes))
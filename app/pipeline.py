@@ -0,0 +1,383 @@
+"""
+Pipeline de evaluación sin interfaz: entrega -> prompt -> LLM -> Evaluacion.
+
+Lo comparten la página de Juego, la CLI y el servicio HTTP. Guardar el
+resultado queda a cargo de quien llama (estado compartido o storage).
+"""
+
+from __future__ import annotations
+
+import secrets
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from app import storage
+from app.events import (
+    EQUIPOS_INICIALES, FORMATOS_ENTREGA, OPCIONES_TABLERO, SITUACION_INTERNA_DEFAULT,
+    armar_entrega, formato_sugerido, obtener_evento, validar_entrega
+)
+from app.llm import (
+    TIMEOUT_DEFAULT,
+    ErrorRespuestaLLM,
+    calcular_presupuestos,
+    evaluar_multimuestra,
+    evaluar_prompt,
+    llamar_ollama,
+)
+from app.metricas import DUPLICADOS, ETAPA_SEGUNDOS, EVALUACIONES
+from app.models import Equipo, Evaluacion
+from app.perfiles import perfilar
+from app.prompts import VARIANTE_PROMPT_DEFAULT, construir_prompt
+from app.similitud import Coincidencia, obtener_indice
+from app.tokens import (
+    NUM_CTX_ESCALONES, Calibracion, MedidaPrompt, PromptDemasiadoLargo, calibracion, exceden, medir_prompt, recalibrar
+)
+
+
+ETAPAS = ["Internas", "Nacional"]
+
+
+@dataclass
+class Entrega:
+    """Una entrega validada y lista para armar el prompt."""
+    equipo: Equipo
+    etapa: str
+    ronda: str
+    evento: dict
+    formato: str
+    campos: Dict[str, str]
+    tablero: Dict[str, str]
+    situacion_interna: str = SITUACION_INTERNA_DEFAULT
+    # Número de fila cuando viene de un lote
+    fila: int = 0
+
+    def prompt_completo(self, variante: str = VARIANTE_PROMPT_DEFAULT) -> str:
+        """Prompt de sistema + usuario en la variante pedida (ver prompts.VARIANTES_PROMPT)."""
+        return construir_prompt(
+            variante,
+            etapa=self.etapa,
+            ronda=self.ronda,
+            evento=self.evento,
+            partido=self.equipo.partido,
+            candidato=self.equipo.candidato,
+            perfil=self.equipo.perfil,
+            situacion_interna=self.situacion_interna,
+            entrega_textual=armar_entrega(self.formato, self.campos),
+            tablero=self.tablero,
+            formato=self.formato
+        )
+
+    def secciones(self) -> Dict[str, str]:
+        """Textos del prompt con presupuesto de tokens (ver tokens.PRESUPUESTOS_SECCION)."""
+        return {
+            "situacion_interna": self.situacion_interna,
+            "perfil": self.equipo.perfil,
+            "entrega": armar_entrega(self.formato, self.campos),
+            "evento": self.evento["descripcion"],
+        }
+
+    def identificar(self, evaluacion: Evaluacion) -> Evaluacion:
+        """Pisa la identidad que devolvió el modelo con la de la entrega (no se confía en el eco)."""
+        evaluacion.equipo = evaluacion.candidato = self.equipo.candidato
+        evaluacion.partido = self.equipo.partido
+        evaluacion.etapa, evaluacion.ronda = self.etapa, self.ronda
+        return evaluacion
+
+    def medir(self, modelo: str, num_predict: int, prompt: Optional[str] = None) -> MedidaPrompt:
+        """Tokens estimados del prompt (el de la variante por defecto si no se pasa) y su num_ctx."""
+        return medir_prompt(prompt or self.prompt_completo(), self.secciones(), num_predict, calibracion(modelo))
+
+    def to_dict(self) -> dict:
+        """Forma serializable, la misma que acepta preparar_entrega."""
+        return {
+            "equipo": self.equipo.candidato,
+            "partido": self.equipo.partido,
+            "perfil": self.equipo.perfil,
+            "etapa": self.etapa,
+            "ronda": self.ronda,
+            "formato": self.formato,
+            "tablero": dict(self.tablero),
+            "campos": dict(self.campos),
+            "situacion_interna": self.situacion_interna,
+        }
+
+
+# ============================================================================
+# VALIDACIÓN DE ENTRADA
+# ============================================================================
+
+def _texto(fila: dict, clave: str, anidado: Optional[str] = None) -> str:
+    """Valor de texto de la fila, buscando también dentro de un dict anidado."""
+    valor = fila.get(clave)
+    if valor is None and anidado and isinstance(fila.get(anidado), dict):
+        valor = fila[anidado].get(clave)
+    return "" if valor is None else str(valor).strip()
+
+
+def _buscar_equipo(fila: dict) -> Equipo:
+    """Equipo precargado por nombre o candidato; si la fila trae partido y perfil, uno ad hoc."""
+    nombre = _texto(fila, "equipo")
+    for equipo in EQUIPOS_INICIALES:
+        if nombre.casefold() in (equipo.nombre.casefold(), equipo.candidato.casefold()):
+            return equipo
+    partido, perfil = _texto(fila, "partido"), _texto(fila, "perfil")
+    if nombre and partido and perfil:
+        return Equipo(nombre=nombre, partido=partido, candidato=_texto(fila, "candidato") or nombre, perfil=perfil)
+    raise ValueError(f"Equipo desconocido: '{nombre}' (usar nombre o candidato de un equipo precargado, o dar partido y perfil)")
+
+
+def _resolver_formato(valor: str, evento: dict) -> str:
+    """Formato exacto, por prefijo ("afiche") o el sugerido por el evento si viene vacío."""
+    if not valor:
+        return formato_sugerido(evento["tipo_entrega"])
+    if valor in FORMATOS_ENTREGA:
+        return valor
+    for formato in FORMATOS_ENTREGA:
+        if formato.casefold().startswith(valor.casefold()):
+            return formato
+    raise ValueError(f"Formato desconocido: '{valor}'. Debe ser uno de: {list(FORMATOS_ENTREGA)}")
+
+
+def preparar_entrega(fila: dict, numero: int = 0) -> Entrega:
+    """
+    Valida una entrega en forma de dict (fila de un lote o cuerpo de un pedido).
+
+    El tablero y los campos pueden venir planos o anidados en "tablero" y
+    "campos".
+
+    Las secciones de texto libre se miden con la estimación sin calibrar
+    (conservadora); evaluar_entrega vuelve a medir con la del modelo.
+
+    Raises:
+        ValueError: con todos los problemas de la entrega
+    """
+    equipo = _buscar_equipo(fila)
+    ronda = _texto(fila, "ronda")
+    evento = obtener_evento(ronda)
+    etapa = _texto(fila, "etapa") or ETAPAS[0]
+    if etapa not in ETAPAS:
+        raise ValueError(f"Etapa desconocida: '{etapa}'. Debe ser una de: {ETAPAS}")
+    formato = _resolver_formato(_texto(fila, "formato"), evento)
+
+    errores = []
+    tablero = {}
+    for clave, opciones in OPCIONES_TABLERO.items():
+        valor = _texto(fila, clave, "tablero")
+        coincidencias = [o for o in opciones if o.casefold() == valor.casefold()]
+        if not coincidencias:
+            errores.append(f"'{clave}' debe ser uno de {opciones} (vino '{valor}')")
+        else:
+            tablero[clave] = coincidencias[0]
+
+    campos = {clave: _texto(fila, clave, "campos") for clave in FORMATOS_ENTREGA[formato]["campos"]}
+    errores.extend(validar_entrega(formato, campos))
+    situacion_interna = _texto(fila, "situacion_interna") or SITUACION_INTERNA_DEFAULT
+    errores.extend(exceden({"situacion_interna": situacion_interna, "perfil": equipo.perfil}))
+    if errores:
+        raise ValueError("; ".join(errores))
+
+    return Entrega(
+        equipo=equipo,
+        etapa=etapa,
+        ronda=ronda,
+        evento=evento,
+        formato=formato,
+        campos=campos,
+        tablero=tablero,
+        situacion_interna=situacion_interna,
+        fila=numero
+    )
+
+
+# ============================================================================
+# EVALUACIÓN
+# ============================================================================
+
+def presupuestos_logs() -> dict:
+    """Presupuesto de num_predict por formato aprendido de los logs (recorre todos)."""
+    return calcular_presupuestos(
+        storage.cargar_eval_counts(),
+        {formato: config["presupuesto_tokens"] for formato, config in FORMATOS_ENTREGA.items()}
+    )
+
+
+def buscar_duplicados(entrega: Entrega, juego: str) -> List[Coincidencia]:
+    """
+    Entregas anteriores del mismo juego casi iguales a esta (ver similitud.py).
+
+    Para que un juego encuentre sus entregas, quien evalúa tiene que pasar
+    {"juego": ...} en los metadatos de evaluar_entrega.
+    """
+    coincidencias = obtener_indice().buscar(juego, entrega.campos)
+    if coincidencias:
+        DUPLICADOS.inc(accion="detectada")
+    return coincidencias
+
+
+@dataclass
+class Resultado:
+    """Evaluación lista para guardar, con lo que va al log."""
+    evaluacion: Evaluacion
+    prompt_completo: str
+    respuesta_llm: str
+    metadatos: dict = field(default_factory=dict)
+    # Dispersión entre muestras (solo con más de una)
+    dispersion: Optional[dict] = None
+
+
+def evaluar_entrega(
+    entrega: Entrega,
+    url: str,
+    modelo: str,
+    presupuestos: dict,
+    n_muestras: int = 1,
+    timeout: float = TIMEOUT_DEFAULT,
+    metadatos: Optional[dict] = None,
+    variante_prompt: str = VARIANTE_PROMPT_DEFAULT,
+    opciones: Optional[dict] = None
+) -> Resultado:
+    """
+    Arma el prompt, llama al LLM (una o varias muestras) y devuelve la evaluación.
+
+    `opciones` se suma a las de generación (p. ej. temperature y seed fijos
+    para el golden set de `python -m app.bench golden`).
+
+    Antes de llamar se estiman los tokens del prompt (tokens.py): si una
+    sección se pasa de su presupuesto o el total no entra en el contexto
+    máximo no se llama al LLM; si entra, se pide el num_ctx más chico que
+    alcanza. Si la respuesta no se pudo leer ni reparar, el intento se
+    guarda en logs/fallos_*.jsonl antes de relanzar el error. Con el
+    perfilado activo (perfiles.py) la evaluación deja su propio .prof.
+
+    Raises:
+        requests.exceptions.RequestException: Error de conexión con Ollama
+        PromptDemasiadoLargo: El prompt no entra en sus presupuestos (ValueError)
+        ValueError: Respuesta inválida del LLM (ErrorRespuestaLLM)
+    """
+    with perfilar(f"evaluacion_{entrega.ronda}"):
+        num_predict = presupuestos[entrega.formato]["num_predict"]
+        with ETAPA_SEGUNDOS.medir(etapa="prompt"):
+            prompt_completo = entrega.prompt_completo(variante_prompt)
+            medida = entrega.medir(modelo, num_predict, prompt_completo)
+        errores = medida.errores()
+        if errores:
+            EVALUACIONES.inc(resultado="prompt_excedido")
+            raise PromptDemasiadoLargo("; ".join(errores))
+        opciones = {"num_predict": num_predict, "num_ctx": medida.num_ctx, **(opciones or {})}
+        datos = {
+            "formato": entrega.formato, "num_predict": num_predict, "variante_prompt": variante_prompt,
+            **medida.resumen(), "entrega": entrega.to_dict(), **(metadatos or {})
+        }
+        try:
+            if n_muestras > 1:
+                multimuestra = evaluar_multimuestra(url, modelo, prompt_completo, n=n_muestras, opciones=opciones, timeout=timeout)
+                datos["multimuestra"] = multimuestra.resumen()
+                EVALUACIONES.inc(resultado="ok")
+                return Resultado(entrega.identificar(multimuestra.evaluacion), prompt_completo, multimuestra.respuestas[0], datos, multimuestra.dispersion)
+            resultado = evaluar_prompt(url, modelo, prompt_completo, opciones=opciones, timeout=timeout)
+            datos["generacion"] = resultado.resumen()
+            EVALUACIONES.inc(resultado="reparada" if resultado.reparacion else "ok")
+            return Resultado(entrega.identificar(resultado.evaluacion), prompt_completo, resultado.respuesta_llm, datos)
+        except ErrorRespuestaLLM as e:
+            EVALUACIONES.inc(resultado="respuesta_invalida")
+            if e.costos:
+                storage.guardar_fallo(
+                    prompt_completo=prompt_completo,
+                    respuesta_llm=e.respuesta_llm,
+                    error=str(e),
+                    modelo_usado=modelo,
+                    costos=e.costos,
+                    formato=entrega.formato,
+                    num_predict=num_predict
+                )
+            raise
+        except requests.exceptions.RequestException:
+            EVALUACIONES.inc(resultado="error_conexion")
+            raise
+
+
+def reusar_evaluacion(
+    entrega: Entrega,
+    coincidencia: Coincidencia,
+    metadatos: Optional[dict] = None,
+    variante_prompt: str = VARIANTE_PROMPT_DEFAULT
+) -> Resultado:
+    """
+    Resultado con la evaluación de una entrega anterior casi idéntica, sin llamar al LLM.
+
+    El registro guarda de qué entrega se tomó ("reusada_de") y no lleva
+    respuesta del LLM.
+
+    Raises:
+        ValueError: La evaluación anterior no vale para esta entrega (otro equipo, ronda, tablero o texto)
+    """
+    if not coincidencia.reusable(entrega.to_dict()):
+        raise ValueError("La evaluación anterior no corresponde a esta entrega (cambió el equipo, la ronda, el tablero o el texto)")
+    datos = {
+        "formato": entrega.formato, "variante_prompt": variante_prompt, "entrega": entrega.to_dict(),
+        "reusada_de": coincidencia.resumen(), **(metadatos or {})
+    }
+    DUPLICADOS.inc(accion="reusada")
+    EVALUACIONES.inc(resultado="reusada")
+    return Resultado(Evaluacion.from_dict(coincidencia.evaluacion), entrega.prompt_completo(variante_prompt), "", datos)
+
+
+def contar_tokens_prompt(url: str, modelo: str, prompt: str, timeout: float = TIMEOUT_DEFAULT) -> Tuple[int, int]:
+    """
+    Tokens de un prompt según Ollama (prompt_eval_count), sin generar respuesta.
+
+    El prompt va precedido por una marca al azar porque Ollama reutiliza el
+    prefijo que ya tiene en caché (el prompt de sistema es el mismo en
+    todos, o el prompt entero si se acaba de evaluar) y solo contaría los
+    tokens nuevos. La marca suma los mismos pocos tokens a cualquier prompt.
+    Se pide el num_ctx que alcanza según medir_prompt: con el contexto por
+    defecto Ollama trunca los prompts largos y los cuenta cortados.
+
+    Returns:
+        (caracteres, tokens) del prompt enviado, marca incluida
+
+    Raises:
+        requests.exceptions.RequestException: Ollama no respondió
+    """
+    marcado = f"{secrets.token_hex(4)}\n{prompt}"
+    medida = medir_prompt(marcado, {}, 1, calibracion(modelo))
+    opciones = {"num_predict": 1, "num_ctx": medida.num_ctx or NUM_CTX_ESCALONES[-1]}
+    tokens = llamar_ollama(url, modelo, marcado, opciones, timeout).get("prompt_eval_count", 0)
+    return len(marcado), tokens
+
+
+def calibrar_tokens(url: str, modelo: str, limite: int = 20, timeout: float = TIMEOUT_DEFAULT) -> Tuple[int, Calibracion]:
+    """
+    Cuenta con Ollama los tokens de los prompts más recientes de los logs y guarda las mediciones.
+
+    Las evaluaciones normales no sirven para calibrar: el corte temprano
+    del stream cierra la conexión antes del fragmento final de Ollama, que
+    es el que trae prompt_eval_count. Se cuentan con contar_tokens_prompt.
+
+    Returns:
+        (prompts medidos, calibración del modelo ya releída)
+
+    Raises:
+        ValueError: No hay prompts en los logs o Ollama no contó ninguno
+    """
+    prompts = storage.cargar_prompts()[-limite:]
+    if not prompts:
+        raise ValueError(f"No hay prompts en {storage.LOGS_DIR}: evaluá algunas entregas primero")
+
+    observaciones = []
+    for registro in prompts:
+        try:
+            caracteres, tokens = contar_tokens_prompt(url, modelo, registro["prompt_completo"], timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"Error al medir el prompt {registro['clave']}: {e}")
+            continue
+        if tokens:
+            observaciones.append((caracteres, tokens))
+
+    if not observaciones:
+        raise ValueError("Ollama no informó prompt_eval_count para ningún prompt")
+    storage.guardar_calibracion_tokens(modelo, observaciones)
+    recalibrar()
+    return len(observaciones), calibracion(modelo)
@@ -0,0 +1,279 @@
+"""
+Fragmentos HTML de la interfaz (cards, badges, barras de score).
+
+Streamlit re-ejecuta el script completo en cada interacción, así que las
+pantallas de Noticiero y Pantalla reconstruían el mismo HTML una y otra vez.
+Acá los fragmentos se construyen una sola vez: los que dependen solo de
+valores simples usan lru_cache y los que dependen de una evaluación se
+memoizan por identidad del objeto (las evaluaciones no se modifican después
+de agregarse a la sesión, y EvaluacionBatch devuelve el mismo objeto para un
+registro ya materializado).
+"""
+
+from collections import OrderedDict, namedtuple
+from functools import lru_cache, wraps
+from typing import Callable, Iterable, Tuple
+
+from app.metricas import registrar_caches
+
+
+# Colores de partidos
+COLORES_PARTIDO = {
+    "Partido Progresista": "#8B1E3F",  # borgoña
+    "Partido Conservador": "#0033A0",   # azul
+}
+
+COLORES_SEVERIDAD = {
+    "Baja": "#F2C94C",
+    "Media": "#F2994A",
+    "Alta": "#EB5757"
+}
+
+# Cantidad de evaluaciones distintas cuyo HTML se mantiene en memoria
+MAX_FRAGMENTOS = 512
+
+# Mismos campos que cache_info() de lru_cache
+_InfoCache = namedtuple("_InfoCache", "hits misses maxsize currsize")
+
+
+def _por_identidad(func: Callable) -> Callable:
+    """
+    Memoiza una función de un solo argumento según la identidad del objeto.
+
+    Se guarda una referencia al objeto junto al resultado para que su id no
+    pueda reutilizarse mientras la entrada siga en el caché.
+    """
+    cache: "OrderedDict[int, tuple]" = OrderedDict()
+    # [aciertos, fallos]
+    conteo = [0, 0]
+
+    @wraps(func)
+    def envoltura(obj):
+        clave = id(obj)
+        entrada = cache.get(clave)
+        if entrada is not None and entrada[0] is obj:
+            cache.move_to_end(clave)
+            conteo[0] += 1
+            return entrada[1]
+        conteo[1] += 1
+        html = func(obj)
+        cache[clave] = (obj, html)
+        if len(cache) > MAX_FRAGMENTOS:
+            cache.popitem(last=False)
+        return html
+
+    envoltura.cache_clear = cache.clear
+    envoltura.cache_info = lambda: _InfoCache(conteo[0], conteo[1], MAX_FRAGMENTOS, len(cache))
+    return envoltura
+
+
+# ============================================================================
+# HELPERS BÁSICOS
+# ============================================================================
+
+def party_color(partido: str) -> str:
+    """Retorna el color del partido o gris por defecto."""
+    return COLORES_PARTIDO.get(partido, "#444444")
+
+
+def severity_color(severidad: str) -> str:
+    """Retorna color según severidad de escándalo."""
+    return COLORES_SEVERIDAD.get(severidad, "#999999")
+
+
+def shock_color(shock: int) -> str:
+    """Retorna color según el signo del shock de opinión pública."""
+    return "#27AE60" if shock > 0 else "#EB5757" if shock < 0 else "#999999"
+
+
+def total_color(total: int) -> str:
+    """Retorna color según el total final de la evaluación."""
+    return "#27AE60" if total >= 80 else "#F2994A" if total >= 60 else "#EB5757"
+
+
+@lru_cache(maxsize=1024)
+def badge(text: str, color: str = "#444444") -> str:
+    """Retorna HTML de un badge."""
+    return f'<span class="co-badge" style="border-color:{color};">{text}</span>'
+
+
+@lru_cache(maxsize=256)
+def score_bar_html(label: str, value: int, max_value: int = 20) -> str:
+    """Retorna HTML de una barra horizontal de score."""
+    percentage = (value / max_value) * 100
+    color = "#27AE60" if value >= 15 else "#F2994A" if value >= 10 else "#EB5757"
+    return f"""
+    <div style="margin-bottom: 8px;">
+      <div style="display: flex; justify-content: space-between; margin-bottom: 4px;">
+        <span style="font-weight: 600; font-size: 0.9rem;">{label}</span>
+        <span style="font-weight: 800; color: {color};">{value}/{max_value}</span>
+      </div>
+      <div style="background: rgba(0,0,0,0.06); border-radius: 8px; height: 8px; overflow: hidden;">
+        <div style="background: {color}; width: {percentage}%; height: 100%; transition: width 0.3s;"></div>
+      </div>
+    </div>
+    """
+
+
+@lru_cache(maxsize=1024)
+def card_html(title: str, body_html: str, border_color: str = "#DDDDDD", icon: str = "") -> str:
+    """Retorna HTML de una card con título, cuerpo y borde izquierdo coloreado."""
+    return f"""
+        <div class="co-card" style="border-left: 8px solid {border_color};">
+          <div class="co-card-title">{icon} {title}</div>
+          <div class="co-card-body">{body_html}</div>
+        </div>
+        """
+
+
+def headline_html(text: str) -> str:
+    """Retorna HTML de un titular grande estilo diario."""
+    return f'<div class="co-headline">{text}</div>'
+
+
+# ============================================================================
+# FRAGMENTOS POR EVALUACIÓN
+# ============================================================================
+
+@_por_identidad
+def badges_evaluacion_html(ev) -> str:
+    """Badges de contexto: candidato, etapa/ronda, shock y total."""
+    return f"""
+    {badge(f"👤 {ev.candidato}", party_color(ev.partido))}
+    {badge(f"🗳️ {ev.etapa} — {ev.ronda}")}
+    {badge(f"🎲 Shock: {ev.shock_opinion_publica:+d}", shock_color(ev.shock_opinion_publica))}
+    {badge(f"✅ Total: {ev.total_final}", total_color(ev.total_final))}
+    """
+
+
+@_por_identidad
+def dimensiones_html(ev) -> str:
+    """Card con las barras de las cinco dimensiones de score."""
+    scores_html = (
+        score_bar_html("Claridad", ev.scores.claridad)
+        + score_bar_html("Estrategia", ev.scores.estrategia)
+        + score_bar_html("Credibilidad", ev.scores.credibilidad)
+        + score_bar_html("Emoción/Identidad", ev.scores.emocion_identidad)
+        + score_bar_html("Riesgo/Backlash", ev.scores.riesgo_backlash)
+    )
+    return card_html("📊 Dimensiones", scores_html, border_color=party_color(ev.partido))
+
+
+@_por_identidad
+def escandalo_html(ev) -> str:
+    """Card del escándalo (vacía si no es visible)."""
+    if not ev.escandalo.visible:
+        return ""
+    sev = ev.escandalo.severidad
+    return card_html("🚨 Escándalo", f"<b>{sev}</b>: {ev.escandalo.motivo}", border_color=severity_color(sev))
+
+
+@_por_identidad
+def devolucion_html(ev) -> str:
+    """Card con la devolución de la ciudadanía."""
+    return card_html(
+        "💬 Devolución de la ciudadanía",
+        ev.devolucion_gm.replace("\n", "<br/>"),
+        border_color=party_color(ev.partido)
+    )
+
+
+@_por_identidad
+def noticia_html(ev) -> str:
+    """Card del feed del Noticiero para una evaluación."""
+    col_noticia = party_color(ev.partido)
+
+    # Línea de contexto
+    contexto_html = f"""
+            <div style="margin-bottom: 8px;">
+                {badge(f"{ev.etapa} — {ev.ronda}", col_noticia)}
+                <strong>{ev.candidato}</strong>
+                <span class="small-muted">({ev.partido})</span>
+            </div>
+            """
+
+    # Titular
+    titular_html = f'<div style="font-weight: 800; font-size: 1.1rem; margin-bottom: 8px;">{ev.titular}</div>'
+
+    # Total y shock
+    shock = ev.shock_opinion_publica
+    total_html = f"""
+            <div style="margin-top: 8px;">
+                <span class="co-pill">{ev.total_final} pts</span>
+                {f'<span style="color: {shock_color(shock)}; font-weight: 700; margin-left: 8px;">Shock: {shock:+d}</span>' if shock != 0 else ''}
+            </div>
+            """
+
+    # Escándalo
+    escandalo = ""
+    if ev.escandalo.visible:
+        sev_color = severity_color(ev.escandalo.severidad)
+        escandalo = f'<div style="margin-top: 8px; padding: 8px; background: rgba(235, 87, 87, 0.1); border-radius: 8px; border-left: 4px solid {sev_color};"><strong>🚨 Escándalo ({ev.escandalo.severidad}):</strong> {ev.escandalo.motivo}</div>'
+
+    return card_html("", contexto_html + titular_html + total_html + escandalo, border_color=col_noticia)
+
+
+@_por_identidad
+def ticker_item_html(ev) -> str:
+    """Línea del ticker de últimas jugadas en la Pantalla."""
+    shock = ev.shock_opinion_publica
+    return f"""
+                <div style="padding: 8px 0; border-bottom: 1px solid rgba(0,0,0,0.05);">
+                    <div style="display: flex; justify-content: space-between; align-items: center;">
+                        <div>
+                            {badge(f"{ev.etapa} — {ev.ronda}", party_color(ev.partido))}
+                            <strong>{ev.candidato}</strong>
+                            <span class="small-muted">({ev.partido})</span>
+                        </div>
+                        <div>
+                            <span class="co-pill">{ev.total_final} pts</span>
+                            {f'<span style="color: {shock_color(shock)}; font-weight: 700; margin-left: 8px;">{shock:+d}</span>' if shock != 0 else ''}
+                        </div>
+                    </div>
+                    <div style="margin-top: 4px; font-size: 0.9rem; color: #555;">{ev.titular[:80]}...</div>
+                </div>
+                """
+
+
+# ============================================================================
+# RANKING
+# ============================================================================
+
+@lru_cache(maxsize=256)
+def fila_ranking_html(posicion: int, equipo: str, partido: str, total: int) -> str:
+    """Fila del ranking de la Pantalla (medalla, equipo, partido y puntos)."""
+    medal = "🥇" if posicion == 1 else "🥈" if posicion == 2 else "🥉" if posicion == 3 else "🎯"
+    return f"""
+        <div style="display:flex; justify-content:space-between; align-items:center; padding:12px 0; border-bottom:1px solid rgba(0,0,0,0.06);">
+          <div>
+            {badge(f"{medal} {posicion}°", party_color(partido))}
+            <span style="font-weight:900; font-size:1.1rem;">{equipo}</span>
+            <span class="small-muted">({partido})</span>
+          </div>
+          <div><span class="co-pill">{total} pts</span></div>
+        </div>
+        """
+
+
+def filas_ranking(ranking: Iterable[dict]) -> Tuple[tuple, ...]:
+    """Convierte el ranking en una tupla hashable de filas (posición, equipo, partido, total)."""
+    return tuple(
+        (i, pos.get("equipo", ""), pos.get("partido", ""), pos.get("total_acumulado", 0))
+        for i, pos in enumerate(ranking, 1)
+    )
+
+
+@lru_cache(maxsize=64)
+def ranking_html(filas: Tuple[tuple, ...]) -> str:
+    """Card del ranking armada a partir de filas cacheadas."""
+    cuerpo = "".join(fila_ranking_html(*fila) for fila in filas)
+    return card_html("📊 Ranking Acumulado (Top 4)", cuerpo, border_color="#111111")
+
+
+registrar_caches("render", {
+    funcion.__name__: funcion
+    for funcion in (
+        badge, score_bar_html, card_html, badges_evaluacion_html, dimensiones_html, escandalo_html,
+        devolucion_html, noticia_html, ticker_item_html, fila_ranking_html, ranking_html
+    )
+})
@@ -0,0 +1,238 @@
+"""
+Reparto de evaluaciones entre varios servidores Ollama.
+
+Con un laboratorio de máquinas, `url_ollama` puede ser una lista de
+endpoints separados por coma. El router revisa cada uno con /api/tags
+(modelos instalados) y /api/ps (modelos cargados en memoria) y manda cada
+llamada al endpoint sano con menos llamadas en curso, prefiriendo los que
+ya tienen el modelo cargado. Si un endpoint no se puede conectar o responde
+5xx, se marca caído y la llamada pasa al siguiente; si responde 404 (no
+tiene el modelo) pasa al siguiente sin marcarlo caído. Un timeout de
+lectura no se reintenta: la generación sigue corriendo en ese endpoint y
+repetirla en otro sumaría carga y esperas de varios minutos.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+
+
+# Cada cuánto (segundos) se vuelve a revisar un endpoint sano
+INTERVALO_SALUD = 10.0
+
+# Cuánto se deja de lado un endpoint caído antes de volver a probarlo
+ESPERA_CAIDO = 30.0
+
+TIMEOUT_SALUD = 2.0
+
+T = TypeVar("T")
+
+# Sesión propia para los chequeos (cortos) de salud
+_sesion = requests.Session()
+
+
+def _nombre_modelo(nombre: str) -> str:
+    """Ollama lista "llama2" como "llama2:latest"."""
+    return nombre if ":" in nombre else f"{nombre}:latest"
+
+
+def _tipo_fallo(e: requests.exceptions.RequestException) -> str:
+    """
+    Qué hacer con un error de un endpoint.
+
+    Returns:
+        "caido" (no se pudo conectar o 5xx: se marca caído y se prueba el
+        siguiente), "sin_modelo" (404: se prueba el siguiente) o "final"
+        (se propaga: timeout de lectura, corte a mitad del stream, 4xx)
+    """
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return "caido"
+    if isinstance(e, requests.exceptions.Timeout):
+        return "final"
+    if isinstance(e, requests.exceptions.HTTPError):
+        estado = e.response.status_code if e.response is not None else 0
+        if estado == 404:
+            return "sin_modelo"
+        return "caido" if estado >= 500 else "final"
+    # requests adjunta el pedido a los errores de conexión previos a la
+    # respuesta; los del stream ya empezado (p. ej. un timeout de lectura) no lo traen
+    if isinstance(e, requests.exceptions.ConnectionError) and e.request is not None:
+        return "caido"
+    return "final"
+
+
+@dataclass
+class Endpoint:
+    """Un servidor Ollama con su salud y sus contadores."""
+    url: str
+    sano: bool = True
+    instalados: FrozenSet[str] = frozenset()
+    cargados: FrozenSet[str] = frozenset()
+    revisado: float = 0.0
+    en_curso: int = 0
+    llamadas: int = 0
+    errores: int = 0
+    segundos: float = 0.0
+    ultimo_error: str = ""
+
+    @property
+    def base(self) -> str:
+        """Raíz del servidor (http://host:puerto) para /api/tags y /api/ps."""
+        partes = urlsplit(self.url)
+        return f"{partes.scheme}://{partes.netloc}"
+
+    def resumen(self) -> dict:
+        """Estadísticas serializables del endpoint."""
+        return {
+            "url": self.url,
+            "sano": self.sano,
+            "en_curso": self.en_curso,
+            "llamadas": self.llamadas,
+            "errores": self.errores,
+            "segundos_promedio": round(self.segundos / self.llamadas, 3) if self.llamadas else 0.0,
+            "cargados": sorted(self.cargados),
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+class RouterOllama:
+    """Elige endpoint por llamada y reintenta en otro si el elegido falla."""
+
+    def __init__(self, urls: List[str]):
+        self.endpoints = [Endpoint(url) for url in urls]
+        self._lock = threading.Lock()
+
+    def revisar(self, endpoint: Endpoint) -> bool:
+        """Consulta /api/tags y /api/ps del endpoint y actualiza su salud."""
+        try:
+            tags = _sesion.get(f"{endpoint.base}/api/tags", timeout=TIMEOUT_SALUD)
+            tags.raise_for_status()
+            ps = _sesion.get(f"{endpoint.base}/api/ps", timeout=TIMEOUT_SALUD)
+            ps.raise_for_status()
+            instalados = frozenset(_nombre_modelo(m["name"]) for m in tags.json().get("models", []))
+            cargados = frozenset(_nombre_modelo(m["name"]) for m in ps.json().get("models", []))
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            with self._lock:
+                endpoint.sano, endpoint.ultimo_error = False, str(e)
+                endpoint.revisado = time.monotonic()
+            return False
+        with self._lock:
+            endpoint.sano, endpoint.instalados, endpoint.cargados = True, instalados, cargados
+            endpoint.revisado = time.monotonic()
+        return True
+
+    def revisar_todos(self) -> List[dict]:
+        """Revisa todos los endpoints y devuelve sus estadísticas."""
+        for endpoint in self.endpoints:
+            self.revisar(endpoint)
+        return self.estadisticas()
+
+    def candidatos(self, modelo: str) -> List[Endpoint]:
+        """
+        Endpoints en orden de preferencia para `modelo`.
+
+        Primero los sanos que ya tienen el modelo cargado, después los que lo
+        tienen instalado y el resto; dentro de cada grupo, el de menos
+        llamadas en curso. Los caídos van al final (si no queda otro, se prueban igual).
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            # Se marcan como revisados antes de salir del lock: un solo hilo hace cada chequeo
+            vencidos = [
+                e for e in self.endpoints
+                if ahora - e.revisado >= (INTERVALO_SALUD if e.sano else ESPERA_CAIDO)
+            ]
+            for endpoint in vencidos:
+                endpoint.revisado = ahora
+        for endpoint in vencidos:
+            self.revisar(endpoint)
+
+        modelo = _nombre_modelo(modelo)
+        with self._lock:
+            return sorted(self.endpoints, key=lambda e: (
+                not e.sano,
+                modelo not in e.cargados,
+                modelo not in e.instalados,
+                e.en_curso,
+                e.llamadas,
+            ))
+
+    def ejecutar(self, modelo: str, llamada: Callable[[str], T]) -> T:
+        """
+        Ejecuta `llamada(url)` en el mejor endpoint, pasando al siguiente si falla.
+
+        Solo cambian de endpoint los errores de conexión, las respuestas 5xx
+        (el endpoint queda caído) y los 404 de un modelo que ese endpoint no
+        tiene (se saca de sus instalados). Los timeouts de lectura, los cortes
+        a mitad del stream y un JSON inválido del modelo se propagan tal cual.
+
+        Raises:
+            requests.exceptions.RequestException: Si falló sin reintento o fallaron todos los endpoints
+        """
+        ultimo_error: Optional[Exception] = None
+        for endpoint in self.candidatos(modelo):
+            with self._lock:
+                endpoint.en_curso += 1
+            inicio = time.perf_counter()
+            try:
+                resultado = llamada(endpoint.url)
+            except requests.exceptions.RequestException as e:
+                ultimo_error = e
+                fallo = _tipo_fallo(e)
+                with self._lock:
+                    endpoint.errores += 1
+                    endpoint.ultimo_error = str(e)
+                    if fallo == "caido":
+                        endpoint.sano = False
+                        endpoint.revisado = time.monotonic()
+                    elif fallo == "sin_modelo":
+                        endpoint.instalados = endpoint.instalados - {_nombre_modelo(modelo)}
+                        endpoint.cargados = endpoint.cargados - {_nombre_modelo(modelo)}
+                if fallo == "final":
+                    raise
+                continue
+            finally:
+                with self._lock:
+                    endpoint.en_curso -= 1
+            with self._lock:
+                endpoint.llamadas += 1
+                endpoint.segundos += time.perf_counter() - inicio
+                endpoint.cargados = endpoint.cargados | {_nombre_modelo(modelo)}
+            return resultado
+        raise ultimo_error  # type: ignore[misc]
+
+    def estadisticas(self) -> List[dict]:
+        """Estadísticas por endpoint, en el orden en que se configuraron."""
+        with self._lock:
+            return [e.resumen() for e in self.endpoints]
+
+
+_routers: Dict[str, RouterOllama] = {}
+_routers_lock = threading.Lock()
+
+
+def separar_urls(url: str) -> List[str]:
+    """Endpoints de una URL de configuración ("a, b, c" -> ["a", "b", "c"])."""
+    return [u.strip() for u in url.split(",") if u.strip()]
+
+
+def obtener_router(url: str) -> Optional[RouterOllama]:
+    """
+    Router compartido para una lista de endpoints separados por coma.
+
+    Con un solo endpoint retorna None: la llamada va directo, como siempre.
+    """
+    urls = separar_urls(url)
+    if len(urls) < 2:
+        return None
+    clave = ",".join(urls)
+    with _routers_lock:
+        if clave not in _routers:
+            _routers[clave] = RouterOllama(urls)
+        return _routers[clave]
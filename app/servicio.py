@@ -0,0 +1,363 @@
+"""
+Servicio HTTP de evaluación, separado de Streamlit.
+
+Uso:
+    python -m app.servicio --puerto 8600 --workers 2
+
+Corre el pipeline de evaluación (prompt, LLM, parseo, guardado) con su
+propio pool de workers detrás de la cola justa de turnos.py, así varios
+frentes (la app de Streamlit, el proyector, la CLI) comparten un único
+backend. La API es asíncrona: el pedido devuelve un id y el resultado se
+consulta o se recibe por streaming.
+
+    POST /evaluaciones        entrega (mismo formato que la CLI) -> 202 {"id", ...}
+    GET  /evaluaciones/<id>   estado del trabajo (en_cola, evaluando, lista, error)
+    GET  /eventos?desde=ID    evaluaciones posteriores a la ID, en NDJSON, sin cortar
+    GET  /ranking             ranking acumulado
+    GET  /salud               cola y endpoints de Ollama
+    GET  /metrics             métricas en formato de Prometheus (metricas.py)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from app import storage
+from app.llm import MAX_MUESTRAS, MODELO_DEFAULT, TIMEOUT_DEFAULT, URL_OLLAMA_DEFAULT
+from app.metricas import REGISTRO
+from app.pipeline import buscar_duplicados, evaluar_entrega, preparar_entrega, presupuestos_logs, reusar_evaluacion
+from app.prompts import VARIANTE_PROMPT_DEFAULT, VARIANTES_PROMPT
+from app.router import obtener_router
+from app.state import EstadoJuego
+from app.turnos import ColaLlena, Planificador
+
+
+PUERTO_DEFAULT = 8600
+
+# Trabajos terminados que se recuerdan para consultar su estado
+MAX_TRABAJOS = 1000
+
+# Cada cuánto (segundos) /eventos manda una línea vacía para detectar clientes que se fueron
+LATIDO_EVENTOS = 15.0
+
+
+@dataclass
+class Trabajo:
+    """Una evaluación pedida al servicio."""
+    id: str
+    juego: str
+    equipo: str
+    estado: str = "en_cola"
+    posicion: Optional[int] = None
+    creado: float = field(default_factory=time.time)
+    evaluacion: Optional[dict] = None
+    log_file: Optional[str] = None
+    error: Optional[str] = None
+    # "conexion" (Ollama no respondió) o "respuesta" (JSON inválido del LLM)
+    tipo_error: Optional[str] = None
+    respuesta_llm: Optional[str] = None
+    dispersion: Optional[dict] = None
+    # Entregas anteriores del juego casi iguales (para avisar al docente)
+    duplicados: List[dict] = field(default_factory=list)
+    # True si se tomó la evaluación de un duplicado en lugar de llamar al LLM
+    reusada: bool = False
+
+
+class Servicio:
+    """Recibe entregas, las evalúa en segundo plano y guarda en el estado compartido."""
+
+    def __init__(
+        self,
+        estado: EstadoJuego,
+        planificador: Planificador,
+        url: str = URL_OLLAMA_DEFAULT,
+        modelo: str = MODELO_DEFAULT,
+        timeout: float = TIMEOUT_DEFAULT
+    ):
+        self.estado = estado
+        self.planificador = planificador
+        self.url = url
+        self.modelo = modelo
+        self.timeout = timeout
+        self._trabajos: OrderedDict[str, Trabajo] = OrderedDict()
+        self._activos = 0
+        self._lock = threading.Lock()
+        # Cada trabajo aceptado tiene un hilo esperando turno o evaluando
+        self._capacidad = planificador.max_concurrentes + planificador.max_en_cola
+        self._pool = ThreadPoolExecutor(max_workers=self._capacidad, thread_name_prefix="evaluacion")
+        self._presupuestos: Optional[dict] = None
+
+    def presupuestos(self) -> dict:
+        """Presupuestos de num_predict, calculados una vez por proceso."""
+        if self._presupuestos is None:
+            self._presupuestos = presupuestos_logs()
+        return self._presupuestos
+
+    def enviar(self, datos: dict) -> Trabajo:
+        """
+        Valida la entrega y la encola.
+
+        Raises:
+            ValueError: Entrega inválida
+            ColaLlena: Servicio saturado
+        """
+        entrega = preparar_entrega(datos)
+        modelo = str(datos.get("modelo") or self.modelo)
+        muestras = max(1, min(int(datos.get("muestras") or 1), MAX_MUESTRAS))
+        variante = str(datos.get("prompt") or VARIANTE_PROMPT_DEFAULT)
+        if variante not in VARIANTES_PROMPT:
+            raise ValueError(f"Variante de prompt desconocida: '{variante}'. Debe ser una de: {list(VARIANTES_PROMPT)}")
+        duplicados = str(datos.get("duplicados") or "avisar")
+        if duplicados not in ("avisar", "reusar"):
+            raise ValueError(f"'duplicados' debe ser 'avisar' o 'reusar' (vino '{duplicados}')")
+        trabajo = Trabajo(id=uuid.uuid4().hex[:12], juego=str(datos.get("juego") or "servicio"), equipo=entrega.equipo.candidato)
+        with self._lock:
+            if self._activos >= self._capacidad:
+                raise ColaLlena(f"Hay {self._activos} evaluaciones en curso o esperando. Probá de nuevo en un momento.")
+            self._activos += 1
+            self._trabajos[trabajo.id] = trabajo
+            while len(self._trabajos) > MAX_TRABAJOS:
+                viejo = next(iter(self._trabajos.values()))
+                if viejo.estado in ("en_cola", "evaluando"):
+                    break
+                self._trabajos.popitem(last=False)
+        self._pool.submit(self._ejecutar, trabajo, entrega, modelo, muestras, variante, duplicados == "reusar")
+        return trabajo
+
+    def _ejecutar(self, trabajo: Trabajo, entrega, modelo: str, muestras: int, variante: str, reusar: bool) -> None:
+        try:
+            metadatos = {"origen": "servicio", "juego": trabajo.juego}
+            coincidencias = buscar_duplicados(entrega, trabajo.juego)
+            trabajo.duplicados = [c.resumen() for c in coincidencias]
+            reusable = next((c for c in coincidencias if c.reusable(entrega.to_dict())), None) if reusar else None
+            if reusable is not None:
+                # Sin LLM de por medio no hace falta turno en la cola
+                resultado = reusar_evaluacion(entrega, reusable, metadatos, variante)
+                trabajo.reusada = True
+            else:
+                with self.planificador.turno(trabajo.juego, trabajo.equipo, al_esperar=lambda p: setattr(trabajo, "posicion", p)):
+                    trabajo.estado, trabajo.posicion = "evaluando", None
+                    resultado = evaluar_entrega(
+                        entrega, self.url, modelo, self.presupuestos(),
+                        n_muestras=muestras, timeout=self.timeout, metadatos=metadatos,
+                        variante_prompt=variante
+                    )
+            log_file = self.estado.agregar(
+                evaluacion=resultado.evaluacion,
+                prompt_completo=resultado.prompt_completo,
+                respuesta_llm=resultado.respuesta_llm,
+                modelo_usado=modelo,
+                metadatos=resultado.metadatos
+            )
+            # Ruta absoluta: el cliente la compara con su carpeta de logs (EstadoJuego.incorporar)
+            trabajo.log_file = str(Path(log_file).resolve())
+            trabajo.evaluacion = resultado.evaluacion.to_dict()
+            trabajo.dispersion = resultado.dispersion
+            trabajo.estado = "lista"
+        except ColaLlena as e:
+            trabajo.estado, trabajo.error, trabajo.tipo_error = "error", str(e), "cola"
+        except requests.exceptions.RequestException as e:
+            trabajo.estado, trabajo.error, trabajo.tipo_error = "error", str(e), "conexion"
+        except ValueError as e:
+            trabajo.estado, trabajo.error, trabajo.tipo_error = "error", str(e), "respuesta"
+            trabajo.respuesta_llm = getattr(e, "respuesta_llm", None)
+        except Exception as e:
+            print(f"Error inesperado en el trabajo {trabajo.id}: {e}")
+            trabajo.estado, trabajo.error, trabajo.tipo_error = "error", str(e), "interno"
+        finally:
+            with self._lock:
+                self._activos -= 1
+
+    def trabajo(self, id_trabajo: str) -> Optional[Trabajo]:
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+
+    def salud(self) -> dict:
+        router = obtener_router(self.url)
+        return {
+            "ok": True,
+            "modelo": self.modelo,
+            "evaluaciones": len(self.estado.evaluaciones),
+            "cola": self.planificador.estadisticas(),
+            "endpoints": router.estadisticas() if router else [{"url": self.url}],
+        }
+
+
+class Manejador(BaseHTTPRequestHandler):
+    """Rutas HTTP del servicio (una instancia por pedido; el servicio va en el server)."""
+
+    server_version = "JuegoCP/1.0"
+
+    @property
+    def servicio(self) -> Servicio:
+        return self.server.servicio  # type: ignore[attr-defined]
+
+    def log_message(self, formato: str, *args) -> None:
+        pass
+
+    def _responder(self, codigo: int, datos, encabezados: Optional[dict] = None) -> None:
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for clave, valor in (encabezados or {}).items():
+            self.send_header(clave, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != "/evaluaciones":
+            self._responder(404, {"error": "Ruta desconocida"})
+            return
+        try:
+            largo = int(self.headers.get("Content-Length", 0))
+            datos = json.loads(self.rfile.read(largo) or b"{}")
+            if not isinstance(datos, dict):
+                raise ValueError("El cuerpo debe ser un objeto JSON")
+            trabajo = self.servicio.enviar(datos)
+        except ColaLlena as e:
+            self._responder(503, {"error": str(e)}, {"Retry-After": "10"})
+            return
+        except ValueError as e:
+            self._responder(400, {"error": str(e)})
+            return
+        self._responder(202, asdict(trabajo), {"Location": f"/evaluaciones/{trabajo.id}"})
+
+    def do_GET(self) -> None:
+        partes = urlsplit(self.path)
+        if partes.path.startswith("/evaluaciones/"):
+            trabajo = self.servicio.trabajo(partes.path.rsplit("/", 1)[-1])
+            if trabajo is None:
+                self._responder(404, {"error": "Trabajo desconocido"})
+            else:
+                self._responder(200, asdict(trabajo))
+        elif partes.path == "/eventos":
+            try:
+                desde = _leer_id_evento(parse_qs(partes.query).get("desde", [""])[0])
+            except ValueError:
+                self._responder(400, {"error": "desde tiene que ser el id de un evento (archivo:offset)"})
+                return
+            self._eventos(desde)
+        elif partes.path == "/ranking":
+            self.servicio.estado.sincronizar()
+            self._responder(200, self.servicio.estado.ranking())
+        elif partes.path == "/salud":
+            self._responder(200, self.servicio.salud())
+        elif partes.path == "/metrics":
+            cuerpo = REGISTRO.exponer().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+        else:
+            self._responder(404, {"error": "Ruta desconocida"})
+
+    def _eventos(self, desde: Optional[Tuple[str, int]]) -> None:
+        """
+        Manda cada evaluación nueva como una línea JSON hasta que el cliente corta.
+
+        Cada línea lleva el id del registro ("archivo:offset" en los logs),
+        que no cambia aunque escriban varios procesos ni al reiniciar el
+        servicio. Para retomar se pasa el último id recibido en `desde`:
+        los logs se nombran por segundo y solo se agregan, así que el orden
+        (archivo, offset) es el orden en que se guardaron.
+        """
+        estado = self.servicio.estado
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        enviadas = 0
+        ultimo_envio = 0.0
+        try:
+            while True:
+                # Los cambios de otros procesos (Streamlit local, la CLI) llegan por los logs
+                estado.sincronizar()
+                version = estado.version
+                evaluaciones = estado.evaluaciones
+                # El batch crece mientras se lee: se corta en la longitud tomada acá
+                total = len(evaluaciones)
+                lineas = []
+                for i in range(enviadas, total):
+                    origen = evaluaciones.origen(i)
+                    if origen is None or (desde is not None and origen <= desde):
+                        continue
+                    evento = {"id": f"{origen[0]}:{origen[1]}", "evaluacion": evaluaciones[i].to_dict()}
+                    lineas.append(json.dumps(evento, ensure_ascii=False) + "\n")
+                enviadas = max(enviadas, total)
+                if lineas or time.monotonic() - ultimo_envio >= LATIDO_EVENTOS:
+                    self.wfile.write(("".join(lineas) or "\n").encode("utf-8"))
+                    self.wfile.flush()
+                    ultimo_envio = time.monotonic()
+                estado.esperar_cambio(version, timeout=1.0)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def _leer_id_evento(texto: str) -> Optional[Tuple[str, int]]:
+    """Id de evento "archivo:offset" como tupla (None si viene vacío)."""
+    if not texto:
+        return None
+    archivo, separador, offset = texto.rpartition(":")
+    if not separador or not archivo or not offset.isdigit():
+        raise ValueError(f"Id de evento inválido: {texto}")
+    return archivo, int(offset)
+
+
+def crear_servidor(servicio: Servicio, host: str, puerto: int) -> ThreadingHTTPServer:
+    """Servidor HTTP (un hilo por conexión) con el servicio adjunto."""
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    servidor.servicio = servicio  # type: ignore[attr-defined]
+    return servidor
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.servicio", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO_DEFAULT)
+    parser.add_argument("--workers", type=int, default=2, help="Evaluaciones simultáneas contra Ollama")
+    parser.add_argument("--en-cola", type=int, default=12, help="Evaluaciones que pueden esperar turno")
+    parser.add_argument("--url", default=URL_OLLAMA_DEFAULT, help="Endpoint de Ollama (varios separados por coma)")
+    parser.add_argument("--modelo", default=MODELO_DEFAULT)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_DEFAULT)
+    parser.add_argument("--logs", help="Carpeta de logs (por defecto la de la app)")
+    args = parser.parse_args(argv)
+
+    if args.logs:
+        storage.configurar_logs(args.logs)
+    planificador = Planificador(max_concurrentes=args.workers, max_en_cola=args.en_cola)
+    REGISTRO.colector("turnos", planificador.metricas)
+    servicio = Servicio(
+        estado=EstadoJuego(),
+        planificador=planificador,
+        url=args.url,
+        modelo=args.modelo,
+        timeout=args.timeout
+    )
+    servidor = crear_servidor(servicio, args.host, args.puerto)
+    print(f"Servicio de evaluación en http://{args.host}:{args.puerto} (logs en {storage.LOGS_DIR})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Detección de entregas casi idénticas dentro de un juego.
+
+Los equipos suelen reenviar la misma pieza con retoques mínimos y cada
+reenvío paga una evaluación completa. Cada entrega se resume en una firma
+MinHash de tipo bottom-k (los K hashes más chicos de sus 4-gramas de
+caracteres, sin tildes ni puntuación) que estima la similitud de Jaccard
+entre dos textos comparando solo esas firmas. Todo es local: un hash por
+4-grama al firmar y operaciones de conjuntos de K elementos al comparar.
+
+El índice se arma con los logs (las entregas guardadas desde que se
+registra "entrega") y se pone al día leyendo solo lo que se agregó, así
+también ve lo que guardan la CLI o el servicio desde otros procesos.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+
+from app import storage
+
+
+# Tamaño de la firma: con textos de menos 4-gramas que esto la similitud es exacta
+K_FIRMA = 64
+TAMANO_NGRAMA = 4
+
+# Similitud estimada desde la que se avisa y desde la que se puede reusar la evaluación
+UMBRAL_DUPLICADO = 0.8
+UMBRAL_REUSO = 0.9
+
+# Coincidencias que se informan por entrega
+MAX_COINCIDENCIAS = 3
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin tildes y con la puntuación y los espacios colapsados."""
+    sin_tildes = unicodedata.normalize("NFKD", texto.casefold()).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", sin_tildes).split())
+
+
+def firmar(texto: str) -> FrozenSet[int]:
+    """Firma bottom-k: los K_FIRMA hashes más chicos de los n-gramas del texto."""
+    normal = normalizar(texto)
+    ngramas = {normal[i:i + TAMANO_NGRAMA] for i in range(max(1, len(normal) - TAMANO_NGRAMA + 1))}
+    hashes = (int.from_bytes(hashlib.blake2b(n.encode(), digest_size=8).digest(), "big") for n in ngramas if n)
+    return frozenset(heapq.nsmallest(K_FIRMA, hashes))
+
+
+def similitud(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    """Jaccard estimado: qué parte de los K menores hashes de la unión está en las dos firmas."""
+    if not a or not b:
+        return 0.0
+    union = heapq.nsmallest(K_FIRMA, a | b)
+    return sum(1 for h in union if h in a and h in b) / len(union)
+
+
+def texto_entrega(campos: Dict[str, str]) -> str:
+    """Texto que se compara: los campos de la entrega, sin las etiquetas del formato."""
+    return "\n".join(t.strip() for t in campos.values() if t and t.strip())
+
+
+@dataclass
+class Coincidencia:
+    """Una entrega anterior del juego parecida a la que se está por evaluar."""
+    similitud: float
+    timestamp: str
+    # Entrega anterior (forma de Entrega.to_dict()) y su evaluación
+    entrega: dict
+    evaluacion: dict = field(default_factory=dict)
+
+    def reusable(self, entrega: dict) -> bool:
+        """
+        La evaluación anterior vale para `entrega` (misma forma de to_dict()).
+
+        Hace falta el mismo equipo, ronda, etapa, formato, tablero y
+        situación interna, y un texto casi igual.
+        """
+        claves = ("equipo", "ronda", "etapa", "formato", "tablero", "situacion_interna")
+        return self.similitud >= UMBRAL_REUSO and all(self.entrega.get(c) == entrega.get(c) for c in claves)
+
+    def resumen(self) -> dict:
+        """Metadatos serializables (para el log y la respuesta del servicio)."""
+        return {
+            "similitud": round(self.similitud, 3),
+            "timestamp": self.timestamp,
+            "equipo": self.entrega.get("equipo"),
+            "ronda": self.entrega.get("ronda"),
+            "formato": self.entrega.get("formato"),
+            "total_final": self.evaluacion.get("total_final"),
+            "titular": self.evaluacion.get("titular"),
+        }
+
+
+@dataclass
+class _Registro:
+    firma: FrozenSet[int]
+    coincidencia: Coincidencia
+
+
+class IndiceEntregas:
+    """Firmas de las entregas guardadas, agrupadas por juego."""
+
+    def __init__(self):
+        self._por_juego: Dict[str, List[_Registro]] = {}
+        self._leidos: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def actualizar(self) -> None:
+        """Agrega las entregas que se guardaron en los logs desde la última vez."""
+        for registro in storage.leer_entregas_nuevas(self._leidos):
+            texto = texto_entrega(registro["entrega"].get("campos") or {})
+            if not texto:
+                continue
+            coincidencia = Coincidencia(0.0, registro["timestamp"], registro["entrega"], registro["evaluacion"])
+            self._por_juego.setdefault(registro["juego"], []).append(_Registro(firmar(texto), coincidencia))
+
+    def buscar(self, juego: str, campos: Dict[str, str], umbral: float = UMBRAL_DUPLICADO) -> List[Coincidencia]:
+        """
+        Entregas anteriores del juego con similitud >= umbral, de la más parecida a la menos.
+
+        Args:
+            juego: Identificador del juego (sesión docente, lote o juego del servicio)
+            campos: Campos de la entrega nueva
+        """
+        firma = firmar(texto_entrega(campos))
+        with self._lock:
+            self.actualizar()
+            registros = list(self._por_juego.get(juego, ()))
+        encontradas = []
+        for registro in registros:
+            valor = similitud(firma, registro.firma)
+            if valor >= umbral:
+                original = registro.coincidencia
+                encontradas.append(Coincidencia(valor, original.timestamp, original.entrega, original.evaluacion))
+        encontradas.sort(key=lambda c: (c.similitud, c.timestamp), reverse=True)
+        return encontradas[:MAX_COINCIDENCIAS]
+
+
+_indice: Optional[IndiceEntregas] = None
+_indice_lock = threading.Lock()
+
+
+def obtener_indice() -> IndiceEntregas:
+    """Índice compartido del proceso (se llena con los logs en la primera búsqueda)."""
+    global _indice
+    with _indice_lock:
+        if _indice is None:
+            _indice = IndiceEntregas()
+        return _indice
@@ -0,0 +1,229 @@
+"""
+Estado de juego compartido por todas las sesiones del proceso.
+
+Streamlit crea un `st.session_state` por pestaña del navegador: la laptop
+docente y la pestaña del proyector tenían cada una su propia copia de las
+evaluaciones y se desincronizaban hasta recargar. Acá hay una única copia
+en memoria, respaldada por los logs de storage, con una versión monótona
+que sube con cada cambio y avisa a quien esté esperando.
+
+Los logs se leen de forma incremental, como storage.leer_entregas_nuevas:
+por archivo se recuerda cuántos bytes ya se leyeron, así que sincronizar
+con lo que escribieron otros procesos cuesta lo que ocupan las
+evaluaciones nuevas y no el historial entero.
+
+Las evaluaciones se guardan en un EvaluacionBatch (columnar): puntajes y
+categorías en arrays, y el texto de las evaluaciones de los logs se relee
+del archivo recién cuando se muestra.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models import Evaluacion, EvaluacionBatch
+from app.storage import en_carpeta_logs, guardar_evaluacion, leer_evaluaciones_nuevas, obtener_ranking, version_logs
+
+
+# Cada cuánto (segundos) se revisa si otro proceso escribió en los logs
+INTERVALO_SINCRONIZACION = 1.0
+
+
+class EstadoJuego:
+    """
+    Evaluaciones del juego compartidas entre sesiones.
+
+    `evaluaciones` es un EvaluacionBatch que todas las sesiones comparten y
+    que solo crece: agregar() y sincronizar() le suman los registros nuevos
+    de los logs. Los lectores no necesitan lock (la longitud sube con el
+    registro ya completo). `version` sube en 1 con cada cambio.
+    """
+
+    def __init__(self, en_segundo_plano: bool = False):
+        self._cambio = threading.Condition()
+        self._suscriptores: List[Callable[[int], None]] = []
+        self._version = 0
+        # Bytes ya leídos de cada archivo de log
+        self._leidos: Dict[str, int] = {}
+        self._ultima_sincronizacion = time.monotonic()
+        self._evaluaciones = EvaluacionBatch()
+        self._ranking: Optional[Tuple[int, list]] = None
+        self._cargada = threading.Event()
+        if en_segundo_plano:
+            threading.Thread(target=self._carga_inicial, name="carga-historial", daemon=True).start()
+        else:
+            self._carga_inicial()
+
+    def _carga_inicial(self) -> None:
+        """Lee el historial de los logs (en un hilo aparte si se pidió en segundo plano)."""
+        try:
+            with self._cambio:
+                leer_evaluaciones_nuevas(self._evaluaciones, self._leidos)
+                self._publicar()
+        except Exception as e:
+            print(f"Error al cargar el historial: {e}")
+        finally:
+            self._cargada.set()
+
+    @property
+    def cargada(self) -> bool:
+        """True cuando terminó la carga inicial del historial."""
+        return self._cargada.is_set()
+
+    def esperar_carga(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que termine la carga inicial. Retorna False si venció el timeout."""
+        return self._cargada.wait(timeout)
+
+    @property
+    def version(self) -> int:
+        """Versión actual del estado (monótona)."""
+        return self._version
+
+    @property
+    def evaluaciones(self) -> EvaluacionBatch:
+        """
+        Todas las evaluaciones, en orden de llegada (espera la carga inicial).
+
+        Indexar (o recorrer) materializa Evaluacion con su texto; para
+        contar o filtrar conviene usar las columnas (len, filtrar, valor).
+        """
+        self._cargada.wait()
+        return self._evaluaciones
+
+    def ranking(self) -> list:
+        """Ranking acumulado, calculado una sola vez por versión."""
+        self._cargada.wait()
+        cache = self._ranking
+        if cache is not None and cache[0] == self._version:
+            return cache[1]
+        version, evaluaciones = self._version, self._evaluaciones
+        ranking = obtener_ranking(evaluaciones)
+        self._ranking = (version, ranking)
+        return ranking
+
+    def agregar(
+        self,
+        evaluacion: Evaluacion,
+        prompt_completo: str,
+        respuesta_llm: str,
+        modelo_usado: str = "llama2",
+        metadatos: Optional[dict] = None
+    ) -> str:
+        """
+        Guarda la evaluación en los logs y la agrega al estado compartido.
+
+        La evaluación entra al estado releyendo los logs desde lo último
+        leído, así que también se suman (en orden) las que otros procesos
+        hayan escrito antes.
+
+        Returns:
+            Ruta del archivo de log (igual que guardar_evaluacion)
+        """
+        self._cargada.wait()
+        with self._cambio:
+            log_file = guardar_evaluacion(
+                evaluacion=evaluacion,
+                prompt_completo=prompt_completo,
+                respuesta_llm=respuesta_llm,
+                modelo_usado=modelo_usado,
+                metadatos=metadatos
+            )
+            leer_evaluaciones_nuevas(self._evaluaciones, self._leidos)
+            self._publicar()
+        return log_file
+
+    def incorporar(self, evaluacion: Evaluacion, log_file: str) -> None:
+        """
+        Suma una evaluación que guardó otro proceso (el servicio de evaluación).
+
+        Si `log_file` está en la carpeta de logs de este proceso, se lee de
+        ahí como cualquier otra; si no (el servicio usa otra carpeta u otra
+        máquina), se agrega en memoria con la evaluación recibida.
+        """
+        self._cargada.wait()
+        if en_carpeta_logs(log_file):
+            self.sincronizar(forzar=True)
+            return
+        with self._cambio:
+            self._evaluaciones.agregar(evaluacion)
+            self._publicar()
+
+    def sincronizar(self, forzar: bool = False) -> bool:
+        """
+        Lee de los logs las evaluaciones que escribieron otros procesos.
+
+        La revisión (un stat por archivo) se hace como mucho una vez por
+        INTERVALO_SINCRONIZACION, sin importar cuántas sesiones la pidan.
+
+        Returns:
+            True si el estado cambió
+        """
+        if not self._cargada.is_set():
+            return False
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultima_sincronizacion < INTERVALO_SINCRONIZACION:
+            return False
+        with self._cambio:
+            self._ultima_sincronizacion = ahora
+            if version_logs() == sum(self._leidos.values()):
+                return False
+            if not leer_evaluaciones_nuevas(self._evaluaciones, self._leidos):
+                return False
+            self._publicar()
+        return True
+
+    def esperar_cambio(self, version: int, timeout: Optional[float] = None) -> int:
+        """
+        Bloquea hasta que la versión supere `version` (o venza el timeout).
+
+        Returns:
+            Versión actual al despertar
+        """
+        with self._cambio:
+            self._cambio.wait_for(lambda: self._version > version, timeout=timeout)
+            return self._version
+
+    def suscribir(self, callback: Callable[[int], None]) -> Callable[[], None]:
+        """
+        Registra un callback que recibe la nueva versión en cada cambio.
+
+        Returns:
+            Función para cancelar la suscripción
+        """
+        with self._cambio:
+            self._suscriptores.append(callback)
+
+        def cancelar() -> None:
+            with self._cambio:
+                if callback in self._suscriptores:
+                    self._suscriptores.remove(callback)
+        return cancelar
+
+    def _publicar(self) -> None:
+        """Sube la versión y notifica (con el lock tomado)."""
+        self._version += 1
+        self._cambio.notify_all()
+        for callback in list(self._suscriptores):
+            try:
+                callback(self._version)
+            except Exception as e:
+                print(f"Error en suscriptor del estado: {e}")
+
+
+_estado: Optional[EstadoJuego] = None
+_estado_lock = threading.Lock()
+
+
+def obtener_estado() -> EstadoJuego:
+    """
+    Retorna el estado compartido del proceso.
+
+    La primera vez lo crea y lanza la carga del historial en segundo plano,
+    así la app puede pintar el sidebar mientras se leen los logs.
+    """
+    global _estado
+    if _estado is None:
+        with _estado_lock:
+            if _estado is None:
+                _estado = EstadoJuego(en_segundo_plano=True)
+    return _estado
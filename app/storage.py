@@ -3,23 +3,58 @@ Manejo de almacenamiento de logs y evaluaciones.
 Guarda trazas completas en formato JSONL.
 """
 
+import hashlib
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-from app.models import Evaluacion
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.metricas import ESCRITURA_SEGUNDOS, ESPERA_ESCRITURA, ETAPA_SEGUNDOS
+from app.models import Evaluacion, EvaluacionBatch, ESQUEMA_VERSION
 
 
-LOGS_DIR = Path("logs")
-LOGS_DIR.mkdir(exist_ok=True)
+# Carpeta de logs: JUEGO_LOGS_DIR o <raíz del repo>/logs, sin depender del
+# directorio de trabajo. Se crea recién al guardar el primer registro.
+LOGS_DIR = Path(os.environ.get("JUEGO_LOGS_DIR") or Path(__file__).resolve().parent.parent / "logs")
+
+
+# Serializa las escrituras: un registro largo puede ir en varias llamadas a write()
+# y dos hilos (sesiones o workers de la CLI) no deben intercalar líneas
+_escritura_lock = threading.Lock()
+
+
+@contextmanager
+def _escritura(archivo: str) -> Iterator[None]:
+    """Toma el lock de escritura registrando cuánto hubo que esperarlo."""
+    inicio = time.perf_counter()
+    with _escritura_lock:
+        ESPERA_ESCRITURA.observar(time.perf_counter() - inicio, archivo=archivo)
+        yield
+
+
+def configurar_logs(ruta) -> Path:
+    """Cambia la carpeta de logs (por ejemplo, una por curso)."""
+    global LOGS_DIR
+    LOGS_DIR = Path(ruta)
+    return LOGS_DIR
+
+
+def _carpeta_logs() -> Path:
+    """Carpeta de logs, creándola si todavía no existe."""
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    return LOGS_DIR
 
 
 def guardar_evaluacion(
     evaluacion: Evaluacion,
     prompt_completo: str,
     respuesta_llm: str,
-    modelo_usado: str = "llama2"
+    modelo_usado: str = "llama2",
+    metadatos: Optional[dict] = None
 ) -> str:
     """
     Guarda una evaluación completa en el log JSONL.
@@ -29,27 +64,88 @@ def guardar_evaluacion(
         prompt_completo: Prompt completo enviado al LLM
         respuesta_llm: Respuesta completa del LLM
         modelo_usado: Nombre del modelo usado
+        metadatos: Datos extra a guardar en el registro (ej. multimuestra)
     
     Returns:
         Ruta del archivo de log
     """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    session_file = LOGS_DIR / f"session_{timestamp}.jsonl"
+    session_file = _carpeta_logs() / f"session_{timestamp}.jsonl"
     
     log_entry = {
         "timestamp": datetime.now().isoformat(),
         "modelo": modelo_usado,
         "prompt_completo": prompt_completo,
         "respuesta_llm": respuesta_llm,
+        "esquema": ESQUEMA_VERSION,
         "evaluacion": evaluacion.to_dict()
     }
+    if metadatos:
+        log_entry.update(metadatos)
     
-    with open(session_file, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
+    with ETAPA_SEGUNDOS.medir(etapa="almacenamiento"):
+        linea = json.dumps(log_entry, ensure_ascii=False) + '\n'
+        with ESCRITURA_SEGUNDOS.medir(archivo="session"), _escritura("session"), open(session_file, 'a', encoding='utf-8') as f:
+            f.write(linea)
     
     return str(session_file)
 
 
+def guardar_fallo(
+    prompt_completo: str,
+    respuesta_llm: str,
+    error: str,
+    modelo_usado: str = "llama2",
+    costos: Optional[dict] = None,
+    formato: Optional[str] = None,
+    num_predict: Optional[int] = None
+) -> str:
+    """
+    Guarda un turno que no produjo evaluación (JSON ilegible aun tras la reparación).
+    
+    Se escribe en logs/fallos_*.jsonl para no mezclarse con las evaluaciones;
+    `costos` registra los tokens y segundos gastados, que es lo que cuesta
+    el reintento completo cuando el equipo vuelve a enviar. El formato y su
+    num_predict sirven para que cargar_eval_counts cuente las respuestas
+    que se cortaron por presupuesto.
+    
+    Returns:
+        Ruta del archivo de log
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    fallos_file = _carpeta_logs() / f"fallos_{timestamp}.jsonl"
+    
+    log_entry = {
+        "timestamp": datetime.now().isoformat(),
+        "modelo": modelo_usado,
+        "prompt_completo": prompt_completo,
+        "respuesta_llm": respuesta_llm,
+        "error": error,
+        "costos": costos or {},
+        "formato": formato,
+        "num_predict": num_predict
+    }
+    
+    linea = json.dumps(log_entry, ensure_ascii=False) + '\n'
+    with ESCRITURA_SEGUNDOS.medir(archivo="fallos"), _escritura("fallos"), open(fallos_file, 'a', encoding='utf-8') as f:
+        f.write(linea)
+    
+    return str(fallos_file)
+
+
+def _evaluacion_desde_log(log_entry: dict, eval_dict: dict) -> Evaluacion:
+    """
+    Usa el camino rápido si el registro declara el esquema canónico actual;
+    los registros viejos (sin versión) pasan por la normalización completa.
+    """
+    if log_entry.get("esquema") == ESQUEMA_VERSION:
+        try:
+            return Evaluacion.from_dict_confiable(eval_dict)
+        except KeyError:
+            pass
+    return Evaluacion.from_dict(eval_dict)
+
+
 def cargar_evaluaciones() -> list:
     """
     Carga todas las evaluaciones guardadas desde los archivos de log.
@@ -70,8 +166,7 @@ def cargar_evaluaciones() -> list:
                         log_entry = json.loads(line)
                         eval_dict = log_entry.get('evaluacion', {})
                         if eval_dict:
-                            evaluacion = Evaluacion.from_dict(eval_dict)
-                            evaluaciones.append(evaluacion)
+                            evaluaciones.append(_evaluacion_desde_log(log_entry, eval_dict))
         except (json.JSONDecodeError, ValueError, KeyError) as e:
             print(f"Error al cargar {log_file}: {e}")
             continue
@@ -79,17 +174,452 @@ def cargar_evaluaciones() -> list:
     return evaluaciones
 
 
+def cargar_batch() -> EvaluacionBatch:
+    """
+    Carga todas las evaluaciones en formato columnar (EvaluacionBatch).
+    
+    El texto narrativo no se guarda en memoria: el batch recuerda el
+    archivo y offset de cada registro y lo relee a demanda.
+    
+    Returns:
+        EvaluacionBatch con todas las evaluaciones de los logs
+    """
+    batch = EvaluacionBatch()
+    leer_evaluaciones_nuevas(batch, {})
+    return batch
+
+
+def leer_evaluaciones_nuevas(batch: EvaluacionBatch, leidos: Dict[str, int]) -> int:
+    """
+    Agrega al batch las evaluaciones guardadas desde la última lectura.
+    
+    Como leer_entregas_nuevas, solo lee los bytes agregados desde la vez
+    anterior (`leidos`, {archivo: bytes ya leídos}, se actualiza en el
+    lugar) y deja una línea a medio escribir para la próxima. Una línea
+    ilegible se saltea sin perder el resto del archivo.
+    
+    Returns:
+        Cantidad de evaluaciones agregadas
+    """
+    if not LOGS_DIR.exists():
+        return 0
+    
+    agregadas = 0
+    for log_file in sorted(LOGS_DIR.glob("session_*.jsonl")):
+        try:
+            tamano = log_file.stat().st_size
+            inicio = leidos.get(log_file.name, 0)
+            if tamano <= inicio:
+                continue
+            with open(log_file, 'rb') as f:
+                f.seek(inicio)
+                datos = f.read(tamano - inicio)
+        except OSError as e:
+            print(f"Error al leer {log_file}: {e}")
+            continue
+        completo = datos.rfind(b"\n") + 1
+        leidos[log_file.name] = inicio + completo
+        offset = inicio
+        for line in datos[:completo].splitlines(keepends=True):
+            if line.strip():
+                try:
+                    log_entry = json.loads(line)
+                    eval_dict = log_entry.get('evaluacion', {})
+                    if eval_dict:
+                        if log_entry.get("esquema") != ESQUEMA_VERSION:
+                            eval_dict = Evaluacion.from_dict(eval_dict).to_dict()
+                        batch.agregar_registro(eval_dict, str(log_file), offset)
+                        agregadas += 1
+                except (json.JSONDecodeError, ValueError, KeyError) as e:
+                    print(f"Error al cargar {log_file} (byte {offset}): {e}")
+            offset += len(line)
+    
+    return agregadas
+
+
+def _tokens_respuesta(tokens: Optional[int], truncada: bool, num_predict: Optional[int]) -> Optional[int]:
+    # Una respuesta cortada por presupuesto necesitaba al menos num_predict tokens
+    if truncada and num_predict:
+        return max(tokens or 0, num_predict)
+    return tokens
+
+
+def cargar_eval_counts() -> Dict[str, List[int]]:
+    """
+    Recolecta los tokens generados (eval_count) por formato de entrega.
+    
+    Sirve para aprender el presupuesto de num_predict de cada formato.
+    Cuenta la generación original de las respuestas reparadas y de los
+    fallos (logs/fallos_*.jsonl): las que agotaron num_predict son justo
+    las que no entraron, y cuentan como mínimo num_predict para que el
+    presupuesto pueda crecer.
+    
+    Returns:
+        Diccionario {formato: [eval_count, ...]}
+    """
+    observados: Dict[str, List[int]] = {}
+    
+    if not LOGS_DIR.exists():
+        return observados
+    
+    archivos = sorted(LOGS_DIR.glob("session_*.jsonl")) + sorted(LOGS_DIR.glob("fallos_*.jsonl"))
+    for log_file in archivos:
+        try:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    log_entry = json.loads(line)
+                    formato = log_entry.get("formato")
+                    if not formato:
+                        continue
+                    num_predict = log_entry.get("num_predict")
+                    generacion = log_entry.get("generacion") or {}
+                    multimuestra = log_entry.get("multimuestra") or {}
+                    original = (log_entry.get("costos") or {}).get("original")
+                    if "reparacion" in generacion:
+                        # Registros viejos sin el costo de la generación original: no se sabe cuánto generó
+                        original = generacion["reparacion"].get("reintento_completo")
+                    elif generacion:
+                        original = {"tokens_generados": generacion.get("eval_count"), "truncada": generacion.get("truncada", False)}
+                    conteos = [(original["tokens_generados"], original.get("truncada", False))] if original else []
+                    eval_counts = multimuestra.get("eval_counts", [])
+                    conteos += zip(eval_counts, multimuestra.get("truncadas") or [False] * len(eval_counts))
+                    for tokens, truncada in conteos:
+                        tokens = _tokens_respuesta(tokens, truncada, num_predict)
+                        if tokens:
+                            observados.setdefault(formato, []).append(tokens)
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Error al leer {log_file}: {e}")
+            continue
+    
+    return observados
+
+
+def guardar_calibracion_tokens(modelo: str, observaciones: List[Tuple[int, int]]) -> str:
+    """
+    Agrega mediciones de tokens de prompt (ver `python -m app.cli calibrar`).
+
+    Args:
+        observaciones: [(caracteres del prompt, prompt_eval_count), ...]
+
+    Returns:
+        Ruta del archivo de calibración
+    """
+    archivo = _carpeta_logs() / "calibracion_tokens.jsonl"
+    timestamp = datetime.now().isoformat()
+    lineas = "".join(
+        json.dumps({"timestamp": timestamp, "modelo": modelo, "caracteres": c, "prompt_eval_count": t}) + '\n'
+        for c, t in observaciones
+    )
+    with _escritura("calibracion"), open(archivo, 'a', encoding='utf-8') as f:
+        f.write(lineas)
+    return str(archivo)
+
+
+def cargar_tokens_prompt() -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Lee las mediciones de logs/calibracion_tokens.jsonl, agrupadas por modelo.
+
+    Las evaluaciones normales no aportan: con el corte temprano del stream
+    no llega el prompt_eval_count de Ollama (ver pipeline.calibrar_tokens).
+
+    Returns:
+        Diccionario {modelo: [(caracteres, tokens), ...]}
+    """
+    observados: Dict[str, List[Tuple[int, int]]] = {}
+
+    archivo = LOGS_DIR / "calibracion_tokens.jsonl"
+    if not archivo.exists():
+        return observados
+
+    with open(archivo, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                log_entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Error al leer {archivo}: {e}")
+                continue
+            if log_entry.get("prompt_eval_count"):
+                observados.setdefault(log_entry.get("modelo", ""), []).append(
+                    (log_entry["caracteres"], log_entry["prompt_eval_count"])
+                )
+
+    return observados
+
+
+def leer_entregas_nuevas(leidos: Dict[str, int]) -> List[dict]:
+    """
+    Entregas guardadas en los logs desde la última lectura.
+
+    Solo lee los bytes que se agregaron desde la vez anterior: `leidos`
+    ({archivo: bytes ya leídos}) se actualiza en el lugar. Los registros
+    anteriores a que se guardara la entrega (sin "entrega") se omiten.
+
+    Returns:
+        Lista de {"juego", "timestamp", "entrega", "evaluacion"}
+    """
+    entregas: List[dict] = []
+
+    if not LOGS_DIR.exists():
+        return entregas
+
+    for log_file in sorted(LOGS_DIR.glob("session_*.jsonl")):
+        try:
+            tamano = log_file.stat().st_size
+            inicio = leidos.get(log_file.name, 0)
+            if tamano <= inicio:
+                continue
+            with open(log_file, 'rb') as f:
+                f.seek(inicio)
+                datos = f.read(tamano - inicio)
+            # Una línea a medio escribir se deja para la próxima lectura
+            completo = datos.rfind(b"\n") + 1
+            leidos[log_file.name] = inicio + completo
+            for line in datos[:completo].splitlines():
+                if not line.strip():
+                    continue
+                log_entry = json.loads(line)
+                if log_entry.get("entrega") and log_entry.get("evaluacion"):
+                    entregas.append({
+                        "juego": log_entry.get("juego", ""),
+                        "timestamp": log_entry.get("timestamp", ""),
+                        "entrega": log_entry["entrega"],
+                        "evaluacion": log_entry["evaluacion"],
+                    })
+        except (OSError, json.JSONDecodeError, ValueError) as e:
+            print(f"Error al leer {log_file}: {e}")
+            continue
+
+    return entregas
+
+
+def cargar_prompts() -> List[dict]:
+    """
+    Prompts ya evaluados en los logs, sin repetidos, para volver a correrlos.
+
+    La clave es un hash del prompt completo: sirve para reanudar corridas y
+    para alinear los resultados de distintos modelos sobre el mismo prompt.
+
+    Returns:
+        Lista de {"clave", "prompt_completo", "modelo", "formato",
+        "num_predict", "evaluacion", "generacion"} en orden de llegada
+    """
+    prompts: Dict[str, dict] = {}
+
+    if not LOGS_DIR.exists():
+        return []
+
+    for log_file in sorted(LOGS_DIR.glob("session_*.jsonl")):
+        try:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    log_entry = json.loads(line)
+                    prompt = log_entry.get("prompt_completo")
+                    if not prompt or not log_entry.get("evaluacion"):
+                        continue
+                    clave = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:16]
+                    if clave not in prompts:
+                        prompts[clave] = {
+                            "clave": clave,
+                            "prompt_completo": prompt,
+                            "modelo": log_entry.get("modelo", ""),
+                            "formato": log_entry.get("formato"),
+                            "num_predict": log_entry.get("num_predict"),
+                            "evaluacion": log_entry["evaluacion"],
+                            "generacion": log_entry.get("generacion") or {},
+                        }
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Error al leer {log_file}: {e}")
+            continue
+
+    return list(prompts.values())
+
+
+# ============================================================================
+# HISTORIAL PAGINADO
+# ============================================================================
+
+# Tamaño de bloque para leer los logs desde el final
+BLOQUE_LECTURA = 64 * 1024
+
+
+@dataclass(frozen=True)
+class FiltroHistorial:
+    """Filtros del historial; None significa "cualquiera"."""
+    ronda: Optional[str] = None
+    equipo: Optional[str] = None
+    partido: Optional[str] = None
+    escandalo: Optional[bool] = None
+
+    def prefiltro(self, linea: bytes) -> bool:
+        """
+        Descarte barato sobre la línea cruda, antes de parsear el JSON.
+
+        Los registros se escriben con json.dumps, así que un campo de texto
+        que coincide aparece tal cual (`"ronda": "R1"`). Es condición
+        necesaria, no suficiente: coincide() hace el chequeo real.
+        """
+        for campo in ("ronda", "equipo", "partido"):
+            valor = getattr(self, campo)
+            if valor is not None:
+                fragmento = f'"{campo}": {json.dumps(valor, ensure_ascii=False)}'.encode("utf-8")
+                if fragmento not in linea:
+                    return False
+        return True
+
+    def coincide(self, evaluacion: Evaluacion) -> bool:
+        """True si la evaluación pasa todos los filtros."""
+        return (
+            (self.ronda is None or evaluacion.ronda == self.ronda)
+            and (self.equipo is None or evaluacion.equipo == self.equipo)
+            and (self.partido is None or evaluacion.partido == self.partido)
+            and (self.escandalo is None or evaluacion.escandalo.visible == self.escandalo)
+        )
+
+
+@dataclass(frozen=True)
+class CursorHistorial:
+    """Posición en el historial: la página siguiente empieza antes de este registro."""
+    archivo: str
+    offset: int
+
+
+def _lineas_hacia_atras(ruta: Path, hasta: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    """
+    Recorre un JSONL del final al principio, de a bloques de BLOQUE_LECTURA.
+
+    Yields:
+        (offset de inicio, línea) de cada registro que empieza antes de `hasta`
+    """
+    with open(ruta, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END) if hasta is None else hasta
+        resto = b""
+        while pos > 0:
+            lectura = min(BLOQUE_LECTURA, pos)
+            pos -= lectura
+            f.seek(pos)
+            partes = (f.read(lectura) + resto).split(b"\n")
+            # La primera parte puede estar cortada: se completa con el bloque anterior
+            resto = partes[0]
+            inicio = pos + len(resto) + 1
+            inicios = []
+            for parte in partes[1:]:
+                inicios.append(inicio)
+                inicio += len(parte) + 1
+            for inicio, parte in zip(reversed(inicios), reversed(partes[1:])):
+                if parte.strip():
+                    yield inicio, parte
+        if resto.strip():
+            yield 0, resto
+
+
+def leer_historial(
+    filtro: Optional[FiltroHistorial] = None,
+    cursor: Optional[CursorHistorial] = None,
+    limite: int = 20
+) -> Tuple[List[Evaluacion], Optional[CursorHistorial]]:
+    """
+    Lee una página del historial, de la evaluación más nueva a la más vieja.
+    
+    Los archivos se leen desde el final y solo se parsean las líneas que
+    pasan el prefiltro, así que en memoria queda únicamente la página
+    pedida aunque el archivo tenga el historial de varios cursos.
+    
+    Args:
+        filtro: Filtros por ronda, equipo, partido y escándalo
+        cursor: Posición devuelta por la página anterior (None = desde el final)
+        limite: Evaluaciones por página
+    
+    Returns:
+        (evaluaciones de la página, cursor de la página siguiente o None si no hay más)
+    """
+    filtro = filtro or FiltroHistorial()
+    pagina: List[Evaluacion] = []
+    ultimo: Optional[CursorHistorial] = None
+    
+    if not LOGS_DIR.exists():
+        return pagina, None
+    
+    archivos = sorted(LOGS_DIR.glob("session_*.jsonl"), key=lambda p: p.name, reverse=True)
+    if cursor is not None:
+        archivos = [a for a in archivos if a.name <= cursor.archivo]
+    
+    for log_file in archivos:
+        hasta = cursor.offset if cursor is not None and log_file.name == cursor.archivo else None
+        for offset, linea in _lineas_hacia_atras(log_file, hasta):
+            if not filtro.prefiltro(linea):
+                continue
+            # Una línea rota (p. ej. la última, a medio escribir por otro proceso) se salta sola
+            try:
+                log_entry = json.loads(linea)
+                eval_dict = log_entry.get('evaluacion', {})
+                if not eval_dict:
+                    continue
+                evaluacion = _evaluacion_desde_log(log_entry, eval_dict)
+            except (json.JSONDecodeError, ValueError, KeyError) as e:
+                print(f"Error al leer {log_file} (byte {offset}): {e}")
+                continue
+            if not filtro.coincide(evaluacion):
+                continue
+            if len(pagina) >= limite:
+                # Hay al menos una más: la página siguiente arranca antes de la última devuelta
+                return pagina, ultimo
+            pagina.append(evaluacion)
+            ultimo = CursorHistorial(log_file.name, offset)
+    
+    return pagina, None
+
+
+def en_carpeta_logs(ruta: str) -> bool:
+    """True si `ruta` es un archivo de la carpeta de logs de este proceso."""
+    archivo = Path(ruta)
+    return archivo.is_file() and archivo.resolve().parent == LOGS_DIR.resolve()
+
+
+def version_logs() -> int:
+    """
+    Versión barata de los logs para detectar evaluaciones nuevas.
+    
+    Es la suma de los tamaños de los archivos session_*.jsonl: como los logs
+    solo se agregan, crece con cada evaluación guardada (desde cualquier
+    sesión o proceso) y se calcula con un stat por archivo, sin leerlos.
+    
+    Returns:
+        Entero que cambia cada vez que se guarda una evaluación
+    """
+    if not LOGS_DIR.exists():
+        return 0
+    
+    total = 0
+    with os.scandir(LOGS_DIR) as entradas:
+        for entrada in entradas:
+            if entrada.name.startswith("session_") and entrada.name.endswith(".jsonl"):
+                try:
+                    total += entrada.stat().st_size
+                except OSError:
+                    continue
+    return total
+
+
 def obtener_ranking(evaluaciones: list) -> list:
     """
     Calcula el ranking acumulado de equipos.
     
     Args:
-        evaluaciones: Lista de objetos Evaluacion
+        evaluaciones: Lista de objetos Evaluacion (o un EvaluacionBatch)
     
     Returns:
         Lista de diccionarios con 'equipo', 'partido', 'total_acumulado', 'cantidad_entregas'
         ordenada por total_acumulado descendente
     """
+    if isinstance(evaluaciones, EvaluacionBatch):
+        return evaluaciones.ranking()
+    
     acumulados = {}
     
     for eval in evaluaciones:
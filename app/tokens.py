@@ -0,0 +1,198 @@
+"""
+Estimación local de los tokens del prompt y elección de num_ctx.
+
+Ollama no expone el tokenizador, así que el prompt se mide en caracteres
+por token, calibrado por modelo contra el prompt_eval_count que informa
+Ollama. Las evaluaciones no lo traen (el corte temprano cierra el stream
+antes), así que se mide aparte con pipeline.calibrar_tokens (botón de
+Configuración o `python -m app.cli calibrar`), que guarda las mediciones
+en logs/calibracion_tokens.jsonl. Sin observaciones suficientes se usa un
+valor conservador, que sobreestima.
+
+Con esa estimación se controlan los presupuestos de las secciones de
+texto libre y se pide el num_ctx más chico que alcanza para prompt +
+respuesta. num_ctx va por escalones: cada valor distinto obliga a Ollama
+a recargar el modelo, así que conviene que se repitan entre llamadas.
+"""
+
+from __future__ import annotations
+
+import math
+import statistics
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app import storage
+
+
+# Sin calibrar: pocos caracteres por token para no quedarse corto
+CARACTERES_POR_TOKEN_DEFAULT = 3.0
+MIN_OBSERVACIONES = 5
+
+# Proporciones fuera de este rango son conteos rotos o prompts que Ollama ya
+# tenía en caché (solo cuenta los tokens que no reutilizó)
+RANGO_CARACTERES_POR_TOKEN = (1.5, 6.0)
+
+# Tokens que agrega la plantilla de chat del modelo alrededor del prompt
+TOKENS_PLANTILLA = 16
+
+# Holgura sobre prompt + num_predict al elegir num_ctx
+MARGEN_CONTEXTO = 1.1
+NUM_CTX_ESCALONES = (2048, 4096, 8192, 16384)
+
+# Presupuesto de tokens por sección del prompt. La entrega ya está acotada
+# por los límites de caracteres del formato y el evento sale de events.py;
+# los que suelen pasarse son la situación interna y el perfil (texto libre).
+PRESUPUESTOS_SECCION = {
+    "situacion_interna": 150,
+    "perfil": 120,
+    "entrega": 400,
+    "evento": 350,
+}
+
+ETIQUETAS_SECCION = {
+    "situacion_interna": "Situación interna",
+    "perfil": "Perfil del candidato",
+    "entrega": "Entrega",
+    "evento": "Contexto del evento",
+}
+
+
+class PromptDemasiadoLargo(ValueError):
+    """El prompt se pasa del presupuesto de una sección o del contexto máximo."""
+
+
+@dataclass
+class Calibracion:
+    """Caracteres por token de un modelo y con cuántas observaciones se estimó."""
+    caracteres_por_token: float = CARACTERES_POR_TOKEN_DEFAULT
+    observaciones: int = 0
+
+    @property
+    def calibrada(self) -> bool:
+        return self.observaciones >= MIN_OBSERVACIONES
+
+    def estimar(self, texto: str) -> int:
+        """Tokens estimados del texto (redondeando para arriba)."""
+        return math.ceil(len(texto) / self.caracteres_por_token) if texto else 0
+
+
+def calibrar(observaciones: List[Tuple[int, int]]) -> Calibracion:
+    """
+    Caracteres por token a partir de pares (caracteres, prompt_eval_count).
+
+    Usa la mediana de las proporciones válidas; con menos de
+    MIN_OBSERVACIONES queda el valor por defecto.
+    """
+    minimo, maximo = RANGO_CARACTERES_POR_TOKEN
+    proporciones = [
+        proporcion
+        for caracteres, tokens in observaciones
+        if tokens > TOKENS_PLANTILLA
+        for proporcion in [caracteres / (tokens - TOKENS_PLANTILLA)]
+        if minimo <= proporcion <= maximo
+    ]
+    if len(proporciones) < MIN_OBSERVACIONES:
+        return Calibracion(observaciones=len(proporciones))
+    return Calibracion(round(statistics.median(proporciones), 3), len(proporciones))
+
+
+_calibraciones: Optional[Dict[str, Calibracion]] = None
+_calibraciones_lock = threading.Lock()
+
+
+def calibracion(modelo: str) -> Calibracion:
+    """
+    Calibración del modelo, leída de los logs la primera vez que se pide.
+
+    Se comparte en todo el proceso (sesiones, workers de la CLI y del
+    servicio); recalibrar() la vuelve a leer.
+    """
+    global _calibraciones
+    with _calibraciones_lock:
+        if _calibraciones is None:
+            _calibraciones = {m: calibrar(obs) for m, obs in storage.cargar_tokens_prompt().items()}
+        return _calibraciones.get(modelo) or Calibracion()
+
+
+def recalibrar() -> None:
+    """Descarta las calibraciones leídas (la próxima consulta relee los logs)."""
+    global _calibraciones
+    with _calibraciones_lock:
+        _calibraciones = None
+
+
+def elegir_num_ctx(tokens_prompt: int, num_predict: int) -> Optional[int]:
+    """Escalón de num_ctx más chico para prompt + respuesta, o None si no entra en ninguno."""
+    necesario = math.ceil((tokens_prompt + TOKENS_PLANTILLA + num_predict) * MARGEN_CONTEXTO)
+    return next((escalon for escalon in NUM_CTX_ESCALONES if escalon >= necesario), None)
+
+
+def _errores_secciones(tokens: Dict[str, int]) -> List[str]:
+    return [
+        f"{ETIQUETAS_SECCION[seccion]}: ~{tokens[seccion]} tokens (máximo {presupuesto})"
+        for seccion, presupuesto in PRESUPUESTOS_SECCION.items()
+        if tokens.get(seccion, 0) > presupuesto
+    ]
+
+
+def exceden(secciones: Dict[str, str], calibracion_modelo: Optional[Calibracion] = None) -> List[str]:
+    """
+    Secciones que se pasan de su presupuesto de tokens.
+
+    Args:
+        secciones: {sección de PRESUPUESTOS_SECCION: texto}
+
+    Returns:
+        Lista de errores (vacía si todas entran)
+    """
+    calibracion_modelo = calibracion_modelo or Calibracion()
+    return _errores_secciones({s: calibracion_modelo.estimar(t) for s, t in secciones.items()})
+
+
+@dataclass
+class MedidaPrompt:
+    """Tokens estimados de un prompt y el num_ctx que le corresponde."""
+    total: int
+    num_predict: int
+    # None si prompt + respuesta no entran en el escalón más grande
+    num_ctx: Optional[int]
+    secciones: Dict[str, int] = field(default_factory=dict)
+
+    def errores(self) -> List[str]:
+        errores = _errores_secciones(self.secciones)
+        if self.num_ctx is None:
+            errores.append(
+                f"El prompt (~{self.total} tokens) más la respuesta ({self.num_predict}) "
+                f"no entra en {NUM_CTX_ESCALONES[-1]} tokens de contexto"
+            )
+        return errores
+
+    def resumen(self) -> dict:
+        """Metadatos serializables para el log."""
+        return {"tokens_prompt_estimados": self.total, "num_ctx": self.num_ctx}
+
+
+def medir_prompt(
+    prompt: str,
+    secciones: Dict[str, str],
+    num_predict: int,
+    calibracion_modelo: Optional[Calibracion] = None
+) -> MedidaPrompt:
+    """
+    Estima los tokens del prompt completo y de cada sección.
+
+    Args:
+        prompt: Prompt completo (sistema + usuario)
+        secciones: {sección de PRESUPUESTOS_SECCION: texto} incluidas en el prompt
+        num_predict: Presupuesto de respuesta que se va a pedir
+    """
+    calibracion_modelo = calibracion_modelo or Calibracion()
+    total = calibracion_modelo.estimar(prompt)
+    return MedidaPrompt(
+        total=total,
+        num_predict=num_predict,
+        num_ctx=elegir_num_ctx(total, num_predict),
+        secciones={s: calibracion_modelo.estimar(t) for s, t in secciones.items()}
+    )
@@ -0,0 +1,203 @@
+"""
+Turnos de evaluación: cola acotada y justa delante de Ollama.
+
+Todas las sesiones de Streamlit corren en el mismo proceso. Sin orden,
+cuando varios docentes evalúan a la vez los pedidos se apilan en Ollama y
+cada uno espera su propio timeout. El planificador deja pasar a lo sumo
+`max_concurrentes` evaluaciones, hace esperar al resto en una cola de
+`max_en_cola` lugares y elige el siguiente por turnos: primero el juego
+atendido hace más tiempo y, dentro de él, el equipo atendido hace más
+tiempo. Con la cola llena, o pasados `espera_max` segundos, el pedido se
+rechaza con ColaLlena.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.metricas import REGISTRO
+
+
+# Evaluaciones corriendo a la vez contra Ollama
+MAX_CONCURRENTES = 2
+
+# Pedidos esperando turno; el siguiente se rechaza
+MAX_EN_COLA = 12
+
+# Espera máxima en la cola (segundos) antes de rechazar
+ESPERA_MAX = 120.0
+
+
+class ColaLlena(RuntimeError):
+    """El pedido no consiguió turno (cola llena o espera vencida)."""
+
+
+@dataclass
+class _Pedido:
+    juego: str
+    equipo: str
+    llegada: int
+    habilitado: bool = False
+
+
+class Planificador:
+    """Cola justa por juego y equipo con un límite de evaluaciones simultáneas."""
+
+    def __init__(
+        self,
+        max_concurrentes: int = MAX_CONCURRENTES,
+        max_en_cola: int = MAX_EN_COLA,
+        espera_max: float = ESPERA_MAX
+    ):
+        self.max_concurrentes = max_concurrentes
+        self.max_en_cola = max_en_cola
+        self.espera_max = espera_max
+        self._cambio = threading.Condition()
+        self._cola: List[_Pedido] = []
+        self._en_curso = 0
+        self._llegadas = 0
+        # Juego o (juego, equipo) -> número de servicio de su último turno
+        self._atendido: Dict[object, int] = {}
+        self._servicios = 0
+        self._atendidos = 0
+        self._rechazados = 0
+        self._esperas: deque = deque(maxlen=500)
+
+    @staticmethod
+    def _prioridad(pedido: _Pedido, atendido: Dict[object, int]) -> tuple:
+        return (
+            atendido.get(pedido.juego, -1),
+            atendido.get((pedido.juego, pedido.equipo), -1),
+            pedido.llegada,
+        )
+
+    def _orden(self) -> List[_Pedido]:
+        """Orden en que se atendería la cola actual si no llegara nadie más."""
+        atendido = dict(self._atendido)
+        servicios = self._servicios
+        pendientes = list(self._cola)
+        orden = []
+        while pendientes:
+            pedido = min(pendientes, key=lambda p: self._prioridad(p, atendido))
+            pendientes.remove(pedido)
+            orden.append(pedido)
+            servicios += 1
+            atendido[pedido.juego] = atendido[(pedido.juego, pedido.equipo)] = servicios
+        return orden
+
+    def _despachar(self) -> None:
+        """Habilita pedidos mientras haya lugar (con el lock tomado)."""
+        while self._cola and self._en_curso < self.max_concurrentes:
+            pedido = min(self._cola, key=lambda p: self._prioridad(p, self._atendido))
+            self._cola.remove(pedido)
+            self._servicios += 1
+            self._atendido[pedido.juego] = self._atendido[(pedido.juego, pedido.equipo)] = self._servicios
+            self._en_curso += 1
+            pedido.habilitado = True
+        self._cambio.notify_all()
+
+    @contextmanager
+    def turno(
+        self,
+        juego: str,
+        equipo: str,
+        al_esperar: Optional[Callable[[int], None]] = None
+    ) -> Iterator[None]:
+        """
+        Espera turno para una evaluación y lo libera al salir del bloque.
+
+        Args:
+            juego: Identificador del juego (una sesión docente)
+            equipo: Equipo que envía la entrega
+            al_esperar: Se llama con la posición en la cola cada vez que cambia
+
+        Raises:
+            ColaLlena: Si la cola está llena o la espera supera espera_max
+        """
+        inicio = time.monotonic()
+        with self._cambio:
+            if len(self._cola) >= self.max_en_cola:
+                self._rechazados += 1
+                raise ColaLlena(
+                    f"Hay {len(self._cola)} evaluaciones esperando turno. Probá de nuevo en un momento."
+                )
+            self._llegadas += 1
+            pedido = _Pedido(juego, equipo, self._llegadas)
+            self._cola.append(pedido)
+            self._despachar()
+
+        try:
+            posicion_previa = None
+            while True:
+                with self._cambio:
+                    if pedido.habilitado:
+                        break
+                    restante = inicio + self.espera_max - time.monotonic()
+                    if restante <= 0:
+                        self._rechazados += 1
+                        raise ColaLlena(
+                            f"La evaluación esperó más de {self.espera_max:.0f} s sin turno. Probá de nuevo en un momento."
+                        )
+                    posicion = self._orden().index(pedido) + 1
+                # El aviso va fuera del lock: puede tocar la interfaz
+                if al_esperar is not None and posicion != posicion_previa:
+                    al_esperar(posicion)
+                    posicion_previa = posicion
+                with self._cambio:
+                    if not pedido.habilitado:
+                        self._cambio.wait(timeout=min(restante, 1.0))
+            with self._cambio:
+                self._esperas.append(time.monotonic() - inicio)
+            yield
+        finally:
+            with self._cambio:
+                if pedido in self._cola:
+                    self._cola.remove(pedido)
+                if pedido.habilitado:
+                    self._en_curso -= 1
+                    self._atendidos += 1
+                self._despachar()
+
+    def estadisticas(self) -> dict:
+        """En curso, en cola, atendidos, rechazados y espera en cola (p50/p95, segundos)."""
+        with self._cambio:
+            esperas = sorted(self._esperas)
+            return {
+                "en_curso": self._en_curso,
+                "en_cola": len(self._cola),
+                "atendidos": self._atendidos,
+                "rechazados": self._rechazados,
+                "espera_p50": round(esperas[len(esperas) // 2], 3) if esperas else 0.0,
+                "espera_p95": round(esperas[int(len(esperas) * 0.95)], 3) if esperas else 0.0,
+            }
+
+    def metricas(self) -> list:
+        """Colector para metricas.REGISTRO: profundidad de la cola y turnos."""
+        datos = self.estadisticas()
+        return [
+            ("juego_cola_en_curso", "gauge", "Evaluaciones con turno", [({}, datos["en_curso"])]),
+            ("juego_cola_esperando", "gauge", "Pedidos esperando turno", [({}, datos["en_cola"])]),
+            ("juego_cola_capacidad", "gauge", "Lugares de la cola de espera", [({}, self.max_en_cola)]),
+            ("juego_cola_atendidos_total", "counter", "Pedidos que obtuvieron turno", [({}, datos["atendidos"])]),
+            ("juego_cola_rechazados_total", "counter", "Pedidos rechazados con ColaLlena", [({}, datos["rechazados"])]),
+            ("juego_cola_espera_segundos", "gauge", "Espera en cola de los últimos pedidos",
+             [({"cuantil": "0.5"}, datos["espera_p50"]), ({"cuantil": "0.95"}, datos["espera_p95"])]),
+        ]
+
+
+_planificador: Optional[Planificador] = None
+_planificador_lock = threading.Lock()
+
+
+def obtener_planificador() -> Planificador:
+    """Retorna el planificador compartido por todas las sesiones del proceso."""
+    global _planificador
+    if _planificador is None:
+        with _planificador_lock:
+            if _planificador is None:
+                _planificador = Planificador()
+                REGISTRO.colector("turnos", _planificador.metricas)
+    return _planificador
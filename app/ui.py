@@ -0,0 +1,117 @@
+"""
+Helpers de interfaz compartidos por todas las páginas.
+
+El módulo se importa una vez por proceso: el CSS del tema y los helpers
+quedan listos y cada rerun solo los emite.
+"""
+
+import streamlit as st
+
+from app.render import card_html, headline_html, score_bar_html
+
+
+# ============================================================================
+# THEME UI - IDENTIDAD VISUAL "CIUDAD ORIENTAL"
+# ============================================================================
+
+CSS_TEMA = """
+<style>
+/* Page Layout */
+.block-container { 
+    padding-top: 1.2rem; 
+    padding-bottom: 2rem; 
+    max-width: 1400px; 
+}
+
+/* Typography */
+h1, h2, h3 { 
+    letter-spacing: -0.02em; 
+    font-weight: 800;
+}
+.small-muted { 
+    color: rgba(0,0,0,0.55); 
+    font-size: 0.92rem; 
+}
+
+/* Cards */
+.co-card {
+    background: #FFFFFF;
+    border: 1px solid rgba(0,0,0,0.06);
+    border-radius: 14px;
+    padding: 16px 18px;
+    box-shadow: 0 8px 20px rgba(0,0,0,0.06);
+    margin: 12px 0 16px 0;
+}
+.co-card-title {
+    font-weight: 800;
+    font-size: 1.05rem;
+    margin-bottom: 10px;
+    color: #111;
+}
+.co-card-body { 
+    font-size: 0.98rem; 
+    line-height: 1.5rem; 
+    color: #333;
+}
+
+/* Badges */
+.co-badge {
+    display: inline-block;
+    padding: 5px 12px;
+    border-radius: 999px;
+    font-size: 0.85rem;
+    font-weight: 700;
+    border: 1.5px solid rgba(0,0,0,0.12);
+    background: rgba(0,0,0,0.02);
+    margin-right: 8px;
+    margin-bottom: 6px;
+}
+
+/* Headline (titular grande) */
+.co-headline {
+    padding: 14px 18px;
+    border-radius: 14px;
+    border: 1px solid rgba(0,0,0,0.08);
+    background: linear-gradient(180deg, rgba(0,0,0,0.02), rgba(0,0,0,0.00));
+    font-weight: 900;
+    font-size: 1.3rem;
+    margin: 12px 0 16px 0;
+    line-height: 1.4;
+}
+
+/* Score Pill */
+.co-pill {
+    display: inline-block;
+    padding: 6px 12px;
+    border-radius: 12px;
+    border: 1px solid rgba(0,0,0,0.10);
+    background: #fff;
+    font-weight: 800;
+    font-size: 0.9rem;
+}
+
+/* Sidebar */
+[data-testid="stSidebar"] {
+    background: #f8f9fa;
+}
+</style>
+"""
+
+
+def aplicar_tema() -> None:
+    """Inyecta el CSS del tema (hay que emitirlo en cada rerun)."""
+    st.markdown(CSS_TEMA, unsafe_allow_html=True)
+
+
+# Helpers UI (el HTML se arma y cachea en app.render)
+def card(title: str, body_html: str, border_color: str = "#DDDDDD", icon: str = "") -> None:
+    """Renderiza una card con título, cuerpo HTML y borde izquierdo coloreado."""
+    st.markdown(card_html(title, body_html, border_color, icon), unsafe_allow_html=True)
+
+def headline(text: str) -> None:
+    """Renderiza un titular grande estilo diario."""
+    st.markdown(headline_html(text), unsafe_allow_html=True)
+
+def score_bar(label: str, value: int, max_value: int = 20) -> None:
+    """Renderiza una barra horizontal de score."""
+    st.markdown(score_bar_html(label, value, max_value), unsafe_allow_html=True)